@@ -0,0 +1,284 @@
+# benchmark.py
+# 战斗负载下的帧时间基准：在离屏窗口里跑完整游戏（渲染 + 模拟 + 视图），按脚本场景施加负载，
+# 输出帧时间分位数、实体数量和各子系统耗时的 JSON，便于对比不同提交
+# 用法：python benchmark.py --out bench.json
+#       python benchmark.py --scenario wave --enemies 40 --frames 600
+#       python benchmark.py --scenario horde --horde-enemies 800   （尸潮模式：数组化模拟 + 实例化渲染）
+from ursina import *
+from panda3d.core import ClockObject
+from core.config import Config
+from core.world import World
+from core.profiler import profiler, install_render_timer
+from core.timers import timers, install_timer_task
+from entities.particles import particle_system, emit_impact_sparks
+from collections import Counter
+import argparse
+import json
+import math
+import random
+import subprocess
+import sys
+import time as _time
+
+SCENARIOS = ('wave', 'full_auto', 'impacts', 'restarts', 'horde')
+GOD_HP = 10 ** 9
+
+def percentile(values, q):
+    if not values: return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+def summarize(values):
+    return {
+        'mean': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3) if values else 0.0,
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def entity_classes():
+    return Counter(type(e).__name__ for e in scene.entities)
+
+def node_count():
+    return render.countNumDescendants()
+
+def detach_mouse():
+    """离屏缓冲 / 无窗口时没有窗口属性可设置：鼠标锁定和显隐只记录状态，不再调用 requestProperties"""
+    cls = type(mouse)
+    cls.locked = property(lambda self: getattr(self, '_locked', False), lambda self, v: setattr(self, '_locked', v))
+    cls.visible = property(lambda self: getattr(self, '_visible', True), lambda self, v: setattr(self, '_visible', v))
+
+
+class Bench:
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.world = None
+
+    # ---------- 场景控制 ----------
+
+    def new_world(self, horde=False):
+        if self.world:
+            self.world.destroy()
+        self.world = World(seed=self.args.seed, horde=horde)
+        self.world.player.hp = GOD_HP
+        self.world.level_manager.sim.player.hp = GOD_HP
+        return self.world
+
+    def start_wave(self, count=None):
+        sim = self.world.level_manager.sim
+        sim.wave = self.args.wave
+        sim.start_wave(count=count or self.args.enemies)
+
+    def spawn_enemies(self):
+        """直接生成敌人而不开始波次（不弹出波次横幅）"""
+        sim = self.world.level_manager.sim
+        for x, z in sim.find_spawn_points(self.args.enemies):
+            sim.spawn_enemy(x, z)
+
+    def aim_and_shoot(self):
+        """转向最近的敌人并扣扳机，弹药始终补满"""
+        lm = self.world.level_manager
+        player = self.world.player
+        e = lm.sim.nearest_enemy(player.x, player.z)
+        if e:
+            player.rotation_y = math.degrees(math.atan2(e.x - player.x, e.z - player.z))
+            dist = math.hypot(e.x - player.x, e.z - player.z)
+            player.camera_pivot.rotation_x = -math.degrees(math.atan2(e.y + 1.2 - (player.y + 2), max(dist, 1e-6)))
+        weapon = player.weapon
+        weapon.ammo = weapon.magazine
+        weapon.shoot()
+
+    def spray_impacts(self):
+        for i in range(self.args.impacts):
+            pos = Vec3(random.uniform(-40, 40), random.uniform(0, 4), random.uniform(-40, 40))
+            emit_impact_sparks(pos, Vec3(0, 1, 0))
+
+    # ---------- 计时 ----------
+
+    def frame(self, frame_ms, subsystems):
+        """推进一帧，记录总耗时和本帧各子系统耗时"""
+        profiler.end_frame()
+        t0 = _time.perf_counter()
+        self.app.step()
+        frame_ms.append((_time.perf_counter() - t0) * 1000)
+        for name, ms in profiler.end_frame().items():
+            subsystems.setdefault(name, []).append(ms)
+        return frame_ms[-1]
+
+    def run_frames(self, frames, per_frame=None):
+        frame_ms, subsystems = [], {}
+        peak = 0
+        for i in range(frames):
+            if per_frame:
+                per_frame()
+            self.frame(frame_ms, subsystems)
+            peak = max(peak, len(scene.entities))
+        return frame_ms, subsystems, peak
+
+    def counts(self):
+        lm = self.world.level_manager
+        return {
+            'enemies': lm.sim.enemy_count,
+            'enemy_projectiles': lm.sim.projectiles.count,
+            'player_bullets': lm.sim.bullets.count,
+            'particles': particle_system().count,
+            'timers_pending': timers.pending,
+        }
+
+    def report(self, name, frame_ms, subsystems, entities_start, entities_end, peak, extra=None):
+        classes = entity_classes()
+        result = {
+            'scenario': name,
+            'frames': len(frame_ms),
+            'frame_ms': summarize(frame_ms),
+            'subsystems_ms': {k: {'mean': round(sum(v) / len(frame_ms), 3), 'p95': round(percentile(v, 95), 3)}
+                              for k, v in sorted(subsystems.items())},
+            'entities': {'start': entities_start, 'end': entities_end, 'peak': peak,
+                         'top_classes': dict(classes.most_common(10))},
+            'render_nodes': node_count(),
+        }
+        if self.world:
+            result['counts'] = self.counts()
+        if extra:
+            result.update(extra)
+        return result
+
+    # ---------- 场景 ----------
+
+    def warmup(self):
+        for i in range(self.args.warmup):
+            self.app.step()
+        profiler.end_frame()
+
+    def scenario_wave(self, per_frame=None, name='wave'):
+        self.new_world()
+        self.start_wave()
+        self.warmup()
+        start = len(scene.entities)
+        frame_ms, subsystems, peak = self.run_frames(self.args.frames, per_frame)
+        return self.report(name, frame_ms, subsystems, start, len(scene.entities), peak)
+
+    def scenario_full_auto(self):
+        return self.scenario_wave(self.aim_and_shoot, name='full_auto')
+
+    def scenario_horde(self):
+        """尸潮模式下一整波敌人同时在场，玩家持续开火"""
+        self.new_world(horde=True)
+        self.start_wave(self.args.horde_enemies)
+        self.warmup()
+        start = len(scene.entities)
+        frame_ms, subsystems, peak = self.run_frames(self.args.frames, self.aim_and_shoot)
+        return self.report('horde', frame_ms, subsystems, start, len(scene.entities), peak,
+                           {'horde_enemies': self.args.horde_enemies})
+
+    def scenario_impacts(self):
+        self.new_world()
+        self.warmup()
+        start = len(scene.entities)
+        frame_ms, subsystems, peak = self.run_frames(self.args.frames, self.spray_impacts)
+        return self.report('impacts', frame_ms, subsystems, start, len(scene.entities), peak,
+                           {'impacts_per_frame': self.args.impacts})
+
+    def restart(self):
+        """与游戏中再次点 PLAY 相同的重开路径：原地重置，不重建场景"""
+        self.world.reset(seed=self.args.seed)
+        self.world.player.hp = GOD_HP
+        self.world.level_manager.sim.player.hp = GOD_HP
+
+    def scenario_restarts(self):
+        """反复重开一局，记录重开耗时以及实体、场景节点数量是否随重启增长（泄漏）"""
+        self.new_world()
+        self.warmup()
+        entities_before = len(scene.entities)
+        nodes_before = node_count()
+        restart_ms, frame_ms, subsystems = [], [], {}
+        peak = 0
+        for i in range(self.args.restarts):
+            self.spawn_enemies()
+            for j in range(self.args.restart_frames):
+                self.frame(frame_ms, subsystems)
+                peak = max(peak, len(scene.entities))
+            t0 = _time.perf_counter()
+            self.restart()
+            restart_ms.append((_time.perf_counter() - t0) * 1000)
+        # 再跑几帧，让延迟销毁的实体真正离开场景
+        for i in range(self.args.warmup):
+            self.app.step()
+        profiler.end_frame()
+        entities_after = len(scene.entities)
+        return self.report('restarts', frame_ms, subsystems, entities_before, entities_after, peak, {
+            'restarts': self.args.restarts,
+            'restart_ms': summarize(restart_ms),
+            'entity_drift': entities_after - entities_before,
+            'render_node_drift': node_count() - nodes_before,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame-time benchmark under scripted combat load')
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--window', choices=('offscreen', 'none', 'onscreen'), default='offscreen',
+                        help="'none' 不创建任何窗口，不计渲染耗时")
+    parser.add_argument('--frames', type=int, default=600, help='每个场景计时的帧数')
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--fps', type=int, default=60, help='固定的逻辑帧率，time.dt = 1/fps')
+    parser.add_argument('--seed', type=int, default=1, help='地图与模拟的随机种子')
+    parser.add_argument('--wave', type=int, default=5)
+    parser.add_argument('--enemies', type=int, default=30)
+    parser.add_argument('--horde-enemies', type=int, default=600, help='horde 场景一波的敌人数')
+    parser.add_argument('--impacts', type=int, default=20, help='impacts 场景每帧的命中火花次数')
+    parser.add_argument('--restarts', type=int, default=10)
+    parser.add_argument('--restart-frames', type=int, default=30, help='每次重启后跑的帧数')
+    parser.add_argument('--out', help='写入 JSON 文件，默认打印到标准输出')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    app = Ursina(window_type=args.window, development_mode=False)
+    if not hasattr(camera, '_clip_plane_far'):
+        camera._clip_plane_far = 1000   # 无窗口时 Ursina 不初始化相机裁剪面
+    if not hasattr(app.win, 'requestProperties'):
+        detach_mouse()
+    # 每帧 time.dt 固定，结果不受机器快慢影响，只有耗时不同
+    clock = ClockObject.getGlobalClock()
+    clock.setMode(ClockObject.MNonRealTime)
+    clock.setFrameRate(args.fps)
+    install_render_timer(app, profiler)
+    install_timer_task(app, timers)
+
+    bench = Bench(app, args)
+    names = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    results = []
+    for name in names:
+        print(f'running {name}...', file=sys.stderr)
+        results.append(getattr(bench, 'scenario_' + name)())
+
+    output = {
+        'commit': git_commit(),
+        'window': args.window,
+        'fps': args.fps,
+        'seed': args.seed,
+        'python': sys.version.split()[0],
+        'scenarios': results,
+    }
+    text = json.dumps(output, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
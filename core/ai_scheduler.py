@@ -0,0 +1,105 @@
+# core/ai_scheduler.py
+# 敌人 AI 调度器：按距离 / 是否在视野内分级，远处敌人降频思考。
+# 降频的敌人各自带一个相位（按加入顺序取黄金分割序列），在自己间隔的网格上错开思考，
+# 同一步生成的一整波敌人不会每隔 AI_MID_INTERVAL / AI_FAR_INTERVAL 一起思考，每步的思考次数保持平稳。
+# 不按耗时限制每帧的思考次数：哪些敌人在哪一步思考只取决于模拟时间，录像和联机预测才能复现
+from core.config import Config
+import time as _time
+import math
+
+_GOLDEN = (math.sqrt(5) - 1) / 2
+
+# LOD 等级
+TIER_NEAR, TIER_MID, TIER_FAR = 0, 1, 2
+
+class AIScheduler:
+    """
+    think(enemy, dt) 为实际的 AI 逻辑；enemy / player 只需提供 x, z。
+    view_forward() 返回玩家水平朝向 (fx, fz)，为 None 时不做视野判断。
+    """
+
+    def __init__(self, player, think, view_forward=None):
+        self.player = player
+        self.think = think
+        self.view_forward = view_forward
+        self.clock = 0.0
+
+        self.agents = []
+        self._last_tick = {}   # 敌人 -> 上次思考的时间
+        self._next_tick = {}   # 敌人 -> 下次应思考的时间
+        self._tier = {}
+        self._phase = {}       # 敌人 -> 相位（0~1，间隔的几分之几）
+        self._added = 0
+
+        # 最近一帧的统计，方便调试 / 性能分析
+        self.ticks_last_frame = 0
+        self.cost_ms_last_frame = 0.0
+
+    def add(self, enemy):
+        if enemy in self._tier: return
+        self.agents.append(enemy)
+        self._phase[enemy] = (self._added * _GOLDEN) % 1
+        self._added += 1
+        # 近处的敌人下一步就思考，其余的从各自相位对应的时刻开始
+        tier, interval = self.classify(enemy)
+        self._tier[enemy] = tier
+        self._last_tick[enemy] = self.clock
+        self._next_tick[enemy] = self.clock if interval == 0 else self._phased(enemy, interval)
+
+    def remove(self, enemy):
+        if enemy not in self._tier: return
+        self.agents.remove(enemy)
+        del self._last_tick[enemy]
+        del self._next_tick[enemy]
+        del self._tier[enemy]
+        del self._phase[enemy]
+
+    def clear(self):
+        self.clock = 0.0
+        self.agents.clear()
+        self._last_tick.clear()
+        self._next_tick.clear()
+        self._tier.clear()
+        self._phase.clear()
+        self._added = 0
+
+    def _phased(self, enemy, interval):
+        """clock 之后、落在该敌人相位网格 (k + phase) * interval 上的第一个时刻"""
+        phase = self._phase[enemy]
+        t = (math.floor(self.clock / interval - phase) + 1 + phase) * interval
+        # 浮点误差可能让 t 几乎等于 clock，这时顺延一格
+        return t if t > self.clock + 1e-9 else t + interval
+
+    def classify(self, enemy):
+        """返回 (LOD 等级, 思考间隔)：近处或在视野内的敌人每帧思考"""
+        ox, oz = enemy.x - self.player.x, enemy.z - self.player.z
+        dist_sq = ox ** 2 + oz ** 2
+        if dist_sq < Config.AI_NEAR_DIST ** 2:
+            return TIER_NEAR, 0.0
+
+        # 视野判断只看水平方向，用点积代替角度计算
+        forward = self.view_forward() if self.view_forward else None
+        if forward:
+            fx, fz = forward
+            dot = ox * fx + oz * fz
+            if dot > 0 and dot * dot > dist_sq * (fx ** 2 + fz ** 2) * Config.AI_VIEW_COS ** 2:
+                return TIER_NEAR, 0.0
+
+        if dist_sq < Config.AI_MID_DIST ** 2:
+            return TIER_MID, Config.AI_MID_INTERVAL
+        return TIER_FAR, Config.AI_FAR_INTERVAL
+
+    def update(self, dt):
+        self.clock += dt
+        due = [e for e in self.agents if self._next_tick[e] <= self.clock]
+
+        start = _time.perf_counter()
+        for e in due:
+            self.think(e, self.clock - self._last_tick[e])
+            tier, interval = self.classify(e)
+            self._tier[e] = tier
+            self._last_tick[e] = self.clock
+            self._next_tick[e] = self.clock if interval == 0 else self._phased(e, interval)
+
+        self.ticks_last_frame = len(due)
+        self.cost_ms_last_frame = (_time.perf_counter() - start) * 1000
\ No newline at end of file
@@ -0,0 +1,32 @@
+# core/arena.py
+# 关卡布局：边界墙 + 随机墙体 + 血包位置。只生成数据，渲染端（main.py）和无窗口模拟共用同一份布局
+from core.collision import WallBox
+import random
+import math
+
+GRAY = (0.5, 0.5, 0.5, 1)    # 与 ursina color.gray 一致
+WHITE = (1, 1, 1, 1)
+
+def generate_arena(rng=random, wall_count=15, pickup_count=5):
+    """返回 (墙体 WallBox 列表, 血包位置列表)；rng 传入带种子的 random.Random 可复现同一张地图"""
+    walls = []
+    borders = [(50, 0, 1, 100), (-50, 0, 1, 100), (0, 50, 100, 1), (0, -50, 100, 1)]
+    for b in borders:
+        walls.append(WallBox(position=(b[0], 5, b[1]), scale=(b[2], 10, b[3]),
+                             color=GRAY, texture_scale=(b[2] / 2, 5)))
+
+    for i in range(wall_count):
+        rx = rng.randint(-40, 40)
+        rz = rng.randint(-40, 40)
+        # 出生点附近留空
+        if math.sqrt(rx**2 + rz**2) < 10:
+            if rx > 0: rx += 15
+            else: rx -= 15
+        scale = (rng.randint(4, 8), rng.randint(3, 6), rng.randint(4, 8))
+        walls.append(WallBox(position=(rx, 1.5, rz), scale=scale, rotation_y=rng.randint(0, 90), color=WHITE))
+
+    return walls, random_pickup_spots(rng, pickup_count)
+
+def random_pickup_spots(rng=random, count=5):
+    """血包位置；重开一局时只重新摆放血包，墙体不变"""
+    return [(rng.randint(-40, 40), 1, rng.randint(-40, 40)) for i in range(count)]
\ No newline at end of file
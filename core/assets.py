@@ -0,0 +1,137 @@
+# core/assets.py
+# 资源预热：主菜单显示期间，后台线程查找并解码贴图、音效；必须在主线程做的收尾（创建 Texture、上传显存、
+# 烘焙模型）由 poll() 在每帧的时间预算内完成。之后 safe_load_texture / safe_load_audio 直接拿到缓存
+from ursina import application, load_model
+from ursina.texture import Texture
+from ursina import texture_importer
+from panda3d.core import Filename, TexturePool
+from core.config import Config
+from core.audio import audio
+from collections import deque
+from importlib import import_module
+import threading
+import queue
+import time as _time
+
+TEXTURES = ('assets/floor.png', 'assets/wall.png', 'grass', 'brick', 'sky_default', 'circle', 'white_cube')
+SOUNDS = ('assets/shot.wav', 'assets/hit.wav', 'assets/reload.wav')
+MODELS = ('cube', 'quad', 'sphere', 'plane', 'sky_dome')   # Ursina 内置模型，第一次 load_model 时才读盘
+MODULES = ('ursina.shaders',)    # 第一次导入时逐个创建着色器（Sky 会导入），耗时数百毫秒
+
+def find_texture(name):
+    """与 ursina.load_texture 相同的查找顺序"""
+    for folder in texture_importer.folders:
+        pattern = '**/' + name if '.' in name else '**/' + name + '.*'
+        for f in folder.glob(pattern):
+            if '.' in name or f.suffix in texture_importer.file_types:
+                return f.resolve()
+    return None
+
+
+class AssetRegistry:
+    def __init__(self):
+        self.textures = {}       # 名称 -> 预热好的 Texture
+        self.total = 0
+        self.done = 0
+        self.current = ''        # 最近完成的一项，菜单上显示
+        self._ready = queue.SimpleQueue()   # 后台线程完成的 (名称, 主线程收尾函数或 None)
+        self._main_jobs = deque()           # 只能在主线程做的 (名称, 函数)
+        self._thread = None
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    @property
+    def finished(self):
+        return self.started and self.done >= self.total
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def start(self, textures=TEXTURES, sounds=SOUNDS, models=MODELS, warmups=()):
+        """开始预热；warmups 为 (名称, 无参函数) 序列，如烘焙敌人网格、填充对象池，在主线程执行"""
+        if self.started: return
+        jobs = [(name, lambda n=name: self._load_texture(n)) for name in textures]
+        jobs += [(name, lambda n=name: self._load_sound(n)) for name in sounds]
+        self._main_jobs.extend((name, lambda n=name: import_module(n)) for name in MODULES)
+        self._main_jobs.extend((name, lambda n=name: self._load_model(n)) for name in models)
+        self._main_jobs.extend(warmups)
+        self.total = len(jobs) + len(self._main_jobs)
+        self._thread = threading.Thread(target=self._worker, args=(jobs,), name='asset-preloader', daemon=True)
+        self._thread.start()
+
+    def _worker(self, jobs):
+        for name, load in jobs:
+            try:
+                finish = load()
+            except Exception as e:
+                print(f'预加载失败: {name} ({e})')
+                finish = None
+            self._ready.put((name, finish))
+
+    def _load_texture(self, name):
+        path = find_texture(name)
+        if path is None:
+            # 记下缺失的贴图，load_texture 不再重复搜索（safe_load_texture 随后使用后备贴图）
+            return lambda: texture_importer.imported_textures.setdefault(name, None)
+        # 读盘 + 解码，结果进入 Panda3D 的纹理池；主线程用同一路径创建 Texture 时直接命中
+        TexturePool.loadTexture(Filename.fromOsSpecific(str(path)))
+
+        def finish():
+            t = Texture(path)
+            self.textures[name] = t
+            texture_importer.imported_textures[name] = t
+            # 提前上传显存，避免第一次绘制时卡顿
+            win = application.base.win
+            if win and win.getGsg():
+                t._texture.prepare(win.getGsg().getPreparedObjects())
+        return finish
+
+    def _load_model(self, name):
+        # 与 Entity.model 的查找顺序一致，找到后 Ursina 会缓存到 imported_meshes
+        return load_model(name, application.asset_folder) or load_model(name, application.internal_models_compressed_folder)
+
+    def _load_sound(self, name):
+        audio.load(name)
+        return None
+
+    def poll(self, budget_ms=Config.PRELOAD_BUDGET_MS):
+        """主线程每帧调用：在预算内完成已就绪的收尾工作。返回是否全部完成"""
+        start = _time.perf_counter()
+        while not self.finished and (_time.perf_counter() - start) * 1000 < budget_ms:
+            if not self._run_one(block=False):
+                break
+        return self.finished
+
+    def finish(self):
+        """阻塞直到全部完成（预热没结束就点了 PLAY）"""
+        if not self.started: return
+        while not self.finished:
+            self._run_one(block=True)
+
+    def _run_one(self, block):
+        try:
+            name, finish = self._ready.get_nowait()
+        except queue.Empty:
+            if self._main_jobs:
+                name, finish = self._main_jobs.popleft()
+            elif block:
+                name, finish = self._ready.get()
+            else:
+                return False
+        if finish:
+            try:
+                finish()
+            except Exception as e:
+                print(f'预加载失败: {name} ({e})')
+        self.done += 1
+        self.current = name
+        return True
+
+    def texture(self, name):
+        return self.textures.get(name)
+
+
+assets = AssetRegistry()
\ No newline at end of file
@@ -0,0 +1,142 @@
+# core/audio.py
+# 音频管理：每个音效文件只查找、解码一次（Clip），播放时从固定数量的声部（voice）里分配。
+# 声部用满时按优先级抢占；离玩家太远的声音直接不播，近处按距离衰减音量
+from ursina import application, camera, Audio
+from panda3d.core import Filename, AudioSound
+from core.config import Config
+import time as _time
+
+PRIORITY_LOW = 0      # 敌人枪声等大量重复的声音
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2     # 玩家自己的武器、受伤
+
+class Clip:
+    """一个已解码的音效；同一音效同时发声时复用最多 AUDIO_VOICES_PER_CLIP 个声音实例"""
+    def __init__(self, manager, name, path):
+        self.manager = manager
+        self.name = name
+        self.path = path
+        self.sounds = [manager.load_sound(path)]
+
+    @property
+    def length(self):
+        return self.sounds[0].length()
+
+    def play(self, pitch=1.0, volume=1.0, priority=PRIORITY_NORMAL, position=None):
+        return self.manager.play(self, pitch, volume, priority, position)
+
+
+class Voice:
+    __slots__ = ('clip', 'sound', 'priority', 'started')
+
+    def __init__(self, clip, sound, priority, started):
+        self.clip = clip
+        self.sound = sound
+        self.priority = priority
+        self.started = started
+
+    @property
+    def playing(self):
+        return self.sound.status() == AudioSound.PLAYING
+
+
+class AudioManager:
+    def __init__(self, voices=Config.AUDIO_VOICES, voices_per_clip=Config.AUDIO_VOICES_PER_CLIP):
+        self.max_voices = voices
+        self.voices_per_clip = voices_per_clip
+        self.clips = {}      # 文件名 -> Clip（找不到的文件记为 None，不再重复查找）
+        self.voices = []     # 正在发声的 Voice
+        self.stats = {'played': 0, 'culled': 0, 'stolen': 0, 'dropped': 0}
+
+    # ---------- 加载 ----------
+
+    def load(self, name):
+        """返回缓存的 Clip；文件不存在或无法解码时返回 None"""
+        if name in self.clips:
+            return self.clips[name]
+        clip = None
+        path = self.find(name)
+        if path:
+            try:
+                clip = Clip(self, name, path)
+            except Exception as e:
+                print(f'音频加载失败: {name} ({e})')
+        self.clips[name] = clip
+        return clip
+
+    def find(self, name):
+        # 先按相对资源目录的路径直接找，找不到再像 Ursina 的 Audio 一样在资源目录下递归搜索（只发生一次）
+        folder = application.asset_folder
+        path = folder / name
+        if path.is_file():
+            return path
+        for f in folder.glob(f'**/{name}'):
+            return f
+        return None
+
+    def load_sound(self, path):
+        # 没有音频设备时 Panda3D 返回 NullAudioSound，照常使用（播放无声、长度为 0）
+        return loader.loadSfx(Filename.fromOsSpecific(str(path.resolve())))  # type: ignore
+
+    # ---------- 播放 ----------
+
+    def play(self, clip, pitch=1.0, volume=1.0, priority=PRIORITY_NORMAL, position=None):
+        """播放 clip；position 为世界坐标时按与相机的距离衰减，超出 AUDIO_MAX_DISTANCE 不播。返回 Voice 或 None"""
+        if position is not None:
+            dist = (camera.world_position - position).length()
+            if dist > Config.AUDIO_MAX_DISTANCE:
+                self.stats['culled'] += 1
+                return None
+            if dist > Config.AUDIO_REF_DISTANCE:
+                volume *= 1 - (dist - Config.AUDIO_REF_DISTANCE) / (Config.AUDIO_MAX_DISTANCE - Config.AUDIO_REF_DISTANCE)
+
+        self.voices = [v for v in self.voices if v.playing]
+        sound = self._free_sound(clip)
+        if sound is None:
+            # 同一音效的实例都在发声：抢占其中最早开始的一个
+            same = [v for v in self.voices if v.clip is clip]
+            victim = min(same, key=lambda v: (v.priority, v.started))
+            if victim.priority > priority:
+                self.stats['dropped'] += 1
+                return None
+            self._steal(victim)
+            sound = victim.sound
+        elif len(self.voices) >= self.max_voices:
+            # 全局声部用满：抢占优先级最低、最早开始的声部
+            victim = min(self.voices, key=lambda v: (v.priority, v.started))
+            if victim.priority > priority:
+                self.stats['dropped'] += 1
+                return None
+            self._steal(victim)
+
+        sound.setPlayRate(pitch)
+        sound.setVolume(volume * Audio.volume_multiplier)
+        sound.play()
+        voice = Voice(clip, sound, priority, _time.perf_counter())
+        self.voices.append(voice)
+        self.stats['played'] += 1
+        return voice
+
+    def _free_sound(self, clip):
+        busy = [v.sound for v in self.voices if v.clip is clip]
+        for sound in clip.sounds:
+            if sound not in busy:
+                return sound
+        if len(clip.sounds) < self.voices_per_clip:
+            sound = self.load_sound(clip.path)   # 同一文件的数据已在音频后端缓存，只多一个播放实例
+            clip.sounds.append(sound)
+            return sound
+        return None
+
+    def _steal(self, voice):
+        voice.sound.stop()
+        self.voices.remove(voice)
+        self.stats['stolen'] += 1
+
+    def stop_all(self):
+        for v in self.voices:
+            v.sound.stop()
+        self.voices.clear()
+
+
+audio = AudioManager()
\ No newline at end of file
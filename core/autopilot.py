@@ -0,0 +1,65 @@
+# core/autopilot.py
+# 无窗口对局中代替玩家的脚本：转向最近的敌人连射，打空弹匣后换弹，血量低时去捡最近的血包
+from core.config import Config
+import random
+import math
+
+EYE_HEIGHT = 2.0   # 与 FirstPersonController 的相机高度一致
+
+class AutoPilot:
+    RELOAD_TIME = 2.0
+
+    def __init__(self, rng=None, spread=0.02):
+        self.rng = rng or random.Random(0)
+        self.spread = spread
+        self.ammo = Config.AMMO_CAPACITY
+        self.cooldown = 0.0
+        self.reload_left = 0.0
+
+    def __call__(self, sim):
+        p = sim.player
+        dt = sim.dt
+        if not p.alive: return
+
+        x, z = p.x, p.z
+        pickup = None
+        if p.hp < p.max_hp * 0.5:
+            pickups = [k for k in sim.pickups if not k.taken]
+            if pickups:
+                pickup = min(pickups, key=lambda k: (k.x - x) ** 2 + (k.z - z) ** 2)
+        if pickup:
+            # 直线走向血包，被墙挡住就原地不动
+            dx, dz = pickup.x - x, pickup.z - z
+            length = math.hypot(dx, dz)
+            if length > 1e-6:
+                step = min(length, Config.PLAYER_SPEED * dt)
+                nx, nz = x + dx / length * step, z + dz / length * step
+                if sim.nav_grid.is_free(nx, nz):
+                    x, z = nx, nz
+
+        target = sim.nearest_enemy(x, z)
+        yaw = p.yaw
+        if target:
+            yaw = math.degrees(math.atan2(target.x - x, target.z - z))
+        sim.set_player(x, p.y, z, yaw)
+
+        if self.reload_left > 0:
+            self.reload_left -= dt
+            if self.reload_left <= 0:
+                self.ammo = Config.AMMO_CAPACITY
+            return
+        self.cooldown -= dt
+        if not target or self.cooldown > 0: return
+
+        eye = (x, p.y + EYE_HEIGHT, z)
+        d = [target.x - eye[0], target.y + 1.2 - eye[1], target.z - eye[2]]
+        length = math.sqrt(sum(v * v for v in d))
+        d = [v / length + self.rng.uniform(-self.spread, self.spread) for v in d]
+        length = math.sqrt(sum(v * v for v in d))
+        d = [v / length for v in d]
+        sim.fire((eye[0] + d[0] * 1.5, eye[1] + d[1] * 1.5, eye[2] + d[2] * 1.5), d)
+
+        self.ammo -= 1
+        self.cooldown = Config.FIRE_RATE
+        if self.ammo <= 0:
+            self.reload_left = self.RELOAD_TIME
\ No newline at end of file
@@ -0,0 +1,36 @@
+# core/clock.py
+# 固定步长时钟：把可变的帧间隔累积起来，换算成整数个固定步长，剩余的时间作为渲染插值系数 alpha。
+# 帧间隔出现尖峰时每帧最多补跑 max_steps 步，剩下的积压留到后面几帧追上；积压超过 max_backlog 的部分丢弃，
+# 避免卡顿后越追越慢。跑多少步只取决于累计时间，与帧率无关
+from core.config import Config
+
+class FixedStepClock:
+    def __init__(self, dt=Config.SIM_DT, max_steps=Config.SIM_MAX_STEPS_PER_FRAME, max_backlog=Config.SIM_MAX_BACKLOG):
+        self.dt = dt
+        self.max_steps = max_steps
+        self.max_backlog = max_backlog
+        self.stats = {'steps': 0, 'capped_frames': 0, 'dropped': 0.0}
+        self.reset()
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        """累积 frame_dt，返回本帧要执行的固定步数"""
+        self.accumulator += frame_dt
+        if self.accumulator > self.max_backlog:
+            self.stats['dropped'] += self.accumulator - self.max_backlog
+            self.accumulator = self.max_backlog
+        # 加一个很小的余量：1/60 之类的步长累加后的舍入误差不应让一步推迟到下一帧
+        steps = int((self.accumulator + 1e-9) / self.dt)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.stats['capped_frames'] += 1
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        self.stats['steps'] += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """上一步到下一步之间的插值系数（有积压时为 1）"""
+        return min(self.accumulator / self.dt, 1.0)
\ No newline at end of file
@@ -0,0 +1,359 @@
+# core/collision.py
+# 连续碰撞检测：线段 vs 有向包围盒 (OBB)，使用 NumPy 对所有盒子一次性计算。
+# 本模块不依赖 Ursina，无窗口的模拟核心也直接使用。
+import numpy as np
+import itertools
+import math
+
+# 单位立方体的 8 个角（齐次坐标），用于求 OBB 的世界 AABB
+_CORNERS = np.array([c + (1.0,) for c in itertools.product((-0.5, 0.5), repeat=3)])
+
+# 敌人命中盒：(相对脚底的中心, 尺寸, 是否头部)，与 Enemy 外观中的身体 / 头部一致
+ENEMY_HITBOX_PARTS = (
+    ((0, 1.2, 0), (0.8, 1.2, 0.5), False),
+    ((0, 2.2, 0), (0.5, 0.5, 0.5), True),
+)
+
+def box_matrix(position, scale, rotation_y=0):
+    """单位立方体 -> 世界 的 4x4 矩阵（Panda 行向量约定），只绕 y 轴旋转（与 Ursina 的 rotation_y 一致）"""
+    r = math.radians(rotation_y)
+    c, s = math.cos(r), math.sin(r)
+    sx, sy, sz = scale
+    m = np.zeros((4, 4))
+    m[0, :3] = sx * c, 0, -sx * s
+    m[1, 1] = sy
+    m[2, :3] = sz * s, 0, sz * c
+    m[3, :3] = position
+    m[3, 3] = 1
+    return m
+
+def world_to_local_matrices(positions, scales, rotation_y):
+    """box_matrix 的向量化逆矩阵：(n,3) 位置、(n,3) 尺寸、(n,) 角度 -> (n,4,4) 世界 -> 局部矩阵"""
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    scales = np.asarray(scales, dtype=np.float64).reshape(-1, 3)
+    r = np.radians(np.asarray(rotation_y, dtype=np.float64))
+    c, s = np.cos(r), np.sin(r)
+    # 旋转矩阵正交，逆矩阵 = 转置后按尺寸缩放，再加上反向平移
+    m = np.zeros((len(positions), 4, 4))
+    m[:, 0, 0], m[:, 0, 2] = c / scales[:, 0], s / scales[:, 2]
+    m[:, 1, 1] = 1 / scales[:, 1]
+    m[:, 2, 0], m[:, 2, 2] = -s / scales[:, 0], c / scales[:, 2]
+    m[:, 3, 3] = 1
+    m[:, 3, :3] = -np.einsum('nj,nji->ni', positions, m[:, :3, :3])
+    return m
+
+def segment_vs_unit_boxes(p0, p1, world_to_local):
+    """
+    线段 p0->p1 与一组 OBB 求交（slab 算法）。
+    每个 OBB 以 4x4 世界->局部矩阵表示（Panda 行向量约定），局部空间中是 [-0.5, 0.5]^3 的单位立方体，
+    正好对应 Ursina 的 'cube' 模型。
+    返回 (N,) 的进入参数 t ∈ [0, 1]，未命中为 inf。仿射变换保持线段参数不变，所以 t 可以直接用于世界坐标。
+    """
+    if len(world_to_local) == 0:
+        return np.empty(0)
+
+    o = (np.append(np.asarray(p0, dtype=np.float64), 1.0) @ world_to_local)[:, :3]
+    d = (np.append(np.asarray(p1, dtype=np.float64) - p0, 0.0) @ world_to_local)[:, :3]
+
+    parallel = np.abs(d) < 1e-12
+    inv_d = np.divide(1.0, d, out=np.zeros_like(d), where=~parallel)
+    t1 = (-0.5 - o) * inv_d
+    t2 = (0.5 - o) * inv_d
+    t_near = np.minimum(t1, t2)
+    t_far = np.maximum(t1, t2)
+
+    # 与某个轴平行时：起点在该 slab 内则不限制，否则必然不相交
+    inside = np.abs(o) <= 0.5
+    t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), t_near)
+    t_far = np.where(parallel, np.where(inside, np.inf, -np.inf), t_far)
+
+    enter = t_near.max(axis=1)
+    leave = t_far.min(axis=1)
+    hit = (enter <= leave) & (leave >= 0) & (enter <= 1)
+    return np.where(hit, np.maximum(enter, 0.0), np.inf)
+
+
+def segments_blocked(p0, p1, world_to_local):
+    """
+    批量版本：m 条线段 (m,3)->(m,3) 与同一组 OBB 一次性求交，返回 (m,) bool，线段是否被任意一个盒子挡住。
+    用于一次算出所有敌人到玩家的视线，比逐条调用 segment_vs_unit_boxes 少 m-1 次 NumPy 往返。
+    """
+    p0 = np.asarray(p0, dtype=np.float64).reshape(-1, 3)
+    p1 = np.asarray(p1, dtype=np.float64).reshape(-1, 3)
+    if len(world_to_local) == 0 or len(p0) == 0:
+        return np.zeros(len(p0), dtype=bool)
+
+    rot = world_to_local[:, :3, :3]                                          # (n,3,3)
+    o = np.einsum('mj,nji->mni', p0, rot) + world_to_local[:, 3, :3]        # (m,n,3)
+    d = np.einsum('mj,nji->mni', p1 - p0, rot)
+
+    parallel = np.abs(d) < 1e-12
+    inv_d = np.divide(1.0, d, out=np.zeros_like(d), where=~parallel)
+    t1 = (-0.5 - o) * inv_d
+    t2 = (0.5 - o) * inv_d
+    inside = np.abs(o) <= 0.5
+    t_near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    t_far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+
+    enter = t_near.max(axis=2)
+    leave = t_far.min(axis=2)
+    return ((enter <= leave) & (leave >= 0) & (enter <= 1)).any(axis=1)
+
+
+class HitboxSet:
+    """
+    敌人命中盒集合：每个敌人的 body / head 各一个 OBB。
+    敌人只需提供 x, y, z, yaw（度）；移动后调用 refresh() 重建矩阵，每个模拟步最多一次。
+    """
+
+    def __init__(self):
+        self.owners = []      # 每个盒子所属的敌人
+        self.is_head = np.zeros(0, dtype=bool)
+        self._owner_slots = {}   # 敌人 -> 盒子下标列表
+        self._mats = np.zeros((0, 4, 4))
+        self._dirty = True
+
+    def add(self, enemy):
+        if enemy in self._owner_slots: return
+        slots = []
+        for offset, size, head in ENEMY_HITBOX_PARTS:
+            slots.append(len(self.owners))
+            self.owners.append(enemy)
+            self.is_head = np.append(self.is_head, head)
+        self._owner_slots[enemy] = slots
+        self._dirty = True
+
+    def remove(self, enemy):
+        if enemy not in self._owner_slots: return
+        keep = [i for i, o in enumerate(self.owners) if o is not enemy]
+        self.owners = [self.owners[i] for i in keep]
+        self.is_head = self.is_head[keep]
+        self._owner_slots = {}
+        for i, o in enumerate(self.owners):
+            self._owner_slots.setdefault(o, []).append(i)
+        self._dirty = True
+
+    def clear(self):
+        self.owners.clear()
+        self.is_head = np.zeros(0, dtype=bool)
+        self._owner_slots.clear()
+        self._mats = np.zeros((0, 4, 4))
+        self._dirty = True
+
+    def __contains__(self, enemy):
+        return enemy in self._owner_slots
+
+    def mark_moved(self):
+        self._dirty = True
+
+    def refresh(self):
+        if not self._dirty: return
+        if self.owners:
+            # 命中盒中心只在 y 方向偏移，绕 y 轴旋转不改变中心位置
+            parts = len(ENEMY_HITBOX_PARTS)
+            n = len(self.owners) // parts
+            feet = np.array([(o.x, o.y, o.z) for o in self.owners[::parts]], dtype=np.float64)
+            yaw = np.array([o.yaw for o in self.owners[::parts]], dtype=np.float64)
+            offsets = np.array([p[0] for p in ENEMY_HITBOX_PARTS], dtype=np.float64)
+            sizes = np.array([p[1] for p in ENEMY_HITBOX_PARTS], dtype=np.float64)
+            self._mats = world_to_local_matrices((feet[:, None, :] + offsets).reshape(-1, 3),
+                                                 np.tile(sizes, (n, 1)), np.repeat(yaw, parts))
+        else:
+            self._mats = np.zeros((0, 4, 4))
+        self._dirty = False
+
+    def intersect_segment(self, p0, p1, candidates=None):
+        """
+        返回线段最先命中的 (enemy, is_headshot, t)；未命中返回 (None, False, inf)。
+        candidates 为宽相位筛出的敌人集合，为 None 时检测全部。
+        """
+        if not self.owners:
+            return None, False, np.inf
+        self.refresh()
+
+        if candidates is None:
+            idx = np.arange(len(self.owners))
+        else:
+            idx = [i for e in candidates for i in self._owner_slots.get(e, ())]
+            if not idx:
+                return None, False, np.inf
+            # candidates 是集合，遍历顺序取决于对象地址；按槽位排序，命中参数相同时结果才可复现
+            idx = np.sort(np.array(idx))
+
+        t = segment_vs_unit_boxes(p0, p1, self._mats[idx])
+        best = int(np.argmin(t))
+        if not np.isfinite(t[best]):
+            return None, False, np.inf
+        slot = idx[best]
+        return self.owners[slot], bool(self.is_head[slot]), float(t[best])
+
+
+class WallBox:
+    """一块静态墙体的描述，只保存数据，不创建实体。material / color / texture_scale 只供渲染使用"""
+
+    def __init__(self, position, scale, rotation_y=0, material='wall', color=(1, 1, 1, 1), texture_scale=(1, 1)):
+        self.position = tuple(position)
+        self.scale = tuple(scale)
+        self.rotation_y = rotation_y
+        self.material = material
+        self.color = tuple(color)
+        self.texture_scale = tuple(texture_scale)
+
+    @property
+    def matrix(self):
+        return box_matrix(self.position, self.scale, self.rotation_y)
+
+    def nav_box(self):
+        """XZ 平面上的有向矩形 (cx, cz, ux, uz, half_w, half_d)，(ux, uz) 为局部 x 轴方向"""
+        r = math.radians(self.rotation_y)
+        return (self.position[0], self.position[2], math.cos(r), -math.sin(r),
+                self.scale[0] / 2, self.scale[2] / 2)
+
+
+class BoxBVH:
+    """
+    OBB 集合上的包围体层次树：节点为世界 AABB，按最长轴的中位数二分，叶子里的 OBB 用 slab 算法精确检测。
+    节点以平铺列表保存，遍历用显式栈。
+    """
+    LEAF_SIZE = 4
+
+    def __init__(self, matrices):
+        matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+        self.order = np.arange(len(matrices))
+        self.nodes = []   # (lo, hi, left, right, start, end)；left < 0 表示叶子，叶子引用 order[start:end]
+        if not len(matrices):
+            self.world_to_local = matrices
+            self.lo = self.hi = np.zeros((0, 3))
+            return
+
+        self.world_to_local = np.linalg.inv(matrices)
+        corners = (_CORNERS @ matrices)[:, :, :3]
+        self.lo = corners.min(axis=1)
+        self.hi = corners.max(axis=1)
+        self._build(0, len(matrices))
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, start, end):
+        idx = self.order[start:end]
+        lo = tuple(self.lo[idx].min(axis=0))
+        hi = tuple(self.hi[idx].max(axis=0))
+        node = len(self.nodes)
+        self.nodes.append(None)
+        if end - start <= self.LEAF_SIZE:
+            self.nodes[node] = (lo, hi, -1, -1, start, end)
+            return node
+
+        centers = (self.lo[idx] + self.hi[idx]) / 2
+        axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+        self.order[start:end] = idx[np.argsort(centers[:, axis], kind='stable')]
+        mid = (start + end) // 2
+        left = self._build(start, mid)
+        right = self._build(mid, end)
+        self.nodes[node] = (lo, hi, left, right, start, end)
+        return node
+
+    def intersect_segment(self, p0, p1):
+        """线段 p0->p1 最先命中的 (t, 盒子下标)，t ∈ [0, 1]；未命中返回 (inf, -1)"""
+        best_t, best = math.inf, -1
+        if not self.nodes:
+            return best_t, best
+
+        origin = tuple(float(v) for v in p0)
+        delta = tuple(float(b) - a for a, b in zip(origin, p1))
+        stack = [0]
+        while stack:
+            lo, hi, left, right, start, end = self.nodes[stack.pop()]
+            if not _segment_hits_aabb(origin, delta, lo, hi, best_t):
+                continue
+            if left >= 0:
+                stack.append(left)
+                stack.append(right)
+                continue
+            idx = self.order[start:end]
+            t = segment_vs_unit_boxes(origin, p1, self.world_to_local[idx])
+            k = int(np.argmin(t))
+            if t[k] < best_t:
+                best_t, best = float(t[k]), int(idx[k])
+        return best_t, best
+
+    def points_inside(self, points):
+        """(m,3) 个点 -> (m,) bool，点是否位于任意一个 OBB 内。先用 AABB 筛选，只对候选对做精确检测"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        inside = np.zeros(len(points), dtype=bool)
+        if not len(points) or not len(self.order):
+            return inside
+
+        in_aabb = np.all((points[:, None, :] >= self.lo) & (points[:, None, :] <= self.hi), axis=2)   # (m,n)
+        pi, bi = np.nonzero(in_aabb)
+        if not len(pi):
+            return inside
+        local = np.einsum('kj,kji->ki', np.concatenate((points[pi], np.ones((len(pi), 1))), axis=1),
+                          self.world_to_local[bi])
+        hit = np.all(np.abs(local[:, :3]) <= 0.5, axis=1)
+        inside[pi[hit]] = True
+        return inside
+
+
+def _segment_hits_aabb(origin, delta, lo, hi, max_t):
+    # 标量 slab 检测，节点很少时比 NumPy 调用开销小
+    t0, t1 = 0.0, max_t if max_t < 1.0 else 1.0
+    for a in range(3):
+        o, d = origin[a], delta[a]
+        if abs(d) < 1e-12:
+            if o < lo[a] or o > hi[a]:
+                return False
+            continue
+        inv = 1.0 / d
+        near, far = (lo[a] - o) * inv, (hi[a] - o) * inv
+        if near > far:
+            near, far = far, near
+        if near > t0: t0 = near
+        if far < t1: t1 = far
+        if t0 > t1:
+            return False
+    return True
+
+
+class WallSet:
+    """关卡中所有不会移动的墙体：BVH 射线 / 线段检测、点是否在墙内、导航用的 XZ 矩形"""
+
+    def __init__(self, boxes=()):
+        self.boxes = list(boxes)
+        self._bvh = None
+
+    def add_box(self, *args, **kwargs):
+        self.boxes.append(WallBox(*args, **kwargs))
+        self._bvh = None
+
+    @property
+    def bvh(self):
+        # 墙体全部加入后第一次查询时才构建
+        if self._bvh is None:
+            self._bvh = BoxBVH([b.matrix for b in self.boxes])
+        return self._bvh
+
+    def nav_boxes(self):
+        return [b.nav_box() for b in self.boxes]
+
+    def raycast(self, origin, direction, distance):
+        """返回 (命中距离, 墙体)；未命中返回 (None, None)。direction 需为单位向量"""
+        origin = np.asarray(tuple(origin), dtype=np.float64)
+        end = origin + np.asarray(tuple(direction), dtype=np.float64) * distance
+        t, i = self.bvh.intersect_segment(origin, end)
+        if i < 0:
+            return None, None
+        return t * distance, self.boxes[i]
+
+    def segment_blocked(self, p0, p1):
+        """线段 p0->p1 是否被墙挡住；返回命中参数 t ∈ [0, 1]，未命中为 None"""
+        t, i = self.bvh.intersect_segment(p0, p1)
+        return None if i < 0 else t
+
+    def segments_blocked(self, p0, p1):
+        """m 条线段是否被墙挡住，(m,) bool；视线检测用，不需要命中位置"""
+        return segments_blocked(p0, p1, self.bvh.world_to_local)
+
+    def points_inside(self, points):
+        return self.bvh.points_inside(points)
\ No newline at end of file
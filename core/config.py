@@ -21,6 +21,10 @@ class Config:
     
     FIRE_RATE = 0.1
     RECOIL = 1.5
+
+    # --- 武器定义（数据文件，见 core/weapon_data.py） ---
+    WEAPON_DIR = 'assets/weapons'   # 每把武器一个 JSON：属性、散布、后坐力图案、音效、枪模
+    DEFAULT_WEAPON = 'ak47'
     
     # --- 敌人参数 (兼容新旧写法) ---
     ENEMY_HP = 100
@@ -40,4 +44,125 @@ class Config:
     WAVE_DIFFICULTY_MULTIPLIER = 1.1
 
     # --- 新增：最大波次 (打完第5波通关) ---
-    MAX_WAVES = 5
\ No newline at end of file
+    MAX_WAVES = 5
+
+    # --- 模拟核心（core/simulation.py，固定步长） ---
+    SIM_DT = 1 / 60                 # 每步的模拟时间（秒）
+    SIM_MAX_STEPS_PER_FRAME = 8     # 每帧最多补跑的步数，剩余的积压留到后面几帧追上
+    SIM_MAX_BACKLOG = 0.25          # 积压超过该时长（秒）的部分丢弃
+    SIM_MAX_MATCH_TIME = 900        # 无窗口对局的最长模拟时间（秒）
+    KILL_Y = -10                    # 玩家掉出地图的高度
+    PLAYER_BULLET_SPEED = 80
+    PLAYER_BULLET_LIFETIME = 2.0
+    PLAYER_BULLET_CAPACITY = 64
+    HEALTH_PACK_HEAL = 30
+    PICKUP_RADIUS = 1.5
+    WAVE_HEAL = 30                  # 波次间回血
+
+    # --- 敌人 AI 调度（LOD + 时间片） ---
+    AI_NEAR_DIST = 20           # 该距离内每帧思考
+    AI_MID_DIST = 40            # 该距离内按 AI_MID_INTERVAL 思考，更远按 AI_FAR_INTERVAL
+    AI_MID_INTERVAL = 0.1
+    AI_FAR_INTERVAL = 0.25
+    AI_VIEW_COS = 0.5           # 玩家视野半角的余弦（视野内的敌人也每帧思考）
+
+    # --- 导航网格 / 流场 ---
+    NAV_HALF_EXTENT = 50        # 场地半边长（边界墙位于 ±50）
+    NAV_CELL_SIZE = 1.0
+    NAV_AGENT_RADIUS = 0.6      # 墙体按敌人半径膨胀后再栅格化
+    NAV_BUDGET_MS = 2.0         # 流场重算每帧最多占用的时间（毫秒）
+    NAV_SLICES_PER_TICK = 8     # 模拟核心中流场重算每步推进的批数（每批 256 格），与机器快慢无关
+
+    # --- 敌人视线（core/visibility.py） ---
+    LOS_MAX_RANGE = 20          # 只检测该距离内的敌人（与攻击距离一致）
+    LOS_EYE_HEIGHT = 1.5        # 视线起点：敌人脚底以上的高度
+    LOS_TARGET_HEIGHT = 1.4     # 视线终点：玩家脚底以上的高度
+
+    # --- 敌人生成（占用网格） ---
+    SPAWN_AREA_HALF = 5           # 每个生成区域（core/simulation.py 的 SPAWN_AREAS）的半边长
+    SPAWN_MIN_SEPARATION = 2.0    # 敌人之间的最小间距
+    SPAWN_PLAYER_CLEARANCE = 8    # 玩家周围不生成敌人
+    SPAWN_PICKUP_CLEARANCE = 1.5  # 道具周围不生成敌人
+
+    # --- 碰撞检测（空间哈希宽相位） ---
+    SPATIAL_CELL_SIZE = 4       # 网格边长
+    ENEMY_HIT_RADIUS = 2.0      # 敌人在网格中占据的半径（覆盖身体、头部和手臂）
+    CONTINUOUS_COLLISION = True # 子弹使用线段 vs OBB 连续检测；False 时退回旧的距离阈值检测
+
+    # --- 对象池预分配数量 ---
+    POOL_PLAYER_BULLETS = 32
+
+    # --- 敌人子弹（结构数组管理器） ---
+    ENEMY_PROJECTILE_CAPACITY = 256
+    ENEMY_BULLET_SPEED = 15
+    ENEMY_BULLET_LIFETIME = 3
+    ENEMY_BULLET_SIZE = 0.3
+    PLAYER_CAPSULE_BOTTOM = 0.3       # 玩家受击胶囊体：脚底以上的线段范围
+    PLAYER_CAPSULE_TOP = 1.8
+    PLAYER_CAPSULE_RADIUS = 1.0
+
+    # --- 敌人头顶血条（合并网格） ---
+    HEALTH_BAR_OFFSET = 2.8           # 血条中心相对敌人脚底的高度
+    HEALTH_BAR_WIDTH = 1.2
+    HEALTH_BAR_HEIGHT = 0.15
+    HEALTH_BAR_FADE_START = 25        # 超过该距离开始淡出
+    HEALTH_BAR_MAX_DISTANCE = 40      # 超过该距离不画
+
+    # --- HUD 准星（camera.ui 坐标） ---
+    CROSSHAIR_SPREAD = 0.02           # 准星按 当前散布 / 该值 缩放
+    CROSSHAIR_GAP = 0.01              # 散布为 CROSSHAIR_SPREAD 时的中心间隙
+    CROSSHAIR_SIZE = 0.015            # 每条线段的长度
+    CROSSHAIR_THICKNESS = 2           # 线宽（像素，不随缩放变化）
+    CROSSHAIR_KICK = 0.01             # 满后坐力时准星上跳的距离
+
+    # --- 对局录像（core/replay.py） ---
+    REPLAY_RECORD = False             # 游戏中每局自动录像
+    REPLAY_DIR = 'replays'
+    REPLAY_FLUSH_TICKS = 60           # 每多少步把编码好的数据交给后台线程写盘
+
+    # --- 联机（server.py，core/netcode.py） ---
+    NET_PORT = 27015
+    NET_SNAPSHOT_INTERVAL = 3         # 每多少个模拟步广播一次快照（60 / 3 = 20Hz）
+    NET_SNAPSHOT_HISTORY = 64         # 服务器 / 客户端保留的快照数，用作增量编码的基准
+    NET_INPUT_REDUNDANCY = 8          # 每个输入包重复携带最近多少条未确认的命令（抗丢包）
+    NET_MAX_COMMANDS_PER_TICK = 4     # 服务器每步最多处理一个玩家的多少条命令（多余的留到下一步）
+    NET_TIMEOUT = 5.0                 # 客户端超过该时间（秒）没有消息视为断开
+    NET_HELLO_INTERVAL = 0.5          # 客户端连接时重发 HELLO 的间隔
+    NET_RESTART_DELAY = 5.0           # 对局结束后多久开始下一局
+    NET_TICK_HISTORY = 3600           # 服务器指标保留最近多少步的耗时（p95 按这些样本计算）
+
+    # --- 尸潮模式（core/horde.py，entities/horde_renderer.py） ---
+    HORDE_CAPACITY = 1024             # 敌人数组的初始容量，不够时翻倍
+    HORDE_WAVE_BASE = 100             # 每波敌人数 = BASE + GROWTH * 波次（第 5 波 600 个）
+    HORDE_WAVE_GROWTH = 100
+    HORDE_ENEMY_HP = 20               # 尸潮敌人血量（同样随波次增加 10%）
+    HORDE_ENEMY_DMG = 1               # 每颗尸潮敌人子弹的伤害
+    HORDE_FIRE_RATE = 10.0            # 射击间隔下限，另加 0~同样时长的随机延迟
+    HORDE_SPAWN_SEPARATION = 1.0      # 生成时敌人之间的最小间距
+    HORDE_SEPARATION = 0.6            # 人群分离：密度梯度换算成速度的系数
+    HORDE_PROJECTILE_CAPACITY = 2048
+    HORDE_MAX_EFFECTS_PER_FRAME = 8   # 每帧最多播放多少个敌人开火 / 死亡特效
+
+    # --- 音频 ---
+    AUDIO_VOICES = 16             # 同时发声的声部上限，超出时按优先级抢占
+    AUDIO_VOICES_PER_CLIP = 6     # 同一音效最多同时发声的实例数
+    AUDIO_REF_DISTANCE = 10       # 该距离内全音量
+    AUDIO_MAX_DISTANCE = 60       # 超过该距离的声音不播放
+
+    # --- 定时器（时间轮） ---
+    TIMER_TICK = 0.01             # 时间轮精度（秒）
+
+    # --- 资源预热 ---
+    PRELOAD_BUDGET_MS = 4         # 主菜单期间每帧用于收尾预热（创建贴图、烘焙模型）的时间预算
+
+    # --- 性能面板 ---
+    PROFILER_HISTORY = 600            # 每个通道保留的帧数（环形缓冲）
+    PROFILER_TOGGLE_KEY = 'f3'        # 显示 / 隐藏性能面板
+    PROFILER_DUMP_KEY = 'f4'          # 把环形缓冲导出为 CSV
+    PROFILER_DUMP_DIR = 'profiles'    # 导出的 CSV 放在这个目录下
+    PROFILER_GRAPH_MS = 50            # 曲线图纵轴上限（毫秒）
+    PROFILER_TEXT_INTERVAL = 0.25     # 数字和实体统计的刷新间隔（秒）
+
+    # --- 粒子系统 ---
+    PARTICLE_CAPACITY = 4096          # 同时存在的粒子上限
+    PARTICLE_GROUND_FRICTION = 40     # 落地后的速度衰减速率
\ No newline at end of file
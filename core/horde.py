@@ -0,0 +1,274 @@
+# core/horde.py
+# 尸潮模式的模拟核心：敌人状态不再是一个个 EnemyState 对象，而是连续的 NumPy 数组（结构数组，每个敌人一个槽位）。
+# 移动、朝向、视线、冷却、开火、命中和死亡都由对整批敌人的向量化系统处理，几百个敌人一步只需要几次 NumPy 调用。
+# 波次、回血、胜负规则与 Simulation 相同，只是每波敌人数量更多（wave_size）。
+#
+# 与 Simulation 不同的事件（敌人用槽位下标表示，不是对象）：
+#   ('horde_spawned', slots)                          ('horde_shot', slots, muzzles, forwards)
+#   ('enemy_hit', slot, hit_pos, normal, is_headshot, damage)    ('enemy_killed', slot, position)
+from core.config import Config
+from core.simulation import Simulation, ProjectileSet, MUZZLE_OFFSET
+from core.collision import ENEMY_HITBOX_PARTS, world_to_local_matrices, segment_vs_unit_boxes
+from core.profiler import profiler
+import numpy as np
+
+_PART_OFFSETS = np.array([p[0] for p in ENEMY_HITBOX_PARTS], dtype=np.float64)
+_PART_SIZES = np.array([p[1] for p in ENEMY_HITBOX_PARTS], dtype=np.float64)
+_PART_IS_HEAD = np.array([p[2] for p in ENEMY_HITBOX_PARTS], dtype=bool)
+
+
+class EnemyArrays:
+    """
+    敌人的结构数组。alive 为假的槽位空闲，死亡的敌人只清掉标记，槽位留给下一次生成复用；
+    各系统每步用 indices() 取出存活槽位（按槽位顺序，结果可复现）。容量不够时整体翻倍
+    """
+    FIELDS = ('alive', 'id', 'pos', 'yaw', 'hp', 'max_hp', 'cooldown', 'los_cell', 'visible')
+
+    def __init__(self, capacity=Config.HORDE_CAPACITY):
+        self.capacity = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = {name: getattr(self, name) for name in self.FIELDS} if self.capacity else None
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.id = np.zeros(capacity, dtype=np.int64)
+        self.pos = np.zeros((capacity, 3), dtype=np.float64)
+        self.yaw = np.zeros(capacity, dtype=np.float64)        # 与 Ursina 的 rotation_y 一致：前方为 (sin, 0, cos)
+        self.hp = np.zeros(capacity, dtype=np.float64)
+        self.max_hp = np.ones(capacity, dtype=np.float64)
+        self.cooldown = np.zeros(capacity, dtype=np.float64)
+        self.los_cell = np.full(capacity, -1, dtype=np.int64)  # 视线缓存对应的敌人格子，-1 表示需要重算
+        self.visible = np.zeros(capacity, dtype=bool)
+        if old:
+            for name, values in old.items():
+                getattr(self, name)[:self.capacity] = values
+        self.capacity = capacity
+
+    @property
+    def count(self):
+        return int(np.count_nonzero(self.alive))
+
+    def indices(self):
+        return np.flatnonzero(self.alive)
+
+    def spawn(self, xs, zs, ids, hp):
+        """在空闲槽位生成一批敌人，返回使用的槽位"""
+        n = len(xs)
+        free = np.flatnonzero(~self.alive)
+        if len(free) < n:
+            self._allocate(max(self.capacity * 2, self.capacity + n - len(free)))
+            free = np.flatnonzero(~self.alive)
+        slots = free[:n]
+        self.alive[slots] = True
+        self.id[slots] = ids
+        self.pos[slots] = np.stack((xs, np.zeros(n), zs), axis=1)
+        self.yaw[slots] = 0.0
+        self.hp[slots] = self.max_hp[slots] = hp
+        self.cooldown[slots] = 2.0
+        self.los_cell[slots] = -1
+        self.visible[slots] = False
+        return slots
+
+    def clear(self):
+        self.alive[:] = False
+
+
+class HordeEnemy:
+    """nearest_enemy() 返回的只读视图，提供与 EnemyState 相同的 x, y, z"""
+    __slots__ = ('slot', 'x', 'y', 'z')
+
+    def __init__(self, slot, pos):
+        self.slot = slot
+        self.x, self.y, self.z = (float(v) for v in pos)
+
+
+class HordeSimulation(Simulation):
+    enemy_damage = Config.HORDE_ENEMY_DMG
+    enemy_objects = False   # 敌人在 EnemyArrays 里，空间网格 / 受击盒 / AI 调度 / 视线缓存都由向量化系统代替
+
+    def __init__(self, walls=(), pickups=(), seed=None, dt=Config.SIM_DT):
+        self.horde = EnemyArrays()
+        super().__init__(walls, pickups, seed, dt)
+        # 几百个敌人同时开火，敌人子弹需要更大的容量
+        self.projectiles = ProjectileSet(Config.HORDE_PROJECTILE_CAPACITY)
+
+    def reset(self, pickups=None, seed=None):
+        super().reset(pickups, seed)
+        self.horde.clear()
+        # 向量化系统一次取一批随机数，用单独的 NumPy 生成器（同样由种子决定）
+        self.np_rng = np.random.default_rng(self.rng.randrange(2**63))
+        self._los_player_key = None
+
+    # ---------- 敌人：查询 ----------
+
+    @property
+    def enemy_count(self):
+        return self.horde.count
+
+    def wave_size(self, wave):
+        return Config.HORDE_WAVE_BASE + Config.HORDE_WAVE_GROWTH * wave
+
+    def nearest_enemy(self, x, z):
+        idx = self.horde.indices()
+        if len(idx) == 0: return None
+        pos = self.horde.pos[idx]
+        slot = idx[int(np.argmin((pos[:, 0] - x) ** 2 + (pos[:, 2] - z) ** 2))]
+        return HordeEnemy(slot, self.horde.pos[slot])
+
+    def _enemy_origin(self, slot):
+        return self.horde.pos[slot]
+
+    def _enemy_xz(self):
+        pos = self.horde.pos[self.horde.indices()]
+        return zip(pos[:, 0].tolist(), pos[:, 2].tolist())
+
+    # ---------- 敌人：生成 / 伤害 ----------
+
+    def find_spawn_points(self, count, separation=Config.HORDE_SPAWN_SEPARATION):
+        return super().find_spawn_points(count, separation)
+
+    def _spawn_wave(self, points):
+        if not points: return
+        xs, zs = np.array(points, dtype=np.float64).T
+        ids = np.arange(self._next_enemy_id, self._next_enemy_id + len(points))
+        self._next_enemy_id += len(points)
+        slots = self.horde.spawn(xs, zs, ids, Config.HORDE_ENEMY_HP * (1 + self.wave * 0.1))
+        # 错开第一枪，整波敌人不会在同一步齐射
+        self.horde.cooldown[slots] += self.np_rng.uniform(0, Config.HORDE_FIRE_RATE, len(slots))
+        self.events.append(('horde_spawned', slots))
+
+    def spawn_enemy(self, x, z):
+        self._spawn_wave([(x, z)])
+
+    def damage_enemy(self, slot, amount):
+        h = self.horde
+        if not h.alive[slot]: return
+        h.hp[slot] -= amount
+        if h.hp[slot] <= 0:
+            h.alive[slot] = False
+            self.kills += 1
+            self.events.append(('enemy_killed', slot, tuple(h.pos[slot])))
+
+    # ---------- 敌人：每步的系统 ----------
+
+    def _step_enemies(self, dt):
+        h = self.horde
+        idx = h.indices()
+        p = self.player
+        if len(idx) == 0 or not p.alive: return
+
+        pos = h.pos[idx]
+        dx, dz = p.x - pos[:, 0], p.z - pos[:, 2]
+        dist = np.hypot(dx, dz)
+        h.yaw[idx] = np.degrees(np.arctan2(dx, dz))
+
+        with profiler.section('sim.los'):
+            visible = self._update_visibility(idx, pos, dist)
+        with profiler.section('sim.ai'):
+            self._move_horde(idx, pos, dx, dz, dist, visible, dt)
+            h.cooldown[idx] -= dt
+            shooters = (h.cooldown[idx] <= 0) & (dist < Config.ENEMY_ATTACK_RANGE) & visible
+            self._horde_shoot(idx[shooters])
+
+    def _update_visibility(self, idx, pos, dist):
+        """
+        与 VisibilityService 相同的规则：只检测攻击距离内的敌人，结果按 (敌人格子, 玩家格子) 缓存，
+        需要重算的敌人一次性交给墙体做批量线段检测
+        """
+        h = self.horde
+        p = self.player
+        grid = self.nav_grid
+        key = (grid.cell_index(p.x, p.z), int(p.y // grid.cell_size))
+        if key != self._los_player_key:
+            h.los_cell[:] = -1
+            self._los_player_key = key
+
+        in_range = dist < Config.LOS_MAX_RANGE
+        cells = grid.cell_indices(pos[:, 0], pos[:, 2]) * 64 + (pos[:, 1] // grid.cell_size).astype(np.int64)
+        stale = in_range & (h.los_cell[idx] != cells)
+        if stale.any():
+            p0 = pos[stale] + (0.0, Config.LOS_EYE_HEIGHT, 0.0)
+            p1 = np.broadcast_to((p.x, p.y + Config.LOS_TARGET_HEIGHT, p.z), p0.shape)
+            slots = idx[stale]
+            h.visible[slots] = ~self.walls.segments_blocked(p0, p1)
+            h.los_cell[slots] = cells[stale]
+        h.los_cell[idx[~in_range]] = -1
+        return in_range & h.visible[idx]
+
+    def _move_horde(self, idx, pos, dx, dz, dist, visible, dt):
+        """沿流场绕墙接近玩家；看得到玩家且在 8 米以内时停下射击（与 Simulation._think 相同）"""
+        directions, valid = self.flow_field.directions(pos[:, 0], pos[:, 2])
+        safe = np.maximum(dist, 1e-6)
+        toward = np.stack((dx / safe, dz / safe), axis=1)
+        velocity = np.where(valid[:, None], directions, toward) * Config.ENEMY_SPEED
+        velocity[(dist <= 8) & visible] = 0.0
+
+        # 人群分离：按每个格子的敌人数量求密度梯度，敌人顺着梯度散开，不会全部挤进流场的同一条路
+        grid = self.nav_grid
+        cells = grid.cell_indices(pos[:, 0], pos[:, 2])
+        inside = cells >= 0
+        density = np.bincount(cells[inside], minlength=grid.width * grid.height).reshape(grid.height, grid.width)
+        grad_z, grad_x = np.gradient(density.astype(np.float64))
+        push = np.zeros_like(velocity)
+        push[inside, 0] = -grad_x.ravel()[cells[inside]]
+        push[inside, 1] = -grad_z.ravel()[cells[inside]]
+        velocity += push * Config.HORDE_SEPARATION
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        velocity *= (Config.ENEMY_SPEED / np.maximum(speed, Config.ENEMY_SPEED))[:, None]
+
+        nx, nz = pos[:, 0] + velocity[:, 0] * dt, pos[:, 2] + velocity[:, 1] * dt
+        # 不能从可通行格子走进墙里（已经在墙里的敌人可以走出来）
+        ok = grid.free_mask(nx, nz) | ~grid.free_mask(pos[:, 0], pos[:, 2])
+        self.horde.pos[idx[ok], 0] = nx[ok]
+        self.horde.pos[idx[ok], 2] = nz[ok]
+
+    def _horde_shoot(self, slots):
+        k = len(slots)
+        if k == 0: return
+        h = self.horde
+        rng = self.np_rng
+        h.cooldown[slots] = Config.HORDE_FIRE_RATE + rng.uniform(0, Config.HORDE_FIRE_RATE, k)
+
+        r = np.radians(h.yaw[slots])
+        fx, fz = np.sin(r), np.cos(r)
+        pos = h.pos[slots]
+        start = np.stack((pos[:, 0] + fx * 1.5, pos[:, 1] + 1.5, pos[:, 2] + fz * 1.5), axis=1)
+        p = self.player
+        d = np.array((p.x, p.y + 1.4, p.z)) - start
+        d /= np.maximum(np.linalg.norm(d, axis=1), 1e-6)[:, None]
+        d[:, :2] += rng.uniform(-Config.ENEMY_ACCURACY, Config.ENEMY_ACCURACY, (k, 2))
+        d *= Config.ENEMY_BULLET_SPEED / np.maximum(np.linalg.norm(d, axis=1), 1e-6)[:, None]
+        self.projectiles.spawn_many(start.astype(np.float32), d.astype(np.float32), Config.ENEMY_BULLET_LIFETIME)
+
+        right, up, front = MUZZLE_OFFSET
+        muzzles = np.stack((pos[:, 0] + fz * right + fx * front, pos[:, 1] + up,
+                            pos[:, 2] - fx * right + fz * front), axis=1)
+        forwards = np.stack((fx, np.zeros(k), fz), axis=1)
+        self.events.append(('horde_shot', slots, muzzles, forwards))
+
+    # ---------- 子弹命中 ----------
+
+    def _find_hit(self, start, end):
+        """宽相位：XZ 平面上离飞行路径足够近的敌人；再对它们的身体 / 头部 OBB 做线段检测"""
+        h = self.horde
+        idx = h.indices()
+        if len(idx) == 0: return None, False, None
+
+        pos = h.pos[idx]
+        sx, sz = end[0] - start[0], end[2] - start[2]
+        length_sq = sx * sx + sz * sz
+        ox, oz = pos[:, 0] - start[0], pos[:, 2] - start[2]
+        t = np.clip((ox * sx + oz * sz) / length_sq, 0, 1) if length_sq > 1e-12 else np.zeros(len(idx))
+        near = (ox - t * sx) ** 2 + (oz - t * sz) ** 2 < Config.ENEMY_HIT_RADIUS ** 2
+        if not near.any(): return None, False, None
+
+        candidates = idx[near]
+        parts = len(ENEMY_HITBOX_PARTS)
+        feet = h.pos[candidates]
+        mats = world_to_local_matrices((feet[:, None, :] + _PART_OFFSETS).reshape(-1, 3),
+                                       np.tile(_PART_SIZES, (len(candidates), 1)),
+                                       np.repeat(h.yaw[candidates], parts))
+        t = segment_vs_unit_boxes(start, end, mats)
+        best = int(np.argmin(t))
+        if not np.isfinite(t[best]): return None, False, None
+        return int(candidates[best // parts]), bool(_PART_IS_HEAD[best % parts]), start + (end - start) * t[best]
\ No newline at end of file
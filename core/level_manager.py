@@ -1,114 +1,295 @@
 # core/level_manager.py
+# 关卡的 Ursina 端：按固定步长推进模拟核心（core/simulation.py），再把事件和状态同步到各个视图实体。
+# 视图在最后两个模拟步之间插值，所以 30 / 60 / 240 FPS 下模拟结果相同、画面都是平滑的。
+# HordeLevelManager 是尸潮模式的版本（core/horde.py + 实例化渲染）
 from ursina import *
 from entities.enemy import Enemy
+from entities.horde_renderer import HordeRenderer
+from entities.projectiles import ProjectileManager, ProjectileInterpolator, PlayerBullet
+from entities.health_bars import HealthBarOverlay
+from entities.particles import emit_impact_sparks, emit_muzzle_flash
 from core.config import Config
+from core.pool import entity_pool
+from core.simulation import Simulation
+from core.horde import HordeSimulation
+from core.static_geometry import StaticLevel
+from core.profiler import profiler
+from core.audio import PRIORITY_HIGH, PRIORITY_LOW
+from core.utils import safe_load_audio
+from core.timers import timers
+from core.clock import FixedStepClock
+from core.replay import ReplayRecorder
+from pathlib import Path
+import numpy as np
 import random
+import time as _time
 
 class LevelManager(Entity):
-    def __init__(self, player, on_victory_callback=None):
+    active = None  # 当前关卡，武器开火时把子弹交给它的模拟核心
+
+    def __init__(self, player, on_victory_callback=None, static_level=None, pickups=(), seed=None):
         super().__init__()
         self.player = player
         self.on_victory_callback = on_victory_callback
-        
-        self.wave = 1
-        self.enemies_alive = []
-        
-        self.spawn_areas = [(-15, -15), (15, 15), (-15, 15), (15, -15)]
-        
-        self.wave_active = False
-        self.time_to_next_wave = 3
+        LevelManager.active = self
+
+        # 合并后的静态墙体同时作为模拟核心的碰撞世界
+        self.static_level = static_level or StaticLevel()
+        self.pickups = list(pickups)   # 与 sim.pickups 一一对应的血包实体
+        self.sim = self.create_simulation(self.static_level, [tuple(p.position) for p in self.pickups], seed)
+        self.clock = FixedStepClock(self.sim.dt)
+        self.arena_seed = seed     # 墙体由开局时的种子生成，重开一局不会重建
+        self.recorder = None
+        self.start_recording()
+
+        self.enemy_views = {}    # EnemyState -> Enemy
+        self.bullet_views = {}   # 玩家子弹槽位 -> PlayerBullet
+        # 所有敌人子弹由一个结构数组渲染
+        self.projectiles = ProjectileManager(self.sim.projectiles)
+        self.bullet_interpolator = ProjectileInterpolator(self.sim.bullets)
+        # 所有敌人的头顶血条合并成一个网格
+        self.health_bars = HealthBarOverlay()
         
         # 改进的波次提示
         self.wave_text = Text(text='', scale=3, origin=(0,0), color=color.yellow, enabled=False, background=True)
         self.wave_subtitle = Text(text='', scale=1.5, origin=(0,0), y=-0.1, color=color.white, enabled=False, background=True)
 
-    def start_wave(self):
-        # 检查是否通关
-        if self.wave > Config.MAX_WAVES:
+    def create_simulation(self, walls, pickups, seed):
+        return Simulation(walls, pickups, seed=seed)
+
+    def update(self):
+        sim = self.sim
+        p = self.player
+        if p.enabled:
+            sim.set_player(p.x, p.y, p.z, p.rotation_y)
+
+        steps = self.clock.advance(time.dt)
+        weapon = p.weapon if p.enabled else None
+        with profiler.section('level.sim'):
+            for i in range(steps):
+                if i == steps - 1:
+                    self.snapshot()
+                # 武器冷却和连射也按模拟步推进，开火时刻只取决于模拟时间
+                if weapon:
+                    weapon.fixed_update(sim.dt)
+                for event in sim.step():
+                    self.handle_event(event)
+        with profiler.section('level.views'):
+            self.sync_views(self.clock.alpha)
+
+    def snapshot(self):
+        """记下最后一个模拟步之前的状态，渲染时在它和当前步之间插值"""
+        for view in self.enemy_views.values():
+            view.snapshot()
+        self.projectiles.interpolator.snapshot()
+        self.bullet_interpolator.snapshot()
+
+    def handle_event(self, event):
+        kind = event[0]
+        if kind == 'enemy_spawned':
+            state = event[1]
+            self.enemy_views[state] = Enemy(state)
+        elif kind == 'enemy_shot':
+            view = self.enemy_views.get(event[1])
+            if view: view.on_shoot(event[2], event[3])
+        elif kind == 'enemy_hit':
+            state, hit_pos, normal, is_headshot = event[1:5]
+            if is_headshot:
+                print("HEADSHOT!")
+            view = self.enemy_views.get(state)
+            if view: view.on_hit()
+            
+            # 播放击中音效
+            hit_sound = self.player.weapon.sfx_hit if self.player.weapon else None
+            if hit_sound:
+                hit_sound.play(pitch=random.uniform(0.9, 1.1), priority=PRIORITY_HIGH)
+            
+            # 击中特效
+            emit_impact_sparks(Vec3(*hit_pos), normal=Vec3(*normal))
+        elif kind == 'enemy_killed':
+            view = self.enemy_views.pop(event[1], None)
+            if view: view.on_killed()
+            if self.player.hud_ref:
+                self.player.hud_ref.add_kill()
+        elif kind == 'bullet_wall':
+            emit_impact_sparks(Vec3(*event[1]), normal=Vec3(*event[2]))
+        elif kind == 'player_hit':
+            self.player.take_damage(event[1])
+        elif kind == 'player_healed':
+            self.player.heal(event[1])
+        elif kind == 'pickup_taken':
+            pickup, amount = event[1:3]
+            self.pickups[pickup.id].collect()
+            self.player.heal(amount)
+        elif kind == 'wave_started':
+            self.show_wave_banner(event[1], event[2])
+        elif kind == 'defeat':
+            self.stop_recording()
+        elif kind == 'victory':
+            self.stop_recording()
             if self.on_victory_callback:
                 self.on_victory_callback()
-            return
 
-        self.wave_active = True
-        self.wave_text.text = f'WAVE {self.wave} / {Config.MAX_WAVES}'
+    def start_recording(self):
+        """Config.REPLAY_RECORD 打开时把这一局录到 REPLAY_DIR 下（python replay.py 回放）"""
+        self.stop_recording()
+        if not Config.REPLAY_RECORD or self.sim.seed is None or self.arena_seed is None: return
+        folder = Path(Config.REPLAY_DIR)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f'match_{self.sim.seed}_{int(_time.time())}.rpl'
+        try:
+            self.recorder = ReplayRecorder(path, self.sim, self.arena_seed)
+        except OSError as e:
+            print(f'无法创建录像文件: {path} ({e})')
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def show_wave_banner(self, wave, count):
+        self.wave_text.text = f'WAVE {wave} / {Config.MAX_WAVES}'
         self.wave_text.enabled = True
-        
-        count = 3 + int(self.wave * 1.5)
         self.wave_subtitle.text = f'{count} enemies incoming!'
         self.wave_subtitle.enabled = True
         
         # 修复：使用 scale_x, scale_y 而不是 scale
         self.wave_text.scale_x = 5
         self.wave_text.scale_y = 5
-        invoke(setattr, self.wave_text, 'scale_x', 3, delay=0.3)
-        invoke(setattr, self.wave_text, 'scale_y', 3, delay=0.3)
-        
-        invoke(setattr, self.wave_text, 'enabled', False, delay=2.5)
-        invoke(setattr, self.wave_subtitle, 'enabled', False, delay=2.5)
-        
-        # 生成敌人，确保不在墙里
-        spawned = 0
-        max_attempts = count * 10  # 最多尝试次数
-        attempts = 0
-        
-        while spawned < count and attempts < max_attempts:
-            attempts += 1
-            
-            # 随机选择生成区域
-            area = random.choice(self.spawn_areas)
-            x = area[0] + random.randint(-5, 5)
-            z = area[1] + random.randint(-5, 5)
-            spawn_pos = Vec3(x, 0, z)
-            
-            # 检查该位置是否有障碍物
-            # 向上发射射线，检查是否在墙里
-            hit_check = raycast(
-                origin=spawn_pos + Vec3(0, 1, 0),
-                direction=Vec3(0, 1, 0),
-                distance=0.5,
-                ignore=[]
-            )
-            
-            # 检查周围是否有墙
-            is_valid = True
-            for direction in [Vec3(1,0,0), Vec3(-1,0,0), Vec3(0,0,1), Vec3(0,0,-1)]:
-                hit = raycast(
-                    origin=spawn_pos + Vec3(0, 1, 0),
-                    direction=direction,
-                    distance=1.5,
-                    ignore=[]
-                )
-                if hit.hit and hit.distance < 1.0:
-                    is_valid = False
-                    break
-            
-            # 如果位置有效，生成敌人
-            if is_valid and not hit_check.hit:
-                e = Enemy(position=spawn_pos, player_target=self.player)
-                e.hp *= (1 + self.wave * 0.1)
-                self.enemies_alive.append(e)
-                spawned += 1
-        
-        # 如果无法生成足够的敌人，至少生成一些
-        if spawned < count:
-            print(f"Warning: Only spawned {spawned}/{count} enemies due to space constraints")
+        timers.schedule(0.3, self._settle_wave_banner, owner=self, key='banner_scale')
+        timers.schedule(2.5, self.hide_wave_banner, owner=self, key='banner_hide')
+
+    def _settle_wave_banner(self):
+        self.wave_text.scale_x = 3
+        self.wave_text.scale_y = 3
+
+    def hide_wave_banner(self):
+        self.wave_text.enabled = False
+        self.wave_subtitle.enabled = False
+
+    def sync_views(self, alpha=1.0):
+        with profiler.section('enemies'):
+            self.sync_enemies(alpha)
+        self.projectiles.alpha = alpha
+
+        # 玩家子弹：存活的槽位各占一个池化实体，消失的槽位归还对象池
+        with profiler.section('bullets'):
+            bullets = self.sim.bullets
+            idx = np.flatnonzero(bullets.alive)
+            alive = set(idx.tolist())
+            for slot in [s for s in self.bullet_views if s not in alive]:
+                entity_pool.release(self.bullet_views.pop(slot))
+            positions = self.bullet_interpolator.positions(idx, alpha)
+            for slot, pos in zip(idx.tolist(), positions):
+                view = self.bullet_views.get(slot)
+                if view is None:
+                    view = self.bullet_views[slot] = entity_pool.acquire(PlayerBullet)
+                view.position = Vec3(*pos)
+
+    def sync_enemies(self, alpha):
+        views = self.enemy_views.values()
+        for view in views:
+            view.sync(alpha)
+        self.health_bars.submit(
+            np.array([(v.x, v.y + Config.HEALTH_BAR_OFFSET, v.z) for v in views], dtype=np.float32).reshape(-1, 3),
+            np.array([v.state.hp / v.state.max_hp for v in views], dtype=np.float32))
+
+    def clear_views(self):
+        for view in self.enemy_views.values():
+            destroy(view)
+        self.enemy_views.clear()
+        self.health_bars.clear()
+        for view in self.bullet_views.values():
+            entity_pool.release(view)
+        self.bullet_views.clear()
+
+    def reset(self, seed=None):
+        """原地重开：清掉敌人和子弹视图，模拟核心回到开局（墙体、导航网格保留），血包按当前位置重新登记"""
+        self.clear_views()
+        timers.cancel_owner(self)
+        # 取消的定时器里可能有横幅的缩放恢复，这里直接恢复
+        self._settle_wave_banner()
+        self.hide_wave_banner()
+        self.clock.reset()
+        self.stop_recording()
+        self.sim.reset([tuple(p.position) for p in self.pickups], seed)
+        self.start_recording()
+        self.snapshot()
+        LevelManager.active = self
+
+    def on_destroy(self):
+        self.stop_recording()
+        timers.cancel_owner(self)
+        self.clear_views()
+        destroy(self.projectiles)
+        destroy(self.health_bars)
+        destroy(self.wave_text)
+        destroy(self.wave_subtitle)
+        if LevelManager.active is self:
+            LevelManager.active = None
+
+
+class HordeLevelManager(LevelManager):
+    """
+    尸潮模式：模拟核心换成 HordeSimulation，敌人没有单独的视图实体，全部由一个 HordeRenderer 实例化绘制。
+    事件里的敌人是数组槽位；开火 / 死亡特效每帧限量播放，血条只画受过伤的敌人
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.horde_view = HordeRenderer(self.sim.horde)
+        self.sfx_enemy_shoot = safe_load_audio('assets/shot.wav')
+        self.effects_left = Config.HORDE_MAX_EFFECTS_PER_FRAME
+
+    def create_simulation(self, walls, pickups, seed):
+        return HordeSimulation(walls, pickups, seed=seed)
+
+    def start_recording(self):
+        # 录像格式按 EnemyState 逐个记录敌人，不支持数组形式的尸潮
+        pass
 
     def update(self):
-        self.enemies_alive = [e for e in self.enemies_alive if e and e.enabled]
-        
-        if not self.wave_active:
-            self.time_to_next_wave -= time.dt
-            if self.time_to_next_wave <= 0:
-                self.start_wave()
-        else:
-            if len(self.enemies_alive) == 0:
-                self.wave += 1
-                self.wave_active = False
-                self.time_to_next_wave = 4 
-                
-                # 波次间回血
-                if self.player.hp < 100:
-                    heal_amount = 30
-                    self.player.hp = min(100, self.player.hp + heal_amount)
-                    if self.player.hud_ref:
-                        self.player.hud_ref.update_hp(self.player.hp, 100)
\ No newline at end of file
+        self.effects_left = Config.HORDE_MAX_EFFECTS_PER_FRAME
+        super().update()
+
+    def snapshot(self):
+        super().snapshot()
+        self.horde_view.snapshot()
+
+    def handle_event(self, event):
+        kind = event[0]
+        if kind == 'horde_spawned':
+            return
+        if kind == 'horde_shot':
+            _, slots, muzzles, forwards = event
+            k = min(len(slots), self.effects_left)
+            self.effects_left -= k
+            for muzzle, forward in zip(muzzles[:k], forwards[:k]):
+                emit_muzzle_flash(Vec3(*muzzle), Vec3(*forward), count=3)
+            if k and self.sfx_enemy_shoot:
+                self.sfx_enemy_shoot.play(pitch=random.uniform(0.8, 1.2), priority=PRIORITY_LOW, position=Vec3(*muzzles[0]))
+            return
+        if kind == 'enemy_hit':
+            self.horde_view.flash(event[1])
+        elif kind == 'enemy_killed' and self.effects_left > 0:
+            self.effects_left -= 1
+            emit_impact_sparks(Vec3(*event[2]) + Vec3(0, 1.2, 0), normal=Vec3(0, 1, 0))
+        super().handle_event(event)
+
+    def sync_enemies(self, alpha):
+        view = self.horde_view
+        view.sync(alpha)
+        a = self.sim.horde
+        idx = a.indices()
+        ratio = a.hp[idx] / a.max_hp[idx]
+        damaged = ratio < 1
+        self.health_bars.submit(view.positions()[damaged] + np.float32((0, Config.HEALTH_BAR_OFFSET, 0)),
+                                ratio[damaged].astype(np.float32))
+
+    def clear_views(self):
+        super().clear_views()
+        self.horde_view.clear()
+
+    def on_destroy(self):
+        super().on_destroy()
+        destroy(self.horde_view)
\ No newline at end of file
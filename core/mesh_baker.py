@@ -0,0 +1,96 @@
+# core/mesh_baker.py
+# 把由多个 cube 实体拼成的模型烘焙成一个带顶点色的网格；烘焙结果按名字缓存，每个进程只做一次
+from ursina import Mesh, destroy
+from panda3d.core import NodePath
+import numpy as np
+
+# 单位立方体（[-0.5, 0.5]^3）的 6 个面：外法线 + 从外侧看逆时针的 4 个角
+_FACES = (
+    ((1, 0, 0),  ((0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (0.5, 0.5, 0.5), (0.5, -0.5, 0.5))),
+    ((-1, 0, 0), ((-0.5, -0.5, 0.5), (-0.5, 0.5, 0.5), (-0.5, 0.5, -0.5), (-0.5, -0.5, -0.5))),
+    ((0, 1, 0),  ((-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5))),
+    ((0, -1, 0), ((-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5))),
+    ((0, 0, 1),  ((0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5), (-0.5, -0.5, 0.5))),
+    ((0, 0, -1), ((-0.5, -0.5, -0.5), (-0.5, 0.5, -0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5))),
+)
+_CUBE_VERTS = np.array([c for n, corners in _FACES for c in corners], dtype=np.float32)            # (24,3)
+_CUBE_NORMALS = np.array([n for n, corners in _FACES for c in corners], dtype=np.float32)          # (24,3)
+# Ursina 使用左手坐标系，正面为从外侧看顺时针，所以按 (0,2,1)(0,3,2) 的顺序输出三角形
+_CUBE_TRIS = np.array([b + k for b in range(0, 24, 4) for k in (0, 2, 1, 0, 3, 2)], dtype=np.uint32)
+# 与 Ursina 的 'cube' 模型一致：每个面各自铺满一张贴图
+_CUBE_UVS = np.tile(np.array([(0, 0), (0, 1), (1, 1), (1, 0)], dtype=np.float32), (6, 1))           # (24,2)
+
+def box_arrays(matrices, colors):
+    """
+    一组立方体 -> 合并后的 (顶点, 法线, 颜色, 三角形) NumPy 数组。
+    matrices 为 (n,4,4) 的 立方体局部 -> 模型 矩阵（Panda 行向量约定），colors 为 (n,4)。
+    """
+    matrices = np.asarray(matrices, dtype=np.float32)
+    n = len(matrices)
+    verts = np.concatenate((_CUBE_VERTS, np.ones((24, 1), dtype=np.float32)), axis=1) @ matrices   # (n,24,4)
+    # 法线用逆转置矩阵变换，保证非均匀缩放下仍垂直于表面
+    normals = _CUBE_NORMALS @ np.linalg.inv(matrices[:, :3, :3]).transpose(0, 2, 1)
+    normals /= np.linalg.norm(normals, axis=2, keepdims=True)
+    colors = np.repeat(np.asarray(colors, dtype=np.float32)[:, None, :], 24, axis=1)
+    tris = (np.arange(n, dtype=np.uint32)[:, None] * 24 + _CUBE_TRIS).ravel()
+    return verts[:, :, :3].reshape(-1, 3), normals.reshape(-1, 3), colors.reshape(-1, 4), tris
+
+def box_uvs(uv_scales):
+    """每个立方体的贴图平铺次数 (n,2) -> 合并后的 UV 数组，相当于逐个设置 texture_scale"""
+    uv_scales = np.asarray(uv_scales, dtype=np.float32)
+    return (_CUBE_UVS[None, :, :] * uv_scales[:, None, :]).reshape(-1, 2)
+
+def bake_boxes(matrices, colors, uv_scales=None):
+    verts, normals, colors, tris = box_arrays(matrices, colors)
+    uvs = None if uv_scales is None else box_uvs(uv_scales).ravel()
+    return Mesh(vertices=verts.ravel(), normals=normals.ravel(), colors=colors.ravel(), uvs=uvs, triangles=tris)
+
+def collect_cubes(root):
+    """遍历 root 的所有子孙实体，返回其中 cube 模型的 (相对 root 的矩阵列表, 颜色列表)"""
+    matrices, colors = [], []
+    stack = list(root.children)
+    while stack:
+        e = stack.pop()
+        stack.extend(e.children)
+        if e.model and e.model.name == 'cube' and e.visible:
+            matrices.append(np.array(e.getMat(root), dtype=np.float32))
+            colors.append(tuple(e.color))
+    return matrices, colors
+
+def bake_entity_tree(root, color=None):
+    """把 root 下所有 cube 子实体烘焙成一个网格；color 不为 None 时所有顶点使用该颜色（如受击闪白）"""
+    matrices, colors = collect_cubes(root)
+    if color is not None:
+        colors = [tuple(color)] * len(matrices)
+    return bake_boxes(matrices, colors)
+
+
+_cache = {}
+
+def cached_mesh(key, build):
+    """按 key 缓存烘焙结果；build 是无参函数，只在第一次请求时调用"""
+    mesh = _cache.get(key)
+    if mesh is None:
+        mesh = _cache[key] = build()
+    return mesh
+
+def instance_model(mesh, name='baked_model'):
+    """
+    共享同一份几何数据的实例节点，可以直接赋给 Entity.model 或挂到任意节点下。
+    每个实例可以单独设置变换 / 颜色 / 显隐，但不会复制顶点数据。
+    """
+    node = NodePath(name)
+    mesh.instanceTo(node)
+    return node
+
+def bake_prototype(key, build_prototype, color=None):
+    """
+    用普通实体搭一次原型（build_prototype 返回根实体），烘焙后立即销毁原型，结果按 key 缓存。
+    """
+    def build():
+        root = build_prototype()
+        try:
+            return bake_entity_tree(root, color)
+        finally:
+            destroy(root)
+    return cached_mesh(key, build)
\ No newline at end of file
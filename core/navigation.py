@@ -0,0 +1,227 @@
+# core/navigation.py
+# 导航网格 + 流场：关卡生成时由墙体一次性栅格化，敌人移动只需查表，不再做射线检测
+from core.config import Config
+import numpy as np
+import heapq
+import math
+import time as _time
+
+_SQRT2 = math.sqrt(2)
+_NEIGHBOR_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class NavGrid:
+    """
+    覆盖整个场地的均匀网格；被墙（按敌人半径膨胀后）覆盖的格子不可通行。
+    wall_boxes 为 XZ 平面上的有向矩形 (cx, cz, ux, uz, half_w, half_d)，见 StaticLevel.nav_boxes。
+    """
+
+    def __init__(self, wall_boxes, half_extent=Config.NAV_HALF_EXTENT, cell_size=Config.NAV_CELL_SIZE,
+                 agent_radius=Config.NAV_AGENT_RADIUS):
+        self.cell_size = cell_size
+        self.origin = -half_extent
+        self.width = self.height = int(math.ceil(2 * half_extent / cell_size))
+
+        self.blocked = self._rasterize(wall_boxes, agent_radius)
+        self.neighbors = self._build_neighbors()
+
+    def _rasterize(self, wall_boxes, radius):
+        cs = self.cell_size
+        centers = self.origin + (np.arange(self.width) + 0.5) * cs
+        cx, cz = np.meshgrid(centers, centers)   # cz 为行（z），cx 为列（x）
+        blocked = np.zeros((self.height, self.width), dtype=bool)
+        for bx, bz, ux, uz, hw, hd in wall_boxes:
+            dx, dz = cx - bx, cz - bz
+            along = np.abs(dx * ux + dz * uz)
+            across = np.abs(-dx * uz + dz * ux)
+            blocked |= (along <= hw + radius) & (across <= hd + radius)
+        return blocked.ravel()
+
+    def _build_neighbors(self):
+        # 每个格子（包括被阻挡的格子）只连接可通行的邻居；斜向移动不允许切墙角
+        w, h, blocked = self.width, self.height, self.blocked
+        neighbors = []
+        for i in range(w * h):
+            x, z = i % w, i // w
+            links = []
+            for dx, dz in _NEIGHBOR_STEPS:
+                nx, nz = x + dx, z + dz
+                if not (0 <= nx < w and 0 <= nz < h) or blocked[nz * w + nx]:
+                    continue
+                if dx and dz and (blocked[z * w + nx] or blocked[nz * w + x]):
+                    continue
+                links.append((nz * w + nx, _SQRT2 if dx and dz else 1.0))
+            neighbors.append(links)
+        return neighbors
+
+    def cell_index(self, x, z):
+        """世界坐标 -> 格子下标；场地外返回 -1"""
+        gx = int((x - self.origin) // self.cell_size)
+        gz = int((z - self.origin) // self.cell_size)
+        if 0 <= gx < self.width and 0 <= gz < self.height:
+            return gz * self.width + gx
+        return -1
+
+    def cell_indices(self, xs, zs):
+        """cell_index 的向量化版本：(n,) 坐标 -> (n,) 格子下标，场地外为 -1"""
+        gx = np.floor((np.asarray(xs) - self.origin) / self.cell_size).astype(np.int64)
+        gz = np.floor((np.asarray(zs) - self.origin) / self.cell_size).astype(np.int64)
+        inside = (gx >= 0) & (gx < self.width) & (gz >= 0) & (gz < self.height)
+        return np.where(inside, gz * self.width + gx, -1)
+
+    def free_mask(self, xs, zs):
+        """is_free 的向量化版本"""
+        i = self.cell_indices(xs, zs)
+        return (i >= 0) & ~self.blocked[np.maximum(i, 0)]
+
+    @property
+    def neighbor_table(self):
+        """(格子数, 8) 的邻居下标表，不足 8 个的用 -1 填充，顺序与 neighbors 相同；第一次使用时构建"""
+        if getattr(self, '_neighbor_table', None) is None:
+            table = np.full((len(self.neighbors), len(_NEIGHBOR_STEPS)), -1, dtype=np.int64)
+            for i, links in enumerate(self.neighbors):
+                table[i, :len(links)] = [j for j, cost in links]
+            self._neighbor_table = table
+        return self._neighbor_table
+
+    def cell_center(self, i):
+        cs = self.cell_size
+        return self.origin + (i % self.width + 0.5) * cs, self.origin + (i // self.width + 0.5) * cs
+
+    def is_free(self, x, z):
+        i = self.cell_index(x, z)
+        return i >= 0 and not self.blocked[i]
+
+
+class FlowField:
+    """
+    到目标（玩家）所在格子的距离场；只有目标换格子时才重新计算。
+    重算以时间片方式分摊到多帧，算完之前敌人继续使用上一张距离场。
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.target_cell = -1      # 当前距离场对应的目标格子
+        self.dist = [math.inf] * (grid.width * grid.height)
+        self._wanted_cell = -1     # 玩家最新所在的格子
+        self._job = None
+        self._next = None          # 向量化查询用：每个格子的下一步格子，随距离场一起失效
+        self._next_for = -1
+
+    def reset(self):
+        """丢弃距离场和进行中的计算（重开一局时使用）"""
+        self.target_cell = -1
+        self.dist = [math.inf] * (self.grid.width * self.grid.height)
+        self._wanted_cell = -1
+        self._job = None
+        self._next = None
+        self._next_for = -1
+
+    def update_target(self, x, z):
+        cell = self.grid.cell_index(x, z)
+        if cell >= 0:
+            self._wanted_cell = cell
+
+    def process(self, budget_ms=Config.NAV_BUDGET_MS, max_slices=None):
+        """
+        推进距离场计算；还没有任何距离场时一次算完。返回 True 表示本次换上了新的距离场。
+        max_slices 不为 None 时按固定批数推进（每批 256 个格子）而不是按耗时，结果与机器快慢无关。
+        """
+        if self._job is None:
+            if self._wanted_cell < 0 or self._wanted_cell == self.target_cell:
+                return False
+            self._job = self._compute(self._wanted_cell)
+
+        first = self.target_cell < 0
+        deadline = None if first or max_slices is not None else _time.perf_counter() + budget_ms / 1000
+        slices = 0
+        for result in self._job:
+            if result is not None:
+                self._job = None
+                self.target_cell, self.dist = result
+                return True
+            slices += 1
+            if deadline is not None and _time.perf_counter() > deadline:
+                return False
+            if not first and max_slices is not None and slices >= max_slices:
+                return False
+        return False
+
+    def _compute(self, source):
+        # Dijkstra，8 邻接，直行代价 1、斜行代价 √2；每处理一批格子让出一次，结束时产出结果
+        neighbors = self.grid.neighbors
+        dist = [math.inf] * len(neighbors)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        popped = 0
+        while heap:
+            d, i = pop(heap)
+            if d > dist[i]: continue
+            for j, cost in neighbors[i]:
+                nd = d + cost
+                if nd < dist[j]:
+                    dist[j] = nd
+                    push(heap, (nd, j))
+            popped += 1
+            if popped & 255 == 0:
+                yield None
+        yield source, dist
+
+    def direction(self, x, z):
+        """
+        返回 (x, z) 处应当前进的单位方向 (dx, dz)。
+        已在目标格子、在场地外或无路可走时返回 None，调用方直接朝玩家移动即可。
+        """
+        grid = self.grid
+        i = grid.cell_index(x, z)
+        if i < 0 or i == self.target_cell:
+            return None
+
+        best, best_dist = -1, self.dist[i]
+        for j, cost in grid.neighbors[i]:
+            if self.dist[j] < best_dist:
+                best, best_dist = j, self.dist[j]
+        if best < 0:
+            return None
+
+        # 朝下一个格子的中心走，跨格子时方向变化更平滑
+        tx, tz = grid.cell_center(best)
+        dx, dz = tx - x, tz - z
+        length = math.hypot(dx, dz)
+        if length < 1e-6:
+            return None
+        return dx / length, dz / length
+
+    def next_cells(self):
+        """
+        每个格子下一步应走向的邻居（与 direction() 的选择相同：距离最小且比自己近），没有则为 -1。
+        每张距离场只计算一次
+        """
+        if self._next is None or self._next_for != self.target_cell:
+            dist = np.append(np.asarray(self.dist, dtype=np.float64), np.inf)   # 末尾的 inf 对应表中的 -1 填充
+            table = self.grid.neighbor_table
+            nd = dist[table]
+            k = nd.argmin(axis=1)
+            rows = np.arange(len(table))
+            self._next = np.where(nd[rows, k] < dist[:-1], table[rows, k], -1)
+            self._next_for = self.target_cell
+        return self._next
+
+    def directions(self, xs, zs):
+        """
+        direction() 的向量化版本：返回 ((n,2) 单位方向, (n,) 是否有效)。
+        无效（已在目标格子、场地外或无路可走）的行由调用方改为直接朝玩家移动
+        """
+        grid = self.grid
+        xs, zs = np.asarray(xs, dtype=np.float64), np.asarray(zs, dtype=np.float64)
+        cells = grid.cell_indices(xs, zs)
+        nxt = np.where(cells >= 0, self.next_cells()[np.maximum(cells, 0)], -1)
+        valid = (nxt >= 0) & (cells != self.target_cell)
+        cs = grid.cell_size
+        d = np.stack((grid.origin + (nxt % grid.width + 0.5) * cs - xs,
+                      grid.origin + (nxt // grid.width + 0.5) * cs - zs), axis=1)
+        length = np.hypot(d[:, 0], d[:, 1])
+        valid &= length > 1e-6
+        d /= np.where(valid, length, 1.0)[:, None]
+        return d, valid
\ No newline at end of file
@@ -0,0 +1,161 @@
+# core/net_client.py
+# 联机客户端（无窗口）：按模拟步长生成输入命令、本地预测玩家移动并发给服务器，
+# 解码增量快照并按服务器已处理的命令序号校正预测。输入来自 brain(client) 回调，回环测试用 BotBrain
+from core.config import Config
+from core.netcode import (PROTOCOL_VERSION, HELLO, BYE, WELCOME, SNAPSHOT, REJECT, ROLE_PLAYER,
+                          BUTTON_FIRE, HELLO_PACKET, WELCOME_PACKET, REJECT_PACKET, BYE_PACKET,
+                          Command, Snapshot, PlayerPredictor, LossyLink, build_nav_grid, pack_input,
+                          enemy_position)
+import numpy as np
+import asyncio
+import struct
+import math
+
+class BotBrain:
+    """回环测试的假玩家：转向最近的敌人、左右横移并开火"""
+
+    def __call__(self, client):
+        snap = client.latest
+        px, py, pz = client.position
+        yaw = pitch = 0.0
+        buttons = 0
+        if snap and snap.enemies:
+            x, y, z = min((enemy_position(f) for f in snap.enemies.values()),
+                          key=lambda q: (q[0] - px) ** 2 + (q[2] - pz) ** 2)
+            dx, dz = x - px, z - pz
+            yaw = math.degrees(math.atan2(dx, dz))
+            pitch = -math.degrees(math.atan2(y + 1.2 - (py + 2.0), max(math.hypot(dx, dz), 1e-6)))
+            buttons = BUTTON_FIRE
+        strafe = 1 if (client.seq // 90) % 2 else -1
+        return Command.make(client.seq, strafe, 0, yaw, pitch, buttons)
+
+
+class NetClient(asyncio.DatagramProtocol):
+    def __init__(self, brain=None, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.brain = brain or BotBrain()
+        self.link_options = dict(latency=latency, jitter=jitter, loss=loss, seed=seed)
+        self.transport = self.link = None
+
+        self.id = None
+        self.role = None
+        self.dt = Config.SIM_DT
+        self.predictor = None
+        self.seq = 0                 # 最新命令序号
+        self.history = {}            # 快照序号 -> Snapshot（解码增量的基准）
+        self.latest = None
+        self.rejected = False
+        self.running = True
+        self.clock = 0.0
+        self._hello_at = -math.inf
+
+        # 指标
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.lost = 0                # 序号跳过的快照（丢包）
+        self.stale = 0               # 乱序到达、比已收到的更旧的快照
+        self.undecodable = 0         # 基准已不在本地
+        self.connected_at = None
+
+    @property
+    def position(self):
+        if self.predictor and self.role == ROLE_PLAYER:
+            return self.predictor.x, self.predictor.y, self.predictor.z
+        return self.latest.player if self.latest else (0.0, 0.0, 0.0)
+
+    # ---------- 网络 ----------
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.link = LossyLink(transport, asyncio.get_running_loop(), **self.link_options)
+
+    def datagram_received(self, data, addr):
+        self.bytes_received += len(data)
+        try:
+            kind = data[0]
+            if kind == WELCOME and self.id is None:
+                _, self.id, self.role, self.dt, seed, arena_seed = WELCOME_PACKET.unpack_from(data)
+                self.predictor = PlayerPredictor(build_nav_grid(arena_seed), self.dt)
+                self.connected_at = asyncio.get_running_loop().time()
+            elif kind == SNAPSHOT and self.id is not None:
+                self._on_snapshot(data)
+            elif kind == REJECT:
+                print(f'服务器拒绝连接：协议版本 {REJECT_PACKET.unpack_from(data)[1]}，本地 {PROTOCOL_VERSION}')
+                self.rejected = True
+                self.running = False
+        except (IndexError, struct.error):
+            pass
+
+    def _on_snapshot(self, data):
+        try:
+            snap = Snapshot(data, self.history)
+        except KeyError:
+            self.undecodable += 1
+            return
+        latest = self.latest.seq if self.latest else 0
+        if snap.seq <= latest:
+            self.stale += 1
+            return
+        if latest:
+            self.lost += snap.seq - latest - 1
+        self.snapshots += 1
+        self.history[snap.seq] = snap
+        self.history.pop(snap.seq - Config.NET_SNAPSHOT_HISTORY, None)
+        self.latest = snap
+        if self.role == ROLE_PLAYER:
+            self.predictor.reconcile(snap.player, snap.last_input_seq, alive=snap.hp > 0)
+
+    # ---------- 推进 ----------
+
+    def tick(self):
+        self.clock += self.dt
+        if self.id is None:
+            if self.clock - self._hello_at >= Config.NET_HELLO_INTERVAL:
+                self.link.sendto(HELLO_PACKET.pack(HELLO, PROTOCOL_VERSION))
+                self._hello_at = self.clock
+            return
+
+        ack = self.latest.seq if self.latest else 0
+        if self.role != ROLE_PLAYER:
+            self.link.sendto(pack_input(ack, ()))   # 观战者也要确认快照
+            return
+        self.seq += 1
+        cmd = self.brain(self)
+        self.predictor.apply(cmd)
+        # 服务器还没处理的命令全部重发（最多 NET_INPUT_REDUNDANCY 条），丢一个包不会丢输入
+        pending = list(self.predictor.pending)[-Config.NET_INPUT_REDUNDANCY:]
+        self.link.sendto(pack_input(ack, pending))
+
+    async def run(self, duration=None):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_tick = start
+        while self.running and (duration is None or loop.time() - start < duration):
+            self.tick()
+            next_tick += self.dt
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    def close(self):
+        if self.transport and not self.transport.is_closing():
+            self.transport.sendto(BYE_PACKET.pack(BYE))
+            self.transport.close()
+
+    # ---------- 指标 ----------
+
+    def metrics(self):
+        elapsed = asyncio.get_running_loop().time() - self.connected_at if self.connected_at else 0.0
+        corrections = np.array(self.predictor.corrections if self.predictor else ())
+        return {
+            'id': self.id,
+            'role': None if self.role is None else ('player' if self.role == ROLE_PLAYER else 'spectator'),
+            'snapshots': self.snapshots,
+            'lost': self.lost,
+            'stale': self.stale,
+            'undecodable': self.undecodable,
+            'bytes_per_second': round(self.bytes_received / max(elapsed, 1e-6), 1),
+            'inputs_dropped_by_link': self.link.dropped if self.link else 0,
+            'prediction_error': {
+                'mean': round(float(corrections.mean()), 4) if len(corrections) else 0.0,
+                'p95': round(float(np.percentile(corrections, 95)), 4) if len(corrections) else 0.0,
+                'max': round(float(corrections.max()), 4) if len(corrections) else 0.0,
+            },
+        }
\ No newline at end of file
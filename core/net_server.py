@@ -0,0 +1,259 @@
+# core/net_server.py
+# 权威服务器：在 asyncio 的 UDP 端点上按固定步长推进模拟核心（波次、敌人 AI、子弹结算都在 Simulation 里），
+# 玩家的移动和开火只由客户端发来的命令驱动。每 NET_SNAPSHOT_INTERVAL 步广播一次快照，
+# 按每个客户端确认过的快照做增量编码；同一步里基准相同的客户端共用一次敌人增量编码
+from core.config import Config
+from core.simulation import Simulation, STATE_PLAYING
+from core.arena import generate_arena
+from core.autopilot import EYE_HEIGHT
+from core.clock import FixedStepClock
+from core.weapon_data import weapons
+from core.profiler import profiler, RingBuffer
+from core.netcode import (PROTOCOL_VERSION, HELLO, INPUT, BYE, WELCOME, REJECT, ROLE_PLAYER, ROLE_SPECTATOR,
+                          BUTTON_FIRE, BUTTON_RELOAD, HELLO_PACKET, WELCOME_PACKET, REJECT_PACKET,
+                          ServerFrame, LossyLink, encode_enemy_delta, encode_snapshot, unpack_input,
+                          move_player, aim_direction)
+from collections import deque
+import numpy as np
+import asyncio
+import random
+import struct
+import time as _time
+
+class ServerWeapon:
+    """服务器上玩家的武器：只有射速、弹匣和换弹，时间按命令推进（与客户端发命令的节奏一致）"""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.reset()
+
+    def reset(self):
+        self.ammo = self.definition.magazine
+        self.cooldown = 0.0
+        self.reload_left = 0.0
+
+    def update(self, sim, cmd, dt):
+        d = self.definition
+        if self.cooldown > 0:
+            self.cooldown -= dt
+        if self.reload_left > 0:
+            self.reload_left -= dt
+            if self.reload_left <= 0:
+                self.ammo = d.magazine
+            return
+        if cmd.buttons & BUTTON_RELOAD and self.ammo < d.magazine:
+            self.reload_left = d.reload_time
+            return
+        if cmd.buttons & BUTTON_FIRE and self.cooldown <= 0 and self.ammo > 0:
+            p = sim.player
+            direction = aim_direction(cmd.yaw, cmd.pitch)
+            origin = tuple(e + v * 1.5 for e, v in zip((p.x, p.y + EYE_HEIGHT, p.z), direction))
+            sim.fire(origin, direction, d.damage, d.headshot_multiplier)
+            self.cooldown = d.fire_interval
+            self.ammo -= 1
+            if self.ammo == 0:
+                self.reload_left = d.reload_time   # 打空自动换弹
+
+
+class ClientSlot:
+    def __init__(self, id, addr, role, now):
+        self.id = id
+        self.addr = addr
+        self.role = role
+        self.connected_at = self.last_seen = now
+        self.acked = 0              # 客户端确认收到的最新快照序号
+        self.last_input_seq = 0     # 已排队的最新命令序号
+        self.processed_seq = 0      # 已执行的最新命令序号（随快照发回，客户端据此校正预测）
+        self.commands = deque()
+        self.bytes_sent = 0
+        self.snapshots = 0
+        self.full_snapshots = 0
+
+
+class MatchServer(asyncio.DatagramProtocol):
+    def __init__(self, seed=None, latency=0.0, jitter=0.0, loss=0.0):
+        self.seed = random.randrange(2**31) if seed is None else seed
+        self.arena_seed = self.seed
+        walls, pickups = generate_arena(random.Random(self.arena_seed))
+        self.sim = Simulation(walls, pickups, seed=self.seed)
+        self.dt = self.sim.dt
+        self.clock = FixedStepClock(self.dt)
+        self.weapon = ServerWeapon(weapons.default)
+        self.link_options = dict(latency=latency, jitter=jitter, loss=loss, seed=self.seed)
+        self.transport = self.link = None
+
+        self.clients = {}           # 地址 -> ClientSlot
+        self._next_client_id = 1
+        self.history = {}           # 快照序号 -> ServerFrame（增量编码的基准）
+        self.snapshot_seq = 0
+        self.ended_for = 0.0        # 对局结束后经过的时间
+        self.running = True
+
+        # 指标
+        self.ticks = 0
+        self.tick_ms_total = 0.0
+        self.tick_ms_max = 0.0
+        self.tick_ms = RingBuffer(Config.NET_TICK_HISTORY)   # 最近的单步耗时，用于求分位数（服务器可能一直运行）
+        self.sections = {}
+        self.bad_packets = 0
+        self.matches = 1
+
+    # ---------- 网络 ----------
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.link = LossyLink(transport, asyncio.get_running_loop(), **self.link_options)
+
+    def datagram_received(self, data, addr):
+        try:
+            kind = data[0]
+            if kind == HELLO:
+                self._on_hello(data, addr)
+            elif kind == INPUT:
+                self._on_input(data, addr)
+            elif kind == BYE:
+                self._drop(addr)
+        except (IndexError, struct.error):
+            self.bad_packets += 1
+
+    def _now(self):
+        return asyncio.get_running_loop().time()
+
+    def _on_hello(self, data, addr):
+        _, version = HELLO_PACKET.unpack_from(data)
+        if version != PROTOCOL_VERSION:
+            self.link.sendto(REJECT_PACKET.pack(REJECT, PROTOCOL_VERSION), addr)
+            return
+        slot = self.clients.get(addr)
+        if slot is None:
+            has_player = any(c.role == ROLE_PLAYER for c in self.clients.values())
+            slot = self.clients[addr] = ClientSlot(self._next_client_id, addr,
+                                                   ROLE_SPECTATOR if has_player else ROLE_PLAYER, self._now())
+            self._next_client_id += 1
+        # 重复的 HELLO（WELCOME 丢包时客户端会重发）也回复
+        self.link.sendto(WELCOME_PACKET.pack(WELCOME, slot.id, slot.role, self.dt, self.seed, self.arena_seed), addr)
+
+    def _on_input(self, data, addr):
+        slot = self.clients.get(addr)
+        if slot is None: return
+        slot.last_seen = self._now()
+        ack, commands = unpack_input(data)
+        if ack > slot.acked:
+            slot.acked = ack
+        if slot.role != ROLE_PLAYER: return
+        # 每个包都重复携带最近几条命令：只收新的，乱序到达的旧命令丢弃
+        for cmd in commands:
+            if cmd.seq > slot.last_input_seq:
+                slot.commands.append(cmd)
+                slot.last_input_seq = cmd.seq
+
+    def _drop(self, addr):
+        slot = self.clients.pop(addr, None)
+        if slot and slot.role == ROLE_PLAYER:
+            # 操控的客户端离开：最早连上的观战者接手
+            spectators = sorted(self.clients.values(), key=lambda c: c.id)
+            if spectators:
+                spectators[0].role = ROLE_PLAYER
+                spectators[0].processed_seq = spectators[0].last_input_seq
+
+    # ---------- 推进 ----------
+
+    @property
+    def player_slot(self):
+        return next((c for c in self.clients.values() if c.role == ROLE_PLAYER), None)
+
+    def tick(self):
+        t0 = _time.perf_counter()
+        now = self._now()
+        for addr in [a for a, c in self.clients.items() if now - c.last_seen > Config.NET_TIMEOUT]:
+            self._drop(addr)
+
+        slot = self.player_slot
+        if slot is None:
+            return   # 没有玩家时暂停
+
+        sim = self.sim
+        p = sim.player
+        for _ in range(min(len(slot.commands), Config.NET_MAX_COMMANDS_PER_TICK)):
+            cmd = slot.commands.popleft()
+            if p.alive and sim.state == STATE_PLAYING:
+                x, z = move_player(p.x, p.z, cmd, self.dt, sim.nav_grid)
+                sim.set_player(x, p.y, z, cmd.yaw)
+                self.weapon.update(sim, cmd, self.dt)
+            slot.processed_seq = cmd.seq
+        sim.step()
+
+        if sim.state != STATE_PLAYING:
+            self.ended_for += self.dt
+            if self.ended_for >= Config.NET_RESTART_DELAY:
+                self.restart()
+        if sim.tick % Config.NET_SNAPSHOT_INTERVAL == 0:
+            self.broadcast()
+
+        ms = (_time.perf_counter() - t0) * 1000
+        self.ticks += 1
+        self.tick_ms_total += ms
+        self.tick_ms_max = max(self.tick_ms_max, ms)
+        self.tick_ms.append(ms)
+        for name, ms in profiler.end_frame().items():
+            self.sections[name] = self.sections.get(name, 0.0) + ms
+
+    def restart(self):
+        """开始下一局（同一张地图，新的模拟种子）；快照序号继续递增，客户端的增量基准仍然有效"""
+        self.seed = random.randrange(2**31)
+        self.sim.reset(seed=self.seed)
+        self.weapon.reset()
+        self.ended_for = 0.0
+        self.matches += 1
+
+    def broadcast(self):
+        self.snapshot_seq += 1
+        frame = ServerFrame(self.snapshot_seq, self.sim, self.weapon.ammo)
+        self.history[frame.seq] = frame
+        self.history.pop(frame.seq - Config.NET_SNAPSHOT_HISTORY, None)
+
+        deltas = {}   # 基准序号 -> 敌人增量编码
+        for slot in self.clients.values():
+            baseline = self.history.get(slot.acked)
+            key = baseline.seq if baseline else 0
+            if key not in deltas:
+                deltas[key] = encode_enemy_delta(frame.enemies, baseline and baseline.enemies)
+            data = encode_snapshot(frame, baseline, slot.processed_seq, deltas[key])
+            self.link.sendto(data, slot.addr)
+            slot.bytes_sent += len(data)
+            slot.snapshots += 1
+            slot.full_snapshots += baseline is None
+
+    async def run(self, duration=None):
+        loop = asyncio.get_running_loop()
+        start = last = loop.time()
+        while self.running and (duration is None or loop.time() - start < duration):
+            now = loop.time()
+            for _ in range(self.clock.advance(now - last)):
+                self.tick()
+            last = now
+            await asyncio.sleep(max(0.0, self.dt - self.clock.accumulator))
+
+    # ---------- 指标 ----------
+
+    def metrics(self):
+        now = self._now()
+        recent = self.tick_ms.values() if self.tick_ms.count else np.zeros(1)
+        n = max(self.ticks, 1)
+        return {
+            'ticks': self.ticks,
+            'matches': self.matches,
+            'tick_ms': {'mean': round(self.tick_ms_total / n, 4), 'p95': round(float(np.percentile(recent, 95)), 4),
+                        'max': round(self.tick_ms_max, 4)},
+            'sections_ms': {k: round(v / n, 4) for k, v in sorted(self.sections.items())},
+            'bad_packets': self.bad_packets,
+            'dropped_by_link': self.link.dropped if self.link else 0,
+            'clients': [{
+                'id': c.id,
+                'role': 'player' if c.role == ROLE_PLAYER else 'spectator',
+                'snapshots': c.snapshots,
+                'full_snapshots': c.full_snapshots,
+                'bytes_per_snapshot': round(c.bytes_sent / max(c.snapshots, 1), 1),
+                'bytes_per_second': round(c.bytes_sent / max(now - c.connected_at, 1e-6), 1),
+            } for c in self.clients.values()],
+        }
\ No newline at end of file
@@ -0,0 +1,269 @@
+# core/netcode.py
+# 联机协议（UDP，小端）：客户端发送输入命令，服务器按固定步长推进模拟核心并广播快照。
+# 快照相对客户端最近确认（ack）的那份快照做增量编码：敌人只发送变化的字段，消失的敌人只发 id，
+# 客户端从没确认过或基准已过期时发送完整快照。玩家移动由双方共用的 move_player() 计算，
+# 客户端先行预测，收到快照后丢掉服务器已处理的命令、从服务器位置重放剩下的命令
+from core.config import Config
+from core.collision import WallSet
+from core.navigation import NavGrid
+from core.arena import generate_arena
+from collections import deque
+import numpy as np
+import struct
+import random
+import math
+
+PROTOCOL_VERSION = 1
+
+# 包类型（第一个字节）
+HELLO, INPUT, BYE = 1, 2, 3
+WELCOME, SNAPSHOT, REJECT = 10, 11, 12
+
+ROLE_PLAYER, ROLE_SPECTATOR = 0, 1     # 模拟核心只有一个玩家：第一个连上的客户端操控，其余观战
+BUTTON_FIRE, BUTTON_RELOAD = 1, 2
+
+HELLO_PACKET = struct.Struct('<BB')              # 类型, 协议版本
+WELCOME_PACKET = struct.Struct('<BBBdqq')        # 类型, 客户端 id, 角色, dt, 模拟种子, 地图种子
+REJECT_PACKET = struct.Struct('<BB')             # 类型, 服务器的协议版本
+BYE_PACKET = struct.Struct('<B')
+INPUT_HEADER = struct.Struct('<BIB')             # 类型, 已收到的最新快照序号, 命令数
+COMMAND = struct.Struct('<IbbhhB')               # 序号, 左右, 前后, yaw*100, pitch*100, 按键
+# 类型, 快照序号, 基准序号（0 为完整快照）, 已处理的最后一条输入序号, 玩家 xyz, 血量, 弹药, 波次, 击杀, 对局状态,
+# 删除的敌人数, 变化的敌人数, 敌人子弹数, 玩家子弹数
+SNAPSHOT_HEADER = struct.Struct('<BIII3dfHHHBHHHH')
+REMOVED = struct.Struct('<H')
+
+STATE_CODES = {'playing': 0, 'victory': 1, 'defeat': 2}
+STATE_NAMES = {v: k for k, v in STATE_CODES.items()}
+
+# 敌人量化字段：x, y, z（1/64 米）, yaw（0.1 度）, hp（0.1）
+POS_SCALE = 64
+ENEMY_FIELDS = ('h', 'h', 'h', 'h', 'H')
+ALL_FIELDS = (1 << len(ENEMY_FIELDS)) - 1
+# 每种字段掩码一个 Struct：id, 掩码, 掩码中置位的字段
+ENEMY_DELTA = [struct.Struct('<HB' + ''.join(f for k, f in enumerate(ENEMY_FIELDS) if mask >> k & 1))
+               for mask in range(ALL_FIELDS + 1)]
+
+def quantize_pos(v):
+    return max(-32767, min(32767, round(v * POS_SCALE)))
+
+def quantize_enemy(e):
+    yaw = (e.yaw + 180) % 360 - 180
+    return (quantize_pos(e.x), quantize_pos(e.y), quantize_pos(e.z),
+            round(yaw * 10), min(65535, round(max(e.hp, 0) * 10)))
+
+def enemy_position(fields):
+    return fields[0] / POS_SCALE, fields[1] / POS_SCALE, fields[2] / POS_SCALE
+
+def quantize_points(positions):
+    """(n,3) 世界坐标 -> 打包好的 int16 字节"""
+    return np.clip(np.round(positions * POS_SCALE), -32767, 32767).astype('<i2').tobytes()
+
+def build_nav_grid(arena_seed):
+    """客户端预测用的导航网格，与服务器 Simulation 中的完全相同"""
+    walls, _ = generate_arena(random.Random(arena_seed))
+    return NavGrid(WallSet(walls).nav_boxes())
+
+
+class Command:
+    """一步的玩家输入；yaw / pitch 在创建时就量化，客户端预测和服务器用的是同一份数值"""
+    __slots__ = ('seq', 'move_x', 'move_z', 'yaw_q', 'pitch_q', 'buttons')
+
+    def __init__(self, seq, move_x, move_z, yaw_q, pitch_q, buttons):
+        self.seq = seq
+        self.move_x, self.move_z = move_x, move_z
+        self.yaw_q, self.pitch_q = yaw_q, pitch_q
+        self.buttons = buttons
+
+    @classmethod
+    def make(cls, seq, move_x, move_z, yaw, pitch, buttons=0):
+        yaw = (yaw + 180) % 360 - 180
+        return cls(seq, int(move_x), int(move_z), max(-18000, min(17999, round(yaw * 100))),
+                   max(-9000, min(9000, round(pitch * 100))), buttons)
+
+    @property
+    def yaw(self):
+        return self.yaw_q / 100
+
+    @property
+    def pitch(self):
+        return self.pitch_q / 100
+
+    def pack(self):
+        return COMMAND.pack(self.seq, self.move_x, self.move_z, self.yaw_q, self.pitch_q, self.buttons)
+
+
+def move_player(x, z, cmd, dt, grid):
+    """按一条命令移动玩家 dt 秒（地面平坦，不模拟跳跃）；撞墙时沿墙滑动"""
+    mx, mz = cmd.move_x, cmd.move_z
+    if not (mx or mz):
+        return x, z
+    r = math.radians(cmd.yaw)
+    fx, fz = math.sin(r), math.cos(r)
+    # 与 Ursina 一致：前方 (sin, cos)，右方 (cos, -sin)
+    dx, dz = fz * mx + fx * mz, -fx * mx + fz * mz
+    step = Config.PLAYER_SPEED * dt / math.hypot(dx, dz)
+    nx, nz = x + dx * step, z + dz * step
+    for cx, cz in ((nx, nz), (nx, z), (x, nz)):
+        if grid.is_free(cx, cz):
+            return cx, cz
+    return x, z
+
+def aim_direction(yaw, pitch):
+    """视线方向；pitch 为正时向下看（与 camera_pivot.rotation_x 相同）"""
+    y, p = math.radians(yaw), math.radians(pitch)
+    return math.sin(y) * math.cos(p), -math.sin(p), math.cos(y) * math.cos(p)
+
+
+def pack_input(ack, commands):
+    return INPUT_HEADER.pack(INPUT, ack, len(commands)) + b''.join(c.pack() for c in commands)
+
+def unpack_input(data):
+    _, ack, count = INPUT_HEADER.unpack_from(data)
+    return ack, [Command(*COMMAND.unpack_from(data, INPUT_HEADER.size + i * COMMAND.size)) for i in range(count)]
+
+
+class ServerFrame:
+    """服务器在某个快照序号时的世界状态（已量化），同时作为之后增量编码的基准"""
+    __slots__ = ('seq', 'player', 'wave', 'kills', 'state', 'enemies', 'projectiles', 'bullets',
+                 'projectile_count', 'bullet_count')
+
+    def __init__(self, seq, sim, ammo):
+        p = sim.player
+        self.seq = seq
+        self.player = (p.x, p.y, p.z, p.hp, ammo)
+        self.wave, self.kills, self.state = sim.wave, sim.kills, STATE_CODES[sim.state]
+        self.enemies = {e.id & 0xFFFF: quantize_enemy(e) for e in sim.enemies}
+        proj = sim.projectiles.positions[sim.projectiles.alive]
+        bullets = sim.bullets.positions[sim.bullets.alive]
+        self.projectile_count, self.bullet_count = len(proj), len(bullets)
+        self.projectiles = quantize_points(proj)
+        self.bullets = quantize_points(bullets)
+
+
+def encode_enemy_delta(current, baseline):
+    """返回 (删除数, 变化数, 字节)：baseline 为 None 时编码全部敌人"""
+    baseline = baseline or {}
+    out = bytearray()
+    removed = [i for i in baseline if i not in current]
+    for i in removed:
+        out += REMOVED.pack(i)
+    changed = 0
+    for i, fields in current.items():
+        old = baseline.get(i)
+        if old == fields: continue
+        if old is None:
+            mask = ALL_FIELDS
+        else:
+            mask = 0
+            for k in range(len(fields)):
+                if fields[k] != old[k]:
+                    mask |= 1 << k
+        out += ENEMY_DELTA[mask].pack(i, mask, *(f for k, f in enumerate(fields) if mask >> k & 1))
+        changed += 1
+    return len(removed), changed, bytes(out)
+
+def encode_snapshot(frame, baseline, last_input_seq, enemy_delta=None):
+    """baseline 为客户端已确认的 ServerFrame（None 时发送完整快照）；enemy_delta 可传入缓存的 encode_enemy_delta 结果"""
+    removed, changed, body = enemy_delta or encode_enemy_delta(frame.enemies, baseline and baseline.enemies)
+    x, y, z, hp, ammo = frame.player
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT, frame.seq, baseline.seq if baseline else 0, last_input_seq,
+                                  x, y, z, hp, ammo, frame.wave, frame.kills, frame.state,
+                                  removed, changed, frame.projectile_count, frame.bullet_count)
+    return header + body + frame.projectiles + frame.bullets
+
+
+class Snapshot:
+    """客户端解码后的快照；enemies 为 id -> 量化字段，子弹位置已换算回世界坐标"""
+
+    def __init__(self, data, baselines):
+        (_, self.seq, self.baseline, self.last_input_seq, x, y, z, self.hp, self.ammo, self.wave, self.kills,
+         state, removed, changed, projectile_count, bullet_count) = SNAPSHOT_HEADER.unpack_from(data)
+        self.player = (x, y, z)
+        self.state = STATE_NAMES[state]
+        if self.baseline:
+            base = baselines.get(self.baseline)
+            if base is None:
+                raise KeyError(self.baseline)   # 基准已被丢弃：等服务器发完整快照
+            self.enemies = dict(base.enemies)
+        else:
+            self.enemies = {}
+
+        offset = SNAPSHOT_HEADER.size
+        for _ in range(removed):
+            self.enemies.pop(REMOVED.unpack_from(data, offset)[0], None)
+            offset += REMOVED.size
+        for _ in range(changed):
+            i, mask = ENEMY_DELTA[0].unpack_from(data, offset)
+            values = ENEMY_DELTA[mask].unpack_from(data, offset)[2:]
+            offset += ENEMY_DELTA[mask].size
+            if mask == ALL_FIELDS:
+                self.enemies[i] = values
+            else:
+                fields = list(self.enemies.get(i, (0,) * len(ENEMY_FIELDS)))
+                it = iter(values)
+                for k in range(len(fields)):
+                    if mask >> k & 1:
+                        fields[k] = next(it)
+                self.enemies[i] = tuple(fields)
+        points = np.frombuffer(data, dtype='<i2', count=(projectile_count + bullet_count) * 3,
+                               offset=offset).reshape(-1, 3).astype(np.float32) / POS_SCALE
+        self.projectiles = points[:projectile_count]
+        self.bullets = points[projectile_count:]
+
+
+class PlayerPredictor:
+    """客户端预测：本地立即执行输入，收到快照后以服务器位置为起点重放服务器还没处理的命令"""
+
+    def __init__(self, grid, dt):
+        self.grid = grid
+        self.dt = dt
+        self.x = self.y = self.z = 0.0
+        self.pending = deque()
+        self.corrections = []   # 每次校正时预测位置被修正的距离
+
+    def apply(self, cmd):
+        self.pending.append(cmd)
+        self.x, self.z = move_player(self.x, self.z, cmd, self.dt, self.grid)
+
+    def reconcile(self, position, last_input_seq, alive=True):
+        while self.pending and self.pending[0].seq <= last_input_seq:
+            self.pending.popleft()
+        x, y, z = position
+        if alive:
+            for cmd in self.pending:
+                x, z = move_player(x, z, cmd, self.dt, self.grid)
+        else:
+            self.pending.clear()   # 服务器不再处理已死亡玩家的移动
+        self.corrections.append(math.hypot(x - self.x, z - self.z))
+        self.x, self.y, self.z = x, y, z
+
+
+class LossyLink:
+    """
+    包装 asyncio 的 DatagramTransport：统计发送的包数和字节数；
+    回环测试时按丢包率丢弃、按 延迟 ± 抖动 推迟发送（可能乱序），模拟真实网络
+    """
+
+    def __init__(self, transport, loop, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.transport = transport
+        self.loop = loop
+        self.latency, self.jitter, self.loss = latency, jitter, loss
+        self.rng = random.Random(seed)
+        self.packets = self.bytes = self.dropped = 0
+
+    def sendto(self, data, addr=None):
+        self.packets += 1
+        self.bytes += len(data)
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            self.loop.call_later(delay, self._send, data, addr)
+        else:
+            self._send(data, addr)
+
+    def _send(self, data, addr):
+        if not self.transport.is_closing():
+            self.transport.sendto(data, addr)
\ No newline at end of file
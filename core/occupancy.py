@@ -0,0 +1,60 @@
+# core/occupancy.py
+# 生成点占用网格：静态部分复用导航网格的阻挡格（关卡加载时栅格化一次），动态部分每波按敌人 / 道具 / 玩家重新标记
+import numpy as np
+import random
+import math
+
+class OccupancyGrid:
+    def __init__(self, nav_grid):
+        self.grid = nav_grid
+        self.free_cells = np.flatnonzero(~nav_grid.blocked)
+        self.occupied = np.array(nav_grid.blocked, dtype=bool)   # 墙体 + 动态占用
+
+    def clear_dynamic(self):
+        self.occupied[:] = self.grid.blocked
+
+    def cells_in_rect(self, cx, cz, half):
+        """以 (cx, cz) 为中心、半边长 half 的正方形内不被墙阻挡的格子"""
+        g = self.grid
+        xs, zs = self.free_cells % g.width, self.free_cells // g.width
+        x0, x1 = (cx - half - g.origin) / g.cell_size, (cx + half - g.origin) / g.cell_size
+        z0, z1 = (cz - half - g.origin) / g.cell_size, (cz + half - g.origin) / g.cell_size
+        inside = (xs + 0.5 >= x0) & (xs + 0.5 <= x1) & (zs + 0.5 >= z0) & (zs + 0.5 <= z1)
+        return self.free_cells[inside]
+
+    def mark(self, x, z, radius):
+        """把中心距 (x, z) 小于 radius 的格子标记为占用"""
+        g = self.grid
+        cs = g.cell_size
+        gx0 = max(int(math.floor((x - radius - g.origin) / cs)), 0)
+        gx1 = min(int(math.floor((x + radius - g.origin) / cs)), g.width - 1)
+        gz0 = max(int(math.floor((z - radius - g.origin) / cs)), 0)
+        gz1 = min(int(math.floor((z + radius - g.origin) / cs)), g.height - 1)
+        if gx0 > gx1 or gz0 > gz1: return
+
+        gx, gz = np.meshgrid(np.arange(gx0, gx1 + 1), np.arange(gz0, gz1 + 1))
+        dx = g.origin + (gx + 0.5) * cs - x
+        dz = g.origin + (gz + 0.5) * cs - z
+        near = dx * dx + dz * dz < radius * radius
+        self.occupied[(gz[near] * g.width + gx[near])] = True
+
+    def sample(self, count, min_separation, cells=None, rng=random):
+        """
+        从 cells（默认为全部空闲格子）中随机取最多 count 个格子中心，相互间距不小于 min_separation。
+        rng 为随机数源（random 模块或 random.Random 实例），传入带种子的实例可复现结果。
+        取出的点立即标记为占用。每个候选格子最多检查一次（部分 Fisher-Yates 洗牌），耗时与实际检查的格子数成正比。
+        """
+        pool = np.array(self.free_cells if cells is None else cells)
+        remaining = len(pool)
+        points = []
+        while len(points) < count and remaining > 0:
+            k = rng.randrange(remaining)
+            cell = pool[k]
+            remaining -= 1
+            pool[k] = pool[remaining]
+            if self.occupied[cell]: continue
+
+            x, z = self.grid.cell_center(cell)
+            self.mark(x, z, min_separation)
+            points.append((x, z))
+        return points
\ No newline at end of file
@@ -0,0 +1,72 @@
+# core/pool.py
+# 通用实体对象池：按类保存空闲实例，回收复用而不是反复创建 / 销毁场景节点
+from ursina import destroy
+
+class EntityPool:
+    """
+    可池化的类需要满足：
+      - __init__ 的所有参数都有默认值（用于预分配）
+      - 提供 reset(**kwargs) 方法，参数与 __init__ 一致，负责恢复全部可变状态
+    """
+
+    def __init__(self):
+        self.free = {}     # cls -> [实例]
+        self.stats = {}    # cls -> {'hits', 'misses', 'in_use', 'high_water'}
+
+    def _stat(self, cls):
+        s = self.stats.get(cls)
+        if s is None:
+            s = self.stats[cls] = {'hits': 0, 'misses': 0, 'in_use': 0, 'high_water': 0}
+        return s
+
+    def preallocate(self, cls, count):
+        """预先创建实例放进空闲列表（已有的数量计入在内）"""
+        free = self.free.setdefault(cls, [])
+        while len(free) < count:
+            obj = cls()
+            obj._pool_in_use = False
+            obj.enabled = False
+            free.append(obj)
+
+    def acquire(self, cls, **kwargs):
+        s = self._stat(cls)
+        free = self.free.setdefault(cls, [])
+        if free:
+            obj = free.pop()
+            obj.enabled = True
+            obj.reset(**kwargs)
+            s['hits'] += 1
+        else:
+            obj = cls(**kwargs)
+            s['misses'] += 1
+
+        obj._pool_in_use = True
+        s['in_use'] += 1
+        s['high_water'] = max(s['high_water'], s['in_use'])
+        return obj
+
+    def release(self, obj):
+        """回收实例；重复回收同一个对象是安全的"""
+        if not obj or not getattr(obj, '_pool_in_use', False): return
+        obj._pool_in_use = False
+        obj.enabled = False
+        self._stat(type(obj))['in_use'] -= 1
+        self.free.setdefault(type(obj), []).append(obj)
+
+    def report(self):
+        """返回 {类名: 统计} 的快照，附带命中率和空闲数量"""
+        result = {}
+        for cls, s in self.stats.items():
+            total = s['hits'] + s['misses']
+            result[cls.__name__] = dict(s, free=len(self.free.get(cls, ())),
+                                        hit_rate=s['hits'] / total if total else 1.0)
+        return result
+
+    def clear(self):
+        """销毁所有空闲实例（使用中的实例在回收时重新进入空闲列表）"""
+        for free in self.free.values():
+            for obj in free:
+                destroy(obj)
+        self.free.clear()
+
+entity_pool = EntityPool()
@@ -0,0 +1,138 @@
+# core/profiler.py
+# 按子系统统计每帧耗时：with profiler.section('name') 计时一段代码，end_frame() 结束一帧并取出本帧结果。
+# 不依赖 Ursina，模拟核心也可以直接打点；关闭时每个打点只多一次属性判断
+# FrameHistory 把每帧结果写入定长环形缓冲，供性能面板（ui/hud.py）画图和导出 CSV
+import numpy as np
+import time as _time
+import csv
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.start = _time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler.enabled:
+            self.profiler.add(self.name, (_time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self):
+        self.enabled = True
+        self.current = {}      # 本帧：子系统 -> 毫秒（同一帧内多次进入会累加）
+        self._sections = {}
+
+    def section(self, name):
+        s = self._sections.get(name)
+        if s is None:
+            s = self._sections[name] = _Section(self, name)
+        return s
+
+    def add(self, name, ms):
+        self.current[name] = self.current.get(name, 0.0) + ms
+
+    def end_frame(self):
+        """返回本帧的 {子系统: 毫秒} 并清空"""
+        frame, self.current = self.current, {}
+        return frame
+
+
+class RingBuffer:
+    """定长环形缓冲，写满后覆盖最旧的样本"""
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.index = 0      # 下一次写入的位置
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def values(self):
+        """按时间顺序（旧 -> 新）返回全部有效样本"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return np.concatenate((self.data[self.index:], self.data[:self.index]))
+
+    def last(self, n):
+        return self.values()[-n:]
+
+
+class FrameHistory:
+    """每个通道一个环形缓冲：'frame' 为整帧耗时，其余为各子系统耗时；所有通道按帧对齐"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.frame_index = RingBuffer(capacity)   # 帧序号，导出 CSV 时用
+        self.channels = {'frame': RingBuffer(capacity)}
+        self.frames = 0
+
+    def record(self, frame_ms, sections):
+        for name in sections:
+            if name not in self.channels:
+                # 中途出现的通道补零，保证与其他通道对齐
+                buf = self.channels[name] = RingBuffer(self.capacity)
+                for i in range(self.frame_index.count):
+                    buf.append(0.0)
+        self.frame_index.append(self.frames)
+        self.channels['frame'].append(frame_ms)
+        for name, buf in self.channels.items():
+            if name != 'frame':
+                buf.append(sections.get(name, 0.0))
+        self.frames += 1
+
+    def write_csv(self, path):
+        names = sorted(self.channels, key=lambda n: (n != 'frame', n))
+        columns = [self.frame_index.values()] + [self.channels[n].values() for n in names]
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame_index'] + [n + '_ms' for n in names])
+            for row in zip(*columns):
+                writer.writerow([int(row[0])] + [f'{v:.3f}' for v in row[1:]])
+        return path
+
+
+def install_render_timer(app, profiler):
+    """
+    在 Panda3D 的渲染任务（igLoop，sort=50）前后各挂一个任务，把渲染耗时记为 'render'。
+    app 为 Ursina / ShowBase 实例。
+    """
+    state = {'start': 0.0}
+
+    def before(task):
+        state['start'] = _time.perf_counter()
+        return task.cont
+
+    def after(task):
+        if profiler.enabled:
+            profiler.add('render', (_time.perf_counter() - state['start']) * 1000)
+        return task.cont
+
+    app.taskMgr.add(before, 'profiler_render_begin', sort=49)
+    app.taskMgr.add(after, 'profiler_render_end', sort=51)
+
+
+def install_frame_recorder(app, profiler, history):
+    """在每帧最后（渲染之后）结束本帧，把整帧耗时和各子系统耗时写入 history"""
+    state = {'last': _time.perf_counter()}
+
+    def record(task):
+        now = _time.perf_counter()
+        history.record((now - state['last']) * 1000, profiler.end_frame())
+        state['last'] = now
+        return task.cont
+
+    app.taskMgr.add(record, 'profiler_frame_end', sort=52)
+
+
+profiler = FrameProfiler()
\ No newline at end of file
@@ -0,0 +1,271 @@
+# core/replay.py
+# 对局录像：记录地图 / 模拟种子、每步的玩家输入和模拟状态（玩家、敌人、子弹、血量、波次），写成定长记录的二进制文件。
+# 模拟核心是确定性的，回放只需要把录下的输入重新喂给同种子的 Simulation；录下的状态用来逐步校验回放没有分叉。
+# 录制时编码在模拟线程完成，写盘交给后台线程；回放通过 mmap 读取，按步号随机访问不需要把整个文件读进内存
+#
+# 文件布局（小端）：
+#   文件头 HEADER + pickup_count 个 PICKUP（血包位置）
+#   每步：TICK + fire_count 个 FIRE + enemy_count 个 ENEMY + (projectile_count + bullet_count) 个 float32[3] 子弹位置
+#   结尾：每步记录起始偏移的 uint64 数组 + TRAILER；没有结尾（录制中途崩溃）时打开文件会顺序扫描重建索引
+from core.config import Config
+from core.simulation import Simulation, STATE_PLAYING, STATE_VICTORY, STATE_DEFEAT
+from core.arena import generate_arena
+from array import array
+import numpy as np
+import threading
+import random
+import struct
+import queue
+import math
+import mmap
+
+MAGIC = b'RPLY'
+INDEX_MAGIC = b'RIDX'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHdqqI')      # magic, 版本, 保留, dt, 模拟种子, 地图种子, 血包数
+PICKUP = struct.Struct('<3d')
+# 步号, 玩家输入 x/y/z/yaw（yaw 未知为 NaN）, 开火数, 玩家血量, 波次, 击杀数, 对局状态, 敌人数, 敌人子弹数, 玩家子弹数
+TICK = struct.Struct('<I4dHfHHBHHH')
+FIRE = struct.Struct('<8d')              # 枪口 xyz, 方向 xyz, 伤害, 爆头倍率
+ENEMY = struct.Struct('<I6f')            # id, x, y, z, yaw, hp, 开火冷却
+TRAILER = struct.Struct('<QI4s')         # 索引偏移, 步数, INDEX_MAGIC
+POINT = 12                               # 一颗子弹的位置：3 个 float32
+
+STATE_CODES = {STATE_PLAYING: 0, STATE_VICTORY: 1, STATE_DEFEAT: 2}
+STATE_NAMES = {v: k for k, v in STATE_CODES.items()}
+
+
+class ReplayDivergence(Exception):
+    """回放的模拟状态与录像不一致"""
+
+
+def encode_state(sim, px, py, pz, yaw, fires):
+    """把一步的输入和该步结束时的状态编码成字节串（录制和回放校验共用，保证逐字节可比）"""
+    p = sim.player
+    enemies = sim.enemies
+    proj = sim.projectiles.positions[sim.projectiles.alive]
+    bullets = sim.bullets.positions[sim.bullets.alive]
+    out = bytearray(TICK.size + FIRE.size * len(fires) + ENEMY.size * len(enemies)
+                    + POINT * (len(proj) + len(bullets)))
+    TICK.pack_into(out, 0, sim.tick, px, py, pz, yaw, len(fires), p.hp, sim.wave, sim.kills,
+                   STATE_CODES[sim.state], len(enemies), len(proj), len(bullets))
+    offset = TICK.size
+    for f in fires:
+        FIRE.pack_into(out, offset, *f)
+        offset += FIRE.size
+    for e in enemies:
+        ENEMY.pack_into(out, offset, e.id, e.x, e.y, e.z, e.yaw, e.hp, e.cooldown)
+        offset += ENEMY.size
+    out[offset:] = proj.astype('<f4').tobytes() + bullets.astype('<f4').tobytes()
+    return out
+
+
+class ReplayRecorder:
+    """
+    挂到 Simulation.recorder 上录制：step() 开始时调用 begin_tick() 取输入，结束时调用 end_tick() 编码状态。
+    每 flush_ticks 步把编码好的字节交给后台线程写盘；close() 写入步索引并等待线程结束。
+    """
+
+    def __init__(self, path, sim, arena_seed, flush_ticks=Config.REPLAY_FLUSH_TICKS):
+        if sim.seed is None:
+            raise ValueError('录像需要固定的模拟种子')
+        self.path = path
+        self.flush_ticks = flush_ticks
+        self.ticks = 0
+        self.offsets = array('Q')
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._input = None
+        self._queue = queue.Queue()
+        self._error = None
+
+        header = bytearray(HEADER.pack(MAGIC, VERSION, 0, sim.dt, sim.seed, arena_seed, len(sim.pickups)))
+        for k in sim.pickups:
+            header += PICKUP.pack(k.x, k.y, k.z)
+        self._offset = len(header)
+        self._file = open(path, 'wb')
+        self._queue.put(bytes(header))
+        self._thread = threading.Thread(target=self._write_loop, name='replay-writer', daemon=True)
+        self._thread.start()
+        sim.recorder = self
+        self.sim = sim
+
+    def _write_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None: break
+            if self._error: continue
+            try:
+                self._file.write(chunk)
+            except OSError as e:
+                self._error = e   # 磁盘写满等：丢弃后续数据，不影响游戏
+        self._file.close()
+
+    def begin_tick(self, sim):
+        """step() 开始、消耗开火队列之前调用：记下本步的玩家输入"""
+        p = sim.player
+        yaw = math.nan if p.yaw is None else p.yaw
+        self._input = (p.x, p.y, p.z, yaw,
+                       [(*origin, *direction, damage, multiplier)
+                        for origin, direction, damage, multiplier in sim._fire_queue])
+
+    def end_tick(self, sim):
+        record = encode_state(sim, *self._input)
+        self.offsets.append(self._offset)
+        self._offset += len(record)
+        self._buffer += record
+        self.ticks += 1
+        self._buffered += 1
+        if self._buffered >= self.flush_ticks:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+        self._buffered = 0
+
+    def close(self):
+        """写入索引和结尾并等待后台线程写完；可重复调用"""
+        if self._thread is None: return
+        if self.sim.recorder is self:
+            self.sim.recorder = None
+        self.flush()
+        self._queue.put(self.offsets.tobytes() + TRAILER.pack(self._offset, self.ticks, INDEX_MAGIC))
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._error:
+            print(f'录像写入失败: {self.path} ({self._error})')
+
+
+class ReplayFrame:
+    """一步的录像内容（从 mmap 中解析，子弹位置为只读视图）"""
+
+    def __init__(self, buf, offset):
+        (self.tick, self.x, self.y, self.z, yaw, fire_count, self.hp, self.wave, self.kills,
+         state, enemy_count, projectile_count, bullet_count) = TICK.unpack_from(buf, offset)
+        self.yaw = None if math.isnan(yaw) else yaw
+        self.state = STATE_NAMES[state]
+        offset += TICK.size
+        self.fires = [FIRE.unpack_from(buf, offset + i * FIRE.size) for i in range(fire_count)]
+        offset += FIRE.size * fire_count
+        self.enemies = [ENEMY.unpack_from(buf, offset + i * ENEMY.size) for i in range(enemy_count)]
+        offset += ENEMY.size * enemy_count
+        points = np.frombuffer(buf, dtype='<f4', count=(projectile_count + bullet_count) * 3,
+                               offset=offset).reshape(-1, 3)
+        self.projectiles = points[:projectile_count]
+        self.bullets = points[projectile_count:]
+        self.end = offset + POINT * (projectile_count + bullet_count)
+
+
+class ReplayFile:
+    """以 mmap 方式打开的录像；frame(i) 按步随机访问"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.dt, self.seed, self.arena_seed, pickup_count = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'不是录像文件或版本不支持: {path}')
+        self.pickups = [PICKUP.unpack_from(self.buf, HEADER.size + i * PICKUP.size) for i in range(pickup_count)]
+        self.data_start = HEADER.size + PICKUP.size * pickup_count
+        self.offsets = self._read_index()
+
+    def _read_index(self):
+        buf = self.buf
+        if len(buf) >= self.data_start + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(buf, len(buf) - TRAILER.size)
+            if magic == INDEX_MAGIC and index_offset + count * 8 + TRAILER.size == len(buf):
+                return np.frombuffer(buf, dtype='<u8', count=count, offset=index_offset)
+        # 没有索引（录制时崩溃）：顺序扫描，丢弃末尾不完整的一步
+        offsets, offset = [], self.data_start
+        while offset + TICK.size <= len(buf):
+            try:
+                end = ReplayFrame(buf, offset).end
+            except (ValueError, struct.error, KeyError):
+                break
+            if end > len(buf): break
+            offsets.append(offset)
+            offset = end
+        return np.array(offsets, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def frame(self, i):
+        return ReplayFrame(self.buf, int(self.offsets[i]))
+
+    def record_bytes(self, i):
+        start = int(self.offsets[i])
+        end = int(self.offsets[i + 1]) if i + 1 < len(self.offsets) else ReplayFrame(self.buf, start).end
+        return self.buf[start:end]
+
+    def first_tick_of_wave(self, wave):
+        """第一个波次 >= wave 的步下标（二分查找，波次单调不减）；没有则返回 None"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if TICK.unpack_from(self.buf, int(self.offsets[mid]))[7] < wave:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) else None
+
+    def close(self):
+        self.offsets = None
+        self.buf.close()
+        self._file.close()
+
+
+class ReplayPlayer:
+    """把录下的输入重新喂给同种子的 Simulation；verify 时每步结束把状态重新编码，与录像逐字节比较"""
+
+    def __init__(self, replay):
+        self.replay = replay
+        walls, _ = generate_arena(random.Random(replay.arena_seed))
+        self.sim = Simulation(walls, replay.pickups, seed=replay.seed, dt=replay.dt)
+        self.index = 0   # 下一步要回放的下标
+
+    def step(self, verify=True):
+        """回放一步，返回该步产生的事件"""
+        frame = self.replay.frame(self.index)
+        sim = self.sim
+        sim.set_player(frame.x, frame.y, frame.z, frame.yaw)
+        for f in frame.fires:
+            sim.fire(f[0:3], f[3:6], f[6], f[7])
+        events = sim.step()
+        if verify:
+            expected = self.replay.record_bytes(self.index)
+            yaw = math.nan if frame.yaw is None else frame.yaw
+            if encode_state(sim, frame.x, frame.y, frame.z, yaw, frame.fires) != expected:
+                raise ReplayDivergence(f'第 {frame.tick} 步与录像不一致 '
+                                       f'(录像: 波次 {frame.wave} 击杀 {frame.kills} 敌人 {len(frame.enemies)}; '
+                                       f'回放: 波次 {sim.wave} 击杀 {sim.kills} 敌人 {len(sim.enemies)})')
+        self.index += 1
+        return events
+
+    def seek(self, index, verify=False):
+        """快进到第 index 步之前（模拟只能从头推进）"""
+        while self.index < min(index, len(self.replay)):
+            self.step(verify)
+
+    def run(self, verify=True, on_step=None):
+        while self.index < len(self.replay):
+            events = self.step(verify)
+            if on_step:
+                on_step(self, events)
+        return self.sim.summary()
+
+
+def record_match(path, seed, controller, max_time=Config.SIM_MAX_MATCH_TIME):
+    """无窗口录制一局（地图和模拟用同一个种子），返回对局结果"""
+    walls, pickups = generate_arena(random.Random(seed))
+    sim = Simulation(walls, pickups, seed=seed)
+    recorder = ReplayRecorder(path, sim, arena_seed=seed)
+    try:
+        return sim.run(controller, max_time)
+    finally:
+        recorder.close()
\ No newline at end of file
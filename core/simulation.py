@@ -0,0 +1,499 @@
+# core/simulation.py
+# 无窗口的模拟核心：波次、敌人 AI、子弹、伤害和血包都在这里以固定步长推进，不依赖 Ursina。
+# 随机数全部来自带种子的 random.Random，同样的种子 + 同样的玩家输入得到同样的结果。
+# 游戏中的 Enemy / HealthPack / 子弹渲染只是它的视图：每步结束后读取 events 同步表现。
+from core.config import Config
+from core.collision import HitboxSet, WallSet
+from core.spatial_hash import SpatialHash
+from core.ai_scheduler import AIScheduler
+from core.navigation import NavGrid, FlowField
+from core.occupancy import OccupancyGrid
+from core.visibility import VisibilityService
+from core.profiler import profiler
+import numpy as np
+import random
+import math
+
+# step() 产生的事件（元组，第一项为类型）：
+#   ('wave_started', wave, count)            ('enemy_spawned', enemy)
+#   ('enemy_shot', enemy, muzzle, forward)   ('enemy_hit', enemy, hit_pos, normal, is_headshot, damage)
+#   ('enemy_killed', enemy)                  ('bullet_wall', hit_pos, normal)
+#   ('player_hit', damage)                   ('player_healed', amount)
+#   ('pickup_taken', pickup, amount)         ('victory',)    ('defeat',)
+
+STATE_PLAYING, STATE_VICTORY, STATE_DEFEAT = 'playing', 'victory', 'defeat'
+
+SPAWN_AREAS = [(-15, -15), (15, 15), (-15, 15), (15, -15)]
+
+# 敌人局部坐标中的枪口位置（右, 上, 前），用于开火火焰
+MUZZLE_OFFSET = (0.4, 1.44, 0.4)
+
+class PlayerState:
+    """玩家在模拟中的状态；位置和朝向由输入（视图或 AutoPilot）每步写入"""
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, hp=Config.PLAYER_HP):
+        self.x, self.y, self.z = x, y, z
+        self.yaw = None   # 水平朝向（度），None 表示未知（AI 不做视野判断）
+        self.hp = hp
+        self.max_hp = hp
+
+    @property
+    def alive(self):
+        return self.hp > 0
+
+
+class EnemyState:
+    __slots__ = ('id', 'x', 'y', 'z', 'yaw', 'hp', 'max_hp', 'cooldown', 'vx', 'vz')
+
+    def __init__(self, id, x, z, hp):
+        self.id = id
+        self.x, self.y, self.z = x, 0.0, z
+        self.yaw = 0.0            # 与 Ursina 的 rotation_y 一致：前方为 (sin, 0, cos)
+        self.hp = self.max_hp = hp
+        self.cooldown = 2.0
+        self.vx = self.vz = 0.0   # 上次思考得到的速度，每步按它移动
+
+    @property
+    def forward(self):
+        r = math.radians(self.yaw)
+        return math.sin(r), 0.0, math.cos(r)
+
+
+class PickupState:
+    __slots__ = ('id', 'x', 'y', 'z', 'heal_amount', 'taken')
+
+    def __init__(self, id, x, y, z, heal_amount=Config.HEALTH_PACK_HEAL):
+        self.id = id
+        self.x, self.y, self.z = x, y, z
+        self.heal_amount = heal_amount
+        self.taken = False
+
+
+class ProjectileSet:
+    """结构数组 (SoA) 形式的子弹：存活标记、位置、速度、剩余寿命、伤害（身体 / 爆头）"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.float32)
+        self.damage = np.zeros((capacity, 2), dtype=np.float32)
+
+    @property
+    def count(self):
+        return int(np.count_nonzero(self.alive))
+
+    def spawn(self, position, velocity, lifetime, damage=0, headshot_damage=0):
+        """追加一颗子弹，返回槽位；容量已满时放弃并返回 -1"""
+        free = np.flatnonzero(~self.alive)
+        if len(free) == 0: return -1
+        i = free[0]
+        self.alive[i] = True
+        self.positions[i] = position
+        self.velocities[i] = velocity
+        self.lifetimes[i] = lifetime
+        self.damage[i] = (damage, headshot_damage)
+        return int(i)
+
+    def spawn_many(self, positions, velocities, lifetime, damage=0, headshot_damage=0):
+        """一次追加多颗子弹，放不下的部分丢弃；返回实际生成的数量"""
+        free = np.flatnonzero(~self.alive)[:len(positions)]
+        n = len(free)
+        self.alive[free] = True
+        self.positions[free] = positions[:n]
+        self.velocities[free] = velocities[:n]
+        self.lifetimes[free] = lifetime
+        self.damage[free] = (damage, headshot_damage)
+        return n
+
+    def kill_all(self):
+        self.alive[:] = False
+
+
+class Simulation:
+    enemy_damage = Config.ENEMY_DMG   # 每颗敌人子弹对玩家的伤害
+    enemy_objects = True              # 敌人是否为 EnemyState 对象；False 时子类自己存储敌人，不创建下面的逐敌人结构
+
+    def __init__(self, walls=(), pickups=(), seed=None, dt=Config.SIM_DT):
+        self.dt = dt
+
+        # 静态世界：墙体 BVH、导航网格 / 流场、生成点占用网格
+        self.walls = walls if isinstance(walls, WallSet) else WallSet(walls)
+        self.nav_grid = NavGrid(self.walls.nav_boxes())
+        self.flow_field = FlowField(self.nav_grid)
+        self.occupancy = OccupancyGrid(self.nav_grid)
+        self.spawn_cells = np.concatenate([self.occupancy.cells_in_rect(x, z, Config.SPAWN_AREA_HALF)
+                                           for x, z in SPAWN_AREAS])
+
+        self.player = PlayerState()
+        if self.enemy_objects:
+            # 逐敌人的宽相位网格、受击盒、AI 调度和视线缓存
+            self.enemy_grid = SpatialHash(cell_size=Config.SPATIAL_CELL_SIZE)
+            self.hitboxes = HitboxSet()
+            self.ai = AIScheduler(self.player, self._think, view_forward=self._view_forward)
+            self.visibility = VisibilityService(self.walls, self.nav_grid)
+
+        self.projectiles = ProjectileSet(Config.ENEMY_PROJECTILE_CAPACITY)   # 敌人子弹
+        self.bullets = ProjectileSet(Config.PLAYER_BULLET_CAPACITY)          # 玩家子弹
+        self.pickups = []
+        self.recorder = None   # core/replay.py 的 ReplayRecorder，录制时每步记录输入和状态
+        self.reset(pickups, seed)
+
+    def reset(self, pickups=None, seed=None):
+        """回到开局状态，静态世界（墙体 BVH、导航网格）保留；pickups 为 None 时沿用当前的血包位置"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.time = 0.0
+
+        p = self.player
+        p.x = p.y = p.z = 0.0
+        p.yaw = None
+        p.hp = p.max_hp
+
+        self.enemies = []
+        self._next_enemy_id = 0
+        if self.enemy_objects:
+            self.enemy_grid.clear()
+            self.hitboxes.clear()
+            self.ai.clear()
+            self.visibility.clear()
+        self.flow_field.reset()
+
+        self.projectiles.kill_all()
+        self.bullets.kill_all()
+        self._fire_queue = []
+
+        if pickups is None:
+            pickups = [(k.x, k.y, k.z) for k in self.pickups]
+        self.pickups = [PickupState(i, *p) for i, p in enumerate(pickups)]
+
+        self.wave = 1
+        self.wave_active = False
+        self.time_to_next_wave = 3
+        self.state = STATE_PLAYING
+        self.kills = 0
+        self.events = []
+
+    # ---------- 输入 ----------
+
+    def set_player(self, x, y, z, yaw=None):
+        p = self.player
+        p.x, p.y, p.z = x, y, z
+        p.yaw = yaw
+
+    def fire(self, origin, direction, damage=Config.DMG, headshot_multiplier=2):
+        """玩家开火；子弹在下一步开始时生成，伤害由武器定义决定"""
+        self._fire_queue.append((tuple(origin), tuple(direction), damage, headshot_multiplier))
+
+    # ---------- 推进 ----------
+
+    def step(self):
+        """推进一个固定步长，返回上次 step() 之后产生的全部事件（包括两步之间由外部调用产生的）"""
+        if self.state != STATE_PLAYING:
+            return self._drain_events()
+
+        dt = self.dt
+        self.tick += 1
+        self.time += dt
+        if self.recorder:
+            self.recorder.begin_tick(self)
+
+        for origin, direction, damage, headshot_multiplier in self._fire_queue:
+            velocity = np.array(direction, dtype=np.float32) * Config.PLAYER_BULLET_SPEED
+            self.bullets.spawn(origin, velocity, Config.PLAYER_BULLET_LIFETIME, damage, damage * headshot_multiplier)
+        self._fire_queue.clear()
+
+        if self.player.y < Config.KILL_Y:
+            self.damage_player(self.player.hp)
+
+        with profiler.section('sim.nav'):
+            self.flow_field.update_target(self.player.x, self.player.z)
+            self.flow_field.process(max_slices=Config.NAV_SLICES_PER_TICK)
+        self._step_enemies(dt)
+        with profiler.section('sim.bullets'):
+            self._step_bullets(dt)
+            self._step_projectiles(dt)
+        self._step_pickups()
+        self._step_waves(dt)
+        if self.recorder:
+            self.recorder.end_tick(self)
+        return self._drain_events()
+
+    def _drain_events(self):
+        events, self.events = self.events, []
+        return events
+
+    def run(self, controller=None, max_time=Config.SIM_MAX_MATCH_TIME):
+        """一直推进到胜负已分或模拟时间到达 max_time；controller(sim) 在每步之前写入玩家输入"""
+        while self.state == STATE_PLAYING and self.time < max_time:
+            if controller:
+                controller(self)
+            self.step()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'seed': self.seed, 'state': self.state, 'wave': self.wave, 'kills': self.kills,
+            'ticks': self.tick, 'time': round(self.time, 3), 'player_hp': self.player.hp,
+        }
+
+    # ---------- 敌人 ----------
+
+    @property
+    def enemy_count(self):
+        return len(self.enemies)
+
+    def nearest_enemy(self, x, z):
+        """离 (x, z) 最近的敌人（提供 x, y, z），没有敌人时返回 None"""
+        return min(self.enemies, key=lambda e: (e.x - x) ** 2 + (e.z - z) ** 2, default=None)
+
+    def _enemy_origin(self, e):
+        return e.x, e.y, e.z
+
+    def _step_enemies(self, dt):
+        with profiler.section('sim.los'):
+            self.visibility.update(self.enemies, self.player)
+        with profiler.section('sim.ai'):
+            self.ai.update(dt)
+            self._move_enemies(dt)
+
+    def _view_forward(self):
+        if self.player.yaw is None: return None
+        r = math.radians(self.player.yaw)
+        return math.sin(r), math.cos(r)
+
+    def _think(self, e, dt):
+        """完整 AI 逻辑；dt 为距离上次思考经过的时间（远处敌人会降频调用）"""
+        e.vx = e.vz = 0.0
+        p = self.player
+        if not p.alive: return
+
+        dx, dz = p.x - e.x, p.z - e.z
+        dist = math.hypot(dx, dz)
+        e.yaw = math.degrees(math.atan2(dx, dz))
+
+        # 沿流场绕开墙体接近玩家；已在玩家所在格子（或无路可走）时直接朝玩家走。
+        # 看不到玩家时即使距离很近也继续绕行，而不是停在墙后
+        visible = self.visibility.visible(e)
+        if dist > 8 or not visible:
+            direction = self.flow_field.direction(e.x, e.z)
+            if direction is None:
+                fx, _, fz = e.forward
+                direction = fx, fz
+            e.vx, e.vz = direction[0] * Config.ENEMY_SPEED, direction[1] * Config.ENEMY_SPEED
+
+        e.cooldown -= dt
+        if e.cooldown <= 0 and dist < Config.ENEMY_ATTACK_RANGE and visible:
+            self._enemy_shoot(e)
+
+    def _enemy_shoot(self, e):
+        rng = self.rng
+        e.cooldown = Config.ENEMY_FIRE_RATE + rng.uniform(0, 0.5)
+        fx, _, fz = e.forward
+        p = self.player
+
+        start = (e.x + fx * 1.5, e.y + 1.5, e.z + fz * 1.5)
+        d = [p.x - start[0], p.y + 1.4 - start[1], p.z - start[2]]
+        length = math.sqrt(d[0] ** 2 + d[1] ** 2 + d[2] ** 2) or 1.0
+        d = [d[0] / length + rng.uniform(-Config.ENEMY_ACCURACY, Config.ENEMY_ACCURACY),
+             d[1] / length + rng.uniform(-Config.ENEMY_ACCURACY, Config.ENEMY_ACCURACY),
+             d[2] / length]
+        length = math.sqrt(d[0] ** 2 + d[1] ** 2 + d[2] ** 2) or 1.0
+        velocity = np.array(d, dtype=np.float32) * (Config.ENEMY_BULLET_SPEED / length)
+        self.projectiles.spawn(start, velocity, Config.ENEMY_BULLET_LIFETIME)
+
+        right, up, front = MUZZLE_OFFSET
+        muzzle = (e.x + fz * right + fx * front, e.y + up, e.z - fx * right + fz * front)
+        self.events.append(('enemy_shot', e, muzzle, (fx, 0.0, fz)))
+
+    def _move_enemies(self, dt):
+        grid = self.nav_grid
+        for e in self.enemies:
+            if e.vx or e.vz:
+                nx, nz = e.x + e.vx * dt, e.z + e.vz * dt
+                # 不能从可通行格子走进墙里（查表，O(1)）
+                if grid.is_free(nx, nz) or not grid.is_free(e.x, e.z):
+                    e.x, e.z = nx, nz
+            self.enemy_grid.update(e, e.x, e.z, Config.ENEMY_HIT_RADIUS)
+        self.hitboxes.mark_moved()
+
+    def spawn_enemy(self, x, z):
+        hp = Config.ENEMY_HP * (1 + self.wave * 0.1)
+        e = EnemyState(self._next_enemy_id, x, z, hp)
+        self._next_enemy_id += 1
+        self.enemies.append(e)
+        self.enemy_grid.update(e, e.x, e.z, Config.ENEMY_HIT_RADIUS)
+        self.hitboxes.add(e)
+        self.ai.add(e)
+        self.events.append(('enemy_spawned', e))
+        return e
+
+    def damage_enemy(self, e, amount):
+        if e.hp <= 0: return
+        e.hp -= amount
+        if e.hp <= 0:
+            self.enemies.remove(e)
+            self.enemy_grid.remove(e)
+            self.hitboxes.remove(e)
+            self.ai.remove(e)
+            self.visibility.forget(e)
+            self.kills += 1
+            self.events.append(('enemy_killed', e))
+
+    # ---------- 子弹 ----------
+
+    def _step_bullets(self, dt):
+        b = self.bullets
+        for i in np.flatnonzero(b.alive):
+            start = b.positions[i].astype(np.float64)
+            end = start + b.velocities[i] * dt
+            b.lifetimes[i] -= dt
+            if b.lifetimes[i] <= 0:
+                b.alive[i] = False
+                continue
+
+            # 先查静态墙体：撞墙时只检测墙前的那一段飞行路径
+            t = self.walls.segment_blocked(start, end)
+            if t is not None:
+                end = start + (end - start) * t
+            enemy, is_headshot, hit_pos = self._find_hit(start, end)
+
+            if enemy is not None:
+                damage = float(b.damage[i, 1] if is_headshot else b.damage[i, 0])
+                normal = hit_pos - self._enemy_origin(enemy)
+                normal /= np.linalg.norm(normal) or 1.0
+                self.events.append(('enemy_hit', enemy, tuple(hit_pos), tuple(normal), is_headshot, damage))
+                self.damage_enemy(enemy, damage)
+                b.alive[i] = False
+            elif t is not None:
+                direction = b.velocities[i] / (np.linalg.norm(b.velocities[i]) or 1.0)
+                self.events.append(('bullet_wall', tuple(end), tuple(-direction)))
+                b.alive[i] = False
+            else:
+                b.positions[i] = end
+
+    def _find_hit(self, start, end):
+        """通过敌人空间索引只检查飞行路径 start->end 经过的格子，返回 (敌人, 是否爆头, 命中点)"""
+        candidates = self.enemy_grid.query_segment(start[0], start[2], end[0], end[2])
+        if not candidates: return None, False, None
+
+        if Config.CONTINUOUS_COLLISION:
+            # 整条线段 vs body/head OBB，与步长无关
+            enemy, is_headshot, t = self.hitboxes.intersect_segment(start, end, candidates)
+            if enemy:
+                return enemy, is_headshot, start + (end - start) * t
+            return None, False, None
+
+        for e in sorted(candidates, key=lambda e: e.id):
+            # 头部最先判定（爆头），然后是身体和敌人主体
+            for dy, radius_sq, head in ((2.2, 1.0, True), (1.2, 1.0, False), (0.0, 3.0, False)):
+                if (e.x - end[0]) ** 2 + (e.y + dy - end[1]) ** 2 + (e.z - end[2]) ** 2 < radius_sq:
+                    return e, head, end
+        return None, False, None
+
+    def _step_projectiles(self, dt):
+        """推进敌人子弹（超时或进入墙体的销毁），命中玩家时结算伤害"""
+        s = self.projectiles
+        idx = np.flatnonzero(s.alive)
+        if len(idx) == 0: return
+
+        pos = s.positions[idx] + s.velocities[idx] * dt
+        s.positions[idx] = pos
+        s.lifetimes[idx] -= dt
+        expired = (s.lifetimes[idx] <= 0) | self.walls.points_inside(pos)
+
+        hit = np.zeros(len(idx), dtype=bool)
+        p = self.player
+        if p.alive:
+            # 玩家胶囊体：脚底上方的竖直线段 + 半径
+            y = np.clip(pos[:, 1], p.y + Config.PLAYER_CAPSULE_BOTTOM, p.y + Config.PLAYER_CAPSULE_TOP)
+            dist_sq = (pos[:, 0] - p.x) ** 2 + (pos[:, 1] - y) ** 2 + (pos[:, 2] - p.z) ** 2
+            hit = ~expired & (dist_sq < Config.PLAYER_CAPSULE_RADIUS ** 2)
+
+        s.alive[idx[expired | hit]] = False
+        for i in range(int(np.count_nonzero(hit))):
+            self.damage_player(self.enemy_damage)
+
+    # ---------- 玩家 / 血包 ----------
+
+    def damage_player(self, amount):
+        p = self.player
+        if p.hp <= 0: return
+        p.hp -= amount
+        self.events.append(('player_hit', amount))
+        if p.hp <= 0:
+            self.state = STATE_DEFEAT
+            self.events.append(('defeat',))
+
+    def _step_pickups(self):
+        p = self.player
+        if not p.alive: return
+        for k in self.pickups:
+            if k.taken or p.hp >= p.max_hp: continue
+            if (k.x - p.x) ** 2 + (k.y - p.y) ** 2 + (k.z - p.z) ** 2 < Config.PICKUP_RADIUS ** 2:
+                p.hp = min(p.max_hp, p.hp + k.heal_amount)
+                k.taken = True
+                self.events.append(('pickup_taken', k, k.heal_amount))
+
+    # ---------- 波次 ----------
+
+    def _step_waves(self, dt):
+        if not self.wave_active:
+            self.time_to_next_wave -= dt
+            if self.time_to_next_wave <= 0:
+                self.start_wave()
+        elif not self.enemy_count:
+            self.wave += 1
+            self.wave_active = False
+            self.time_to_next_wave = 4
+
+            # 波次间回血
+            p = self.player
+            if p.alive and p.hp < p.max_hp:
+                p.hp = min(p.max_hp, p.hp + Config.WAVE_HEAL)
+                self.events.append(('player_healed', Config.WAVE_HEAL))
+
+    def wave_size(self, wave):
+        return 3 + int(wave * 1.5)
+
+    def start_wave(self, count=None):
+        """开始当前波次；count 为 None 时按波次计算敌人数量"""
+        # 检查是否通关
+        if self.wave > Config.MAX_WAVES:
+            self.state = STATE_VICTORY
+            self.events.append(('victory',))
+            return
+
+        self.wave_active = True
+        if count is None:
+            count = self.wave_size(self.wave)
+        self.events.append(('wave_started', self.wave, count))
+        self._spawn_wave(self.find_spawn_points(count))
+
+    def _spawn_wave(self, points):
+        for x, z in points:
+            self.spawn_enemy(x, z)
+
+    def _enemy_xz(self):
+        return [(e.x, e.z) for e in self.enemies]
+
+    def find_spawn_points(self, count, separation=Config.SPAWN_MIN_SEPARATION):
+        """占用网格中已排除墙体、现有敌人、血包和玩家附近的格子"""
+        occupancy = self.occupancy
+        occupancy.clear_dynamic()
+        occupancy.mark(self.player.x, self.player.z, Config.SPAWN_PLAYER_CLEARANCE)
+        for x, z in self._enemy_xz():
+            occupancy.mark(x, z, separation)
+        for k in self.pickups:
+            if not k.taken:
+                occupancy.mark(k.x, k.z, Config.SPAWN_PICKUP_CLEARANCE)
+
+        points = occupancy.sample(count, separation, self.spawn_cells, rng=self.rng)
+        if len(points) < count:
+            # 生成区域挤满时退回到整个场地的空闲格子
+            points += occupancy.sample(count - len(points), separation, rng=self.rng)
+        if len(points) < count:
+            print(f"Warning: Only spawned {len(points)}/{count} enemies due to space constraints")
+        return points
\ No newline at end of file
@@ -0,0 +1,106 @@
+# core/spatial_hash.py
+import math
+
+class SpatialHash:
+    """XZ 平面上的均匀网格索引，用于子弹命中检测的宽相位"""
+
+    def __init__(self, cell_size=4.0):
+        self.cell_size = cell_size
+        self.cells = {}        # (cx, cz) -> set(obj)
+        self._obj_cells = {}   # obj -> (x0, z0, x1, z1) 当前占据的格子范围
+
+    def cell_coord(self, v):
+        return math.floor(v / self.cell_size)
+
+    def _cell_range(self, x, z, radius):
+        return (self.cell_coord(x - radius), self.cell_coord(z - radius),
+                self.cell_coord(x + radius), self.cell_coord(z + radius))
+
+    def update(self, obj, x, z, radius=0.0):
+        """插入或移动对象；只有跨越格子边界时才会改动哈希表"""
+        new_range = self._cell_range(x, z, radius)
+        old_range = self._obj_cells.get(obj)
+        if old_range == new_range:
+            return
+        if old_range:
+            self._unlink(obj, old_range)
+
+        x0, z0, x1, z1 = new_range
+        for cx in range(x0, x1 + 1):
+            for cz in range(z0, z1 + 1):
+                self.cells.setdefault((cx, cz), set()).add(obj)
+        self._obj_cells[obj] = new_range
+
+    def remove(self, obj):
+        old_range = self._obj_cells.pop(obj, None)
+        if old_range:
+            self._unlink(obj, old_range)
+
+    def _unlink(self, obj, cell_range):
+        x0, z0, x1, z1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cz in range(z0, z1 + 1):
+                bucket = self.cells.get((cx, cz))
+                if bucket is None: continue
+                bucket.discard(obj)
+                if not bucket:
+                    del self.cells[(cx, cz)]
+
+    def clear(self):
+        self.cells.clear()
+        self._obj_cells.clear()
+
+    def __contains__(self, obj):
+        return obj in self._obj_cells
+
+    def __iter__(self):
+        return iter(list(self._obj_cells))
+
+    def __len__(self):
+        return len(self._obj_cells)
+
+    def query_point(self, x, z):
+        return set(self.cells.get((self.cell_coord(x), self.cell_coord(z)), ()))
+
+    def query_segment(self, x0, z0, x1, z1):
+        """返回线段 (x0,z0)-(x1,z1) 经过的所有格子中的对象（2D DDA 遍历）"""
+        found = set()
+        if not self.cells:
+            return found
+
+        cs = self.cell_size
+        cx, cz = self.cell_coord(x0), self.cell_coord(z0)
+        end_cx, end_cz = self.cell_coord(x1), self.cell_coord(z1)
+        dx, dz = x1 - x0, z1 - z0
+
+        step_x = 1 if dx > 0 else -1
+        step_z = 1 if dz > 0 else -1
+        # 到达下一条格线所需的参数 t，以及每跨一格 t 的增量
+        if dx != 0:
+            next_x = (cx + (1 if dx > 0 else 0)) * cs
+            t_max_x = (next_x - x0) / dx
+            t_delta_x = cs / abs(dx)
+        else:
+            t_max_x = t_delta_x = math.inf
+        if dz != 0:
+            next_z = (cz + (1 if dz > 0 else 0)) * cs
+            t_max_z = (next_z - z0) / dz
+            t_delta_z = cs / abs(dz)
+        else:
+            t_max_z = t_delta_z = math.inf
+
+        # 步数上限 = 曼哈顿格子距离，防止浮点误差导致死循环
+        for _ in range(abs(end_cx - cx) + abs(end_cz - cz) + 1):
+            bucket = self.cells.get((cx, cz))
+            if bucket:
+                found.update(bucket)
+            if cx == end_cx and cz == end_cz:
+                break
+            if t_max_x < t_max_z:
+                t_max_x += t_delta_x
+                cx += step_x
+            else:
+                t_max_z += t_delta_z
+                cz += step_z
+        found.update(self.cells.get((end_cx, end_cz), ()))
+        return found
@@ -0,0 +1,29 @@
+# core/static_geometry.py
+# 静态关卡几何：不会移动的墙体按材质合并成一个网格（一个碰撞体），关卡射线检测走墙体 OBB 的 BVH（见 core/collision.py）
+from ursina import Entity
+from core.mesh_baker import bake_boxes
+from core.collision import WallSet
+
+class StaticLevel(WallSet):
+    """
+    WallSet 的渲染版本。build() 按材质把墙体合并为一个网格实体，
+    玩家移动仍通过 Ursina 的碰撞体；子弹 / 视线等检测只查询 BVH。
+    """
+
+    def __init__(self, boxes=()):
+        super().__init__(boxes)
+        self.entities = []
+
+    def build(self, textures):
+        """textures 为 材质名 -> 贴图；生成合并后的网格实体，返回新建的实体列表"""
+        groups = {}
+        for box in self.boxes:
+            groups.setdefault(box.material, []).append(box)
+
+        for material, boxes in groups.items():
+            mesh = bake_boxes([b.matrix for b in boxes], [b.color for b in boxes], [b.texture_scale for b in boxes])
+            # MeshCollider 按三角形逐个读取顶点，平铺数组需要先展开
+            mesh.generated_vertices = mesh.vertices.reshape(-1, 3)[mesh.triangles]
+            self.entities.append(Entity(model=mesh, texture=textures.get(material), collider='mesh',
+                                        name='static_level'))
+        return self.entities
\ No newline at end of file
@@ -0,0 +1,172 @@
+# core/timers.py
+# 分层时间轮：代替 Ursina 的 invoke()（每次调用都会创建一个 Sequence + Wait + Func）。
+# 第 0 层每格一个 tick，共 slots 格；更远的定时器放在更高层（每格 slots^level 个 tick），到期前逐层下放。
+# 同一 owner + key 的定时器会合并（重新安排而不是叠加），owner 销毁时可一次取消它的全部定时器。
+# 不依赖 Ursina；由 install_timer_task() 挂到 Panda3D 的任务管理器上每帧推进
+from core.config import Config
+from core.profiler import profiler
+
+class TimerHandle:
+    __slots__ = ('callback', 'args', 'expire', 'owner', 'key', 'cancelled', 'fired')
+
+    def __init__(self, callback, args, expire, owner, key):
+        self.callback = callback
+        self.args = args
+        self.expire = expire      # 到期的 tick 序号
+        self.owner = owner
+        self.key = key
+        self.cancelled = False
+        self.fired = False
+
+    @property
+    def active(self):
+        return not (self.cancelled or self.fired)
+
+
+class TimerWheel:
+    def __init__(self, tick=Config.TIMER_TICK, slots=64, levels=4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for i in range(slots)] for l in range(levels)]
+        self.now = 0              # 已推进的 tick 数
+        self._accumulator = 0.0
+        self._keyed = {}          # (owner, key) -> 待执行的 TimerHandle
+        self._owned = {}          # owner -> {TimerHandle}
+        self.pending = 0
+        self.stats = {'scheduled': 0, 'coalesced': 0, 'cancelled': 0, 'fired': 0}
+
+    # ---------- 安排 / 取消 ----------
+
+    def schedule(self, delay, callback, *args, owner=None, key=None):
+        """
+        delay 秒后调用 callback(*args)，返回可取消的 TimerHandle。
+        key 不为 None 时，同一 (owner, key) 只保留最新的一个：连射时后坐力恢复、冷却等不会越积越多。
+        """
+        expire = self.now + max(1, round(delay / self.tick))
+        if key is not None:
+            old = self._keyed.get((owner, key))
+            if old is not None and old.active:
+                if old.expire == expire:
+                    # 同一 tick 到期：直接替换回调参数，不再分配
+                    old.callback, old.args = callback, args
+                    self.stats['coalesced'] += 1
+                    return old
+                self._drop(old)
+                self.stats['coalesced'] += 1
+        h = TimerHandle(callback, args, expire, owner, key)
+        if key is not None:
+            self._keyed[(owner, key)] = h
+        if owner is not None:
+            self._owned.setdefault(owner, set()).add(h)
+        self._insert(h)
+        self.pending += 1
+        self.stats['scheduled'] += 1
+        return h
+
+    def cancel(self, handle):
+        if handle is None or not handle.active: return
+        self._drop(handle)
+        self.stats['cancelled'] += 1
+
+    def cancel_key(self, key, owner=None):
+        self.cancel(self._keyed.get((owner, key)))
+
+    def cancel_owner(self, owner):
+        """取消 owner 的全部定时器（实体销毁时调用，避免回调作用在已销毁的节点上）"""
+        for h in list(self._owned.get(owner, ())):
+            self.cancel(h)
+        self._owned.pop(owner, None)
+
+    def clear(self):
+        for level in self.wheels:
+            for bucket in level:
+                for h in bucket:
+                    h.cancelled = True
+                bucket.clear()
+        self._keyed.clear()
+        self._owned.clear()
+        self.pending = 0
+
+    def _drop(self, h):
+        # 惰性删除：只做标记，到达所在格子时丢弃
+        h.cancelled = True
+        self.pending -= 1
+        self._forget(h)
+
+    def _forget(self, h):
+        if h.key is not None and self._keyed.get((h.owner, h.key)) is h:
+            del self._keyed[(h.owner, h.key)]
+        if h.owner is not None:
+            owned = self._owned.get(h.owner)
+            if owned:
+                owned.discard(h)
+                if not owned:
+                    del self._owned[h.owner]
+
+    def _insert(self, h):
+        delta = h.expire - self.now
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span or level == self.levels - 1:
+                unit = span // self.slots
+                # 超出最高层范围的放在最高层最远的格子，下放时重新计算
+                index = min(h.expire // unit, self.now // unit + self.slots - 1)
+                self.wheels[level][index % self.slots].append(h)
+                return
+            span *= self.slots
+
+    # ---------- 推进 ----------
+
+    def advance(self, dt):
+        self._accumulator += dt
+        while self._accumulator >= self.tick:
+            self._accumulator -= self.tick
+            self._step()
+
+    def _step(self):
+        self.now += 1
+        # 低层转完一圈时，把高层当前格子里的定时器下放（先处理最高层）
+        cascade = []
+        unit = 1
+        for level in range(1, self.levels):
+            unit *= self.slots
+            if self.now % unit: break
+            cascade.append((level, (self.now // unit) % self.slots))
+        for level, index in reversed(cascade):
+            bucket = self.wheels[level][index]
+            self.wheels[level][index] = []
+            for h in bucket:
+                if not h.cancelled:
+                    self._insert(h)
+
+        bucket = self.wheels[0][self.now % self.slots]
+        if not bucket: return
+        self.wheels[0][self.now % self.slots] = []
+        for h in bucket:
+            if h.cancelled: continue
+            if h.expire > self.now:
+                self._insert(h)
+                continue
+            h.fired = True
+            self.pending -= 1
+            self._forget(h)
+            self.stats['fired'] += 1
+            h.callback(*h.args)
+
+
+def install_timer_task(app, wheel):
+    """每帧按帧间隔推进时间轮（与 Ursina 的 time.dt 同源：都来自全局时钟）"""
+    state = {'last': None}
+
+    def step(task):
+        if state['last'] is not None:
+            with profiler.section('timers'):
+                wheel.advance(task.time - state['last'])
+        state['last'] = task.time
+        return task.cont
+
+    app.taskMgr.add(step, 'timer_wheel')
+
+
+timers = TimerWheel()
\ No newline at end of file
@@ -1,19 +1,20 @@
 # core/utils.py
 from ursina import *
+from core.audio import audio
+from core.assets import assets
 
 def safe_load_texture(name, fallback='white_cube'):
     if not name: return fallback
+    # 主菜单期间预热过的贴图直接返回
+    cached = assets.texture(name)
+    if cached: return cached
     try:
         t = load_texture(name)
         return t if t else fallback
     except:
         return fallback
 
-# 简单的音频加载器
+# 音频加载：返回 core/audio.py 缓存的 Clip，同一文件只解码一次，播放走共享的声部池
 def safe_load_audio(name):
     if not name: return None
-    try:
-        # 关键：autoplay=False，只加载不播放，防止瞬间卡顿
-        return Audio(name, autoplay=False, loop=False)
-    except:
-        return None
\ No newline at end of file
+    return audio.load(name)
\ No newline at end of file
@@ -0,0 +1,67 @@
+# core/visibility.py
+# 敌人到玩家的视线（LOS）服务：每个模拟步把需要更新的敌人一次性交给墙体做批量线段检测，
+# 结果按 (敌人所在格子, 玩家所在格子) 缓存，双方都没换格子时直接复用，不再逐个敌人做射线检测
+from core.config import Config
+import numpy as np
+
+class VisibilityService:
+    """
+    walls 需提供 segments_blocked(p0s, p1s)；nav_grid 提供 cell_index(x, z) 用作缓存键。
+    只检测攻击距离内的敌人：更远的敌人既不会开火，AI 也不需要视线结果。
+    """
+
+    def __init__(self, walls, nav_grid, max_range=Config.LOS_MAX_RANGE):
+        self.walls = walls
+        self.grid = nav_grid
+        self.max_range = max_range
+        self._cache = {}          # 敌人 -> (敌人格子, 是否可见)
+        self._player_key = None
+        self.stats = {'queries': 0, 'cached': 0, 'recomputed': 0, 'batches': 0}
+
+    def clear(self):
+        self._cache.clear()
+        self._player_key = None
+
+    def forget(self, enemy):
+        self._cache.pop(enemy, None)
+
+    def _cell(self, x, y, z):
+        # 高度也按格子量化：玩家跳上箱子后视线可能变化
+        return self.grid.cell_index(x, z), int(y // self.grid.cell_size)
+
+    def update(self, enemies, player):
+        """每步调用一次：玩家换格子时整个缓存失效，否则只重算换了格子的敌人"""
+        key = self._cell(player.x, player.y, player.z)
+        if key != self._player_key:
+            self._cache.clear()
+            self._player_key = key
+
+        range_sq = self.max_range ** 2
+        stale, cells = [], []
+        for e in enemies:
+            if (e.x - player.x) ** 2 + (e.z - player.z) ** 2 >= range_sq:
+                self._cache.pop(e, None)
+                continue
+            self.stats['queries'] += 1
+            cell = self._cell(e.x, e.y, e.z)
+            cached = self._cache.get(e)
+            if cached is not None and cached[0] == cell:
+                self.stats['cached'] += 1
+                continue
+            stale.append(e)
+            cells.append(cell)
+        if not stale: return
+
+        # 敌人眼睛 -> 玩家胸口，与敌人开火的弹道高度一致
+        p0 = np.array([(e.x, e.y + Config.LOS_EYE_HEIGHT, e.z) for e in stale], dtype=np.float64)
+        p1 = np.array((player.x, player.y + Config.LOS_TARGET_HEIGHT, player.z), dtype=np.float64)
+        blocked = self.walls.segments_blocked(p0, np.broadcast_to(p1, p0.shape))
+        for e, cell, b in zip(stale, cells, blocked):
+            self._cache[e] = (cell, not b)
+        self.stats['recomputed'] += len(stale)
+        self.stats['batches'] += 1
+
+    def visible(self, enemy):
+        """最近一次 update() 时该敌人能否看到玩家；超出检测距离的视为看不到"""
+        cached = self._cache.get(enemy)
+        return cached is not None and cached[1]
\ No newline at end of file
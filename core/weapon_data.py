@@ -0,0 +1,105 @@
+# core/weapon_data.py
+# 武器定义：每把武器一个 JSON 文件（assets/weapons/*.json），包含伤害、射速、弹匣、散布和后坐力参数、音效以及枪模的方块列表。
+# 新增步枪 / 手枪 / 冲锋枪只需要加一个数据文件；枪模由 entities/weapon.py 烘焙成一个网格并缓存
+from core.config import Config
+from pathlib import Path
+import json
+
+ROOT = Path(__file__).resolve().parent.parent
+
+class WeaponDef:
+    """一把武器的只读定义（由 JSON 解析而来，缺省字段使用 AK47 的数值）"""
+
+    def __init__(self, data):
+        self.name = data['name']
+        self.display_name = data.get('display_name', self.name)
+        self.slot = data.get('slot', 0)
+        self.automatic = data.get('automatic', True)      # 按住左键连射
+        self.damage = data.get('damage', Config.DMG)
+        self.headshot_multiplier = data.get('headshot_multiplier', 2)
+        self.fire_interval = data.get('fire_interval', Config.FIRE_RATE)
+        self.magazine = data.get('magazine', Config.AMMO_CAPACITY)
+        self.reload_time = data.get('reload_time', 2.0)   # 换弹音效没有时长（无音频设备）时使用
+
+        spread = data.get('spread', {})
+        self.spread_base = spread.get('base', 0.02)
+        self.spread_per_shot = spread.get('per_shot', 0.0)
+        self.spread_max = spread.get('max', self.spread_base)
+        self.spread_recovery = spread.get('recovery', 4)   # 向 base 指数恢复的速率 (1/秒)
+
+        recoil = data.get('recoil', {})
+        # 第 k 发子弹的 (俯仰, 偏航) 偏移（度），超过长度后保持最后一项；后坐力恢复后从头开始
+        self.recoil_pattern = [tuple(p) for p in recoil.get('pattern', ())] or [(0.0, 0.0)]
+        self.recoil_recovery = recoil.get('recovery', 10)
+        self.kick_offset = tuple(recoil.get('kick_offset', (0, 0.05, -0.25)))
+        self.kick_pitch = recoil.get('kick_pitch', -12)
+        self.kick_yaw = recoil.get('kick_yaw', 2)
+
+        sounds = data.get('sounds', {})
+        self.sound_shoot = list(sounds.get('shoot', ()))    # 候选文件，使用第一个能加载的
+        self.sound_reload = list(sounds.get('reload', ()))
+        self.sound_hit = list(sounds.get('hit', ()))
+        self.sound_pitch = tuple(sounds.get('pitch', (0.9, 1.1)))
+
+        view = data.get('viewmodel', {})
+        self.view_position = tuple(view.get('position', (0.5, -0.4, 0.6)))
+        self.view_scale = view.get('scale', 0.5)
+        self.reload_position = tuple(view.get('reload_position', (0.3, -0.6, 0.4)))
+        self.reload_rotation = tuple(view.get('reload_rotation', (30, 0, -30)))
+        muzzle = view.get('muzzle', {})
+        self.muzzle_position = tuple(muzzle.get('position', (0, 0, 1)))
+        self.muzzle_scale = tuple(muzzle.get('scale', (1, 1, 1)))
+        self.muzzle_flash_size = tuple(view.get('muzzle_flash_size', (0.3, 0.5)))
+        self.parts = list(view.get('parts', ()))
+
+    def recoil_at(self, shot):
+        return self.recoil_pattern[min(shot, len(self.recoil_pattern) - 1)]
+
+    def __repr__(self):
+        return f'WeaponDef({self.name!r})'
+
+
+class WeaponRegistry:
+    def __init__(self):
+        self.defs = {}
+        self.folder = None
+
+    def load(self, folder=None):
+        """读取 folder（默认 Config.WEAPON_DIR）下全部 *.json；重复调用不会重新读盘"""
+        folder = ROOT / (folder or Config.WEAPON_DIR)
+        if self.folder == folder: return self
+        self.defs.clear()
+        for path in sorted(folder.glob('*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    d = WeaponDef(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f'武器定义加载失败: {path.name} ({e})')
+                continue
+            self.defs[d.name] = d
+        self.folder = folder
+        return self
+
+    def _ensure_loaded(self):
+        if self.folder is None:
+            self.load()
+
+    def get(self, name):
+        self._ensure_loaded()
+        return self.defs.get(name)
+
+    @property
+    def names(self):
+        """按槽位排序的武器名（数字键 1、2、3 … 依次对应）"""
+        self._ensure_loaded()
+        return [d.name for d in sorted(self.defs.values(), key=lambda d: (d.slot, d.name))]
+
+    def all(self):
+        return [self.defs[n] for n in self.names]
+
+    @property
+    def default(self):
+        return self.get(Config.DEFAULT_WEAPON) or self.get(self.names[0])
+
+
+weapons = WeaponRegistry()
\ No newline at end of file
@@ -0,0 +1,92 @@
+# core/world.py
+# 一局游戏的场景：环境、合并墙体、玩家、HUD、血包和关卡管理器。main.py 和 benchmark.py 共用
+from ursina import *
+from core.utils import safe_load_texture
+from core.static_geometry import StaticLevel
+from core.arena import generate_arena, random_pickup_spots
+from core.level_manager import LevelManager, HordeLevelManager
+from entities.player import Player
+from entities.props import HealthPack
+from ui.hud import HUD
+from entities.particles import particle_system
+import random
+
+class World:
+    def __init__(self, on_death_callback=None, on_victory_callback=None, seed=None, horde=False):
+        # 地图布局由种子决定，模拟核心使用同一个种子
+        self.seed = random.randrange(2**31) if seed is None else seed
+        self.horde = horde   # 尸潮模式：几百个敌人的数组化模拟 + 实例化渲染
+        self.env_entities = []
+        
+        # 环境生成
+        self.sky = Sky(texture='sky_default')
+        self.env_entities.append(self.sky)
+        
+        light = DirectionalLight(y=10, rotation=(90, 45, 0))
+        self.env_entities.append(light)
+        
+        tex_ground = safe_load_texture('assets/floor.png', fallback='grass')
+        ground = Entity(model='plane', scale=(100,1,100), texture=tex_ground, texture_scale=(50,50), collider='box')
+        self.env_entities.append(ground)
+        
+        # 墙体按材质合并成一个网格 + 一个碰撞体
+        walls, pickup_spots = generate_arena(random.Random(self.seed))
+        tex_wall = safe_load_texture('assets/wall.png', fallback='brick')
+        self.static_level = StaticLevel(walls)
+        self.env_entities.extend(self.static_level.build({'wall': tex_wall}))
+
+        self.player = Player(position=(0, 2, 0), on_death_callback=on_death_callback)
+        self.player.name = 'player'
+        
+        self.hud = HUD()
+        self.player.hud_ref = self.hud
+        self.hud.bind_weapon(self.player.weapon)
+        
+        self.pickups = []
+        for spot in pickup_spots:
+            hp_pack = HealthPack(position=spot)
+            self.env_entities.append(hp_pack)
+            self.pickups.append(hp_pack)
+
+        manager = HordeLevelManager if horde else LevelManager
+        self.level_manager = manager(self.player, on_victory_callback=on_victory_callback,
+                                     static_level=self.static_level, pickups=self.pickups, seed=self.seed)
+
+    def reset(self, seed=None):
+        """
+        原地重开一局：天空、光照、地面、墙体（及其导航网格）、玩家和 HUD 都保留，
+        只重新摆放血包、恢复状态并清掉敌人 / 子弹 / 粒子
+        """
+        self.seed = random.randrange(2**31) if seed is None else seed
+        spots = random_pickup_spots(random.Random(self.seed), len(self.pickups))
+        for pack, spot in zip(self.pickups, spots):
+            pack.reset(spot)
+        self.player.reset()
+        self.hud.reset()
+        self.hud.update_hp(self.player.hp, self.player.max_hp)
+        self.level_manager.reset(self.seed)
+        particle_system().kill_all()
+        self.set_active(True)
+
+    def set_active(self, active):
+        """回到菜单时暂停：模拟、玩家输入和 HUD 停止更新，场景留在菜单背后"""
+        self.level_manager.enabled = active
+        self.player.enabled = active
+        self.hud.enabled = active
+
+    def destroy(self):
+        destroy(self.player)
+        destroy(self.hud)
+        destroy(self.level_manager)
+        
+        # 阴影光照更新包围盒时会遍历 Sky.instances，已销毁的天空必须移出，否则重开一局会在 stash() 处断言失败
+        if self.sky in Sky.instances:
+            Sky.instances.remove(self.sky)
+        for e in self.env_entities: 
+            destroy(e)
+        self.env_entities.clear()
+        
+        # 清理所有名为 'enemy' 的实体（双重保险）
+        for e in list(scene.entities):
+            if e and hasattr(e, 'name') and e.name == 'enemy':
+                destroy(e)
\ No newline at end of file
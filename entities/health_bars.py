@@ -0,0 +1,127 @@
+# entities/health_bars.py
+# 敌人头顶血条：所有血条合并成一个动态网格。每帧只接收一个紧凑数组（世界坐标 + 血量比例），
+# 按距离淡出、按视锥裁剪后一次性重建顶点，开销不随敌人数量增加节点数
+from ursina import *
+from panda3d.core import TransparencyAttrib
+from core.config import Config
+from core.profiler import profiler
+from entities.particles import quad_triangles
+import numpy as np
+
+# 每个血条两个四边形（背景 + 前景），四个角的纵向系数；横向系数随血量变化
+_CORNER_Y = np.array((-0.5, -0.5, 0.5, 0.5), dtype=np.float32)
+_CORNER_X = np.array((0, 1, 1, 0), dtype=np.float32)
+
+def bar_color(ratio):
+    """与旧版血条相同的分段颜色：低于 30% 红，低于 60% 橙，否则绿"""
+    return np.where((ratio < 0.3)[:, None], np.array(color.red, dtype=np.float32),
+                    np.where((ratio < 0.6)[:, None], np.array(color.orange, dtype=np.float32),
+                             np.array(color.green, dtype=np.float32)))
+
+class HealthBarOverlay(Entity):
+    def __init__(self, capacity=64):
+        super().__init__(model=Mesh(mode='triangle', static=False), double_sided=True)
+        self.setTransparency(TransparencyAttrib.MAlpha)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.ratios = np.zeros(capacity, dtype=np.float32)
+        self.count = 0       # 本帧提交的血条数
+        self.drawn = 0       # 裁剪后实际画出的血条数
+        self._triangles = quad_triangles(capacity * 2)
+        self._bg_color = np.array(color.black, dtype=np.float32)
+        self._mesh_empty = True
+
+    @property
+    def capacity(self):
+        return len(self.ratios)
+
+    def submit(self, positions, ratios):
+        """提交本帧的血条：positions 为 (n,3) 血条中心的世界坐标，ratios 为 (n,) 剩余血量比例"""
+        n = len(ratios)
+        if n > self.capacity:
+            capacity = max(n, self.capacity * 2)
+            self.positions = np.zeros((capacity, 3), dtype=np.float32)
+            self.ratios = np.zeros(capacity, dtype=np.float32)
+            self._triangles = quad_triangles(capacity * 2)
+        if n:
+            self.positions[:n] = positions
+            self.ratios[:n] = np.clip(ratios, 0, 1)
+        self.count = n
+
+    def clear(self):
+        self.count = 0
+
+    def update(self):
+        if not self._mesh_empty or self.count:
+            with profiler.section('health_bars'):
+                self.rebuild_mesh()
+
+    def visible_bars(self):
+        """返回通过裁剪的血条下标和对应的淡出 alpha"""
+        n = self.count
+        # 世界坐标 -> 相机坐标（行向量约定，相机看向 +z）
+        view = np.array(render.getMat(camera), dtype=np.float32)
+        p = self.positions[:n] @ view[:3, :3] + view[3, :3]
+        depth = p[:, 2]
+
+        # 距离淡出：FADE_START 以内不透明，MAX_DISTANCE 处完全透明
+        dist = np.sqrt((p * p).sum(axis=1))
+        alpha = np.clip((Config.HEALTH_BAR_MAX_DISTANCE - dist) /
+                        (Config.HEALTH_BAR_MAX_DISTANCE - Config.HEALTH_BAR_FADE_START), 0, 1)
+
+        visible = alpha > 0
+        lens = getattr(camera, 'lens', None)   # 无窗口运行时没有镜头，只按距离裁剪
+        if lens is None:
+            idx = np.flatnonzero(visible)
+            return idx, alpha[idx]
+
+        # 屏幕空间裁剪：血条整个落在视锥之外（含半个血条宽度的余量）就不画
+        fov_x, fov_y = lens.getFov()
+        half = Config.HEALTH_BAR_WIDTH / 2
+        tan_x = np.tan(np.radians(fov_x / 2))
+        tan_y = np.tan(np.radians(fov_y / 2))
+        on_screen = ((depth > lens.getNear()) &
+                     (np.abs(p[:, 0]) - half <= depth * tan_x) &
+                     (np.abs(p[:, 1]) - half <= depth * tan_y))
+        idx = np.flatnonzero(on_screen & visible)
+        return idx, alpha[idx]
+
+    def rebuild_mesh(self):
+        idx, alpha = self.visible_bars() if self.count else ((), None)
+        n = len(idx)
+        self.drawn = n
+        if n == 0:
+            if not self._mesh_empty:
+                self.model.vertices = []
+                self.model.colors = []
+                self.model.triangles = []
+                self.model.generate()
+                self._mesh_empty = True
+            return
+
+        width, height = Config.HEALTH_BAR_WIDTH, Config.HEALTH_BAR_HEIGHT
+        right = np.array(camera.right, dtype=np.float32)
+        up = np.array(camera.up, dtype=np.float32)
+        # 前景比背景稍微靠近相机，避免深度冲突
+        toward = -np.array(camera.forward, dtype=np.float32) * 0.01
+        ratio = self.ratios[idx]
+
+        # 横向系数：背景占满整个宽度，前景从左端开始、长度为 ratio * width
+        xs = np.empty((n, 2, 4), dtype=np.float32)
+        xs[:, 0] = (_CORNER_X - 0.5) * width
+        xs[:, 1] = (_CORNER_X[None, :] * ratio[:, None] - 0.5) * width
+        ys = _CORNER_Y * height
+        verts = (self.positions[idx][:, None, None, :]
+                 + xs[..., None] * right
+                 + ys[None, None, :, None] * up)
+        verts[:, 1] += toward
+
+        colors = np.empty((n, 2, 4), dtype=np.float32)
+        colors[:, 0] = self._bg_color
+        colors[:, 1] = bar_color(ratio)
+        colors[..., 3] *= alpha[:, None]
+
+        self.model.vertices = verts.reshape(-1).astype(np.float32)
+        self.model.colors = np.repeat(colors.reshape(-1, 4), 4, axis=0).reshape(-1)
+        self.model.triangles = self._triangles[:n * 12]
+        self.model.generate()
+        self._mesh_empty = False
\ No newline at end of file
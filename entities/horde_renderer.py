@@ -0,0 +1,128 @@
+# entities/horde_renderer.py
+# 尸潮模式的敌人渲染：所有敌人共用一个烘焙好的人形网格，用一次实例化绘制画出来（gl_InstanceID）。
+# 每个实例的位置 / 朝向 / 受击闪白放在一张缓冲纹理里，每帧只上传一次存活敌人的紧凑数组，不为敌人创建任何节点
+from ursina import *
+from panda3d.core import Texture as PandaTexture, GeomEnums, OmniBoundingVolume
+from core.config import Config
+from core.profiler import profiler
+from core.mesh_baker import instance_model
+from entities.enemy import enemy_mesh
+import numpy as np
+
+# 缓冲纹理中每个实例占 2 个 RGBA32F 纹素：(x, y, z, 朝向弧度), (闪白, 0, 0, 0)
+_TEXELS = 2
+
+horde_shader = Shader(name='horde_shader', language=Shader.GLSL, vertex='''#version 140
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform samplerBuffer instances;
+in vec4 p3d_Vertex;
+in vec3 p3d_Normal;
+in vec4 p3d_Color;
+out vec4 vertex_color;
+out vec3 normal;
+out float flash;
+
+void main() {
+    vec4 placement = texelFetch(instances, gl_InstanceID * 2);
+    flash = texelFetch(instances, gl_InstanceID * 2 + 1).x;
+    // 与 Ursina 的 rotation_y 相同（左手坐标系，前方为 (sin, 0, cos)）
+    float c = cos(placement.w), s = sin(placement.w);
+    vec3 v = p3d_Vertex.xyz;
+    v = vec3(v.x * c + v.z * s, v.y, -v.x * s + v.z * c);
+    normal = vec3(p3d_Normal.x * c + p3d_Normal.z * s, p3d_Normal.y, -p3d_Normal.x * s + p3d_Normal.z * c);
+    gl_Position = p3d_ModelViewProjectionMatrix * vec4(v + placement.xyz, 1.0);
+    vertex_color = p3d_Color;
+}
+''', fragment='''#version 140
+uniform vec4 p3d_ColorScale;
+uniform vec3 light_direction;
+in vec4 vertex_color;
+in vec3 normal;
+in float flash;
+out vec4 fragColor;
+
+void main() {
+    float light = 0.55 + 0.45 * max(dot(normalize(normal), -light_direction), 0.0);
+    vec3 color = vertex_color.rgb * light;
+    fragColor = vec4(mix(color, vec3(1.0), step(0.0001, flash)), 1.0) * p3d_ColorScale;
+}
+''', default_input={
+    'light_direction': Vec3(-0.4, -0.8, 0.45).normalized(),
+})
+
+
+class HordeRenderer(Entity):
+    """EnemyArrays 的视图：每帧把存活敌人（在上一步和当前步之间插值）写进缓冲纹理，设置实例数后整批绘制"""
+
+    def __init__(self, arrays):
+        super().__init__(name='horde')
+        self.arrays = arrays
+        self.visual = instance_model(enemy_mesh(), 'horde_visual')
+        self.visual.reparentTo(self)
+        # 实例分布在整个场地，模型自身的包围盒没有意义：不做视锥裁剪
+        self.visual.node().setBounds(OmniBoundingVolume())
+        self.visual.node().setFinal(True)
+        self.shader = horde_shader
+
+        self.capacity = 0
+        self.flash_left = np.zeros(0, dtype=np.float32)   # 每个槽位剩余的闪白时间
+        self._reserve(arrays.capacity)
+        self.count = 0
+        self.snapshot()
+        self.sync()
+
+    def _reserve(self, capacity):
+        if capacity <= self.capacity: return
+        self.buffer = PandaTexture('horde_instances')
+        self.buffer.setupBufferTexture(capacity * _TEXELS, PandaTexture.T_float, PandaTexture.F_rgba32,
+                                       GeomEnums.UH_dynamic)
+        self.set_shader_input('instances', self.buffer)
+        self.data = np.zeros((capacity, _TEXELS, 4), dtype=np.float32)
+        self.flash_left = np.concatenate((self.flash_left, np.zeros(capacity - self.capacity, dtype=np.float32)))
+        self.capacity = capacity
+
+    def snapshot(self):
+        """在最后一个模拟步之前调用，记下每个槽位的位置 / 朝向和敌人 id（槽位被复用时不插值）"""
+        a = self.arrays
+        self.prev_pos = a.pos.copy()
+        self.prev_yaw = a.yaw.copy()
+        self.prev_id = np.where(a.alive, a.id, -1)
+
+    def flash(self, slot, duration=0.1):
+        self.flash_left[slot] = duration
+
+    def sync(self, alpha=1.0):
+        a = self.arrays
+        self._reserve(a.capacity)
+        idx = a.indices()
+        n = len(idx)
+        self.count = n
+        self.flash_left = np.maximum(self.flash_left - time.dt, 0)
+        if n == 0:
+            self.visual.hide()
+            return
+
+        cur, yaw = a.pos[idx], a.yaw[idx]
+        known = idx < len(self.prev_id)
+        prev_slot = np.where(known, idx, 0)
+        same = known & (self.prev_id[prev_slot] == a.id[idx])
+        prev, prev_yaw = self.prev_pos[prev_slot], self.prev_yaw[prev_slot]
+        pos = np.where(same[:, None], prev + (cur - prev) * alpha, cur)
+        yaw = np.where(same, prev_yaw + ((yaw - prev_yaw + 180) % 360 - 180) * alpha, yaw)
+
+        data = self.data
+        data[:n, 0, :3] = pos
+        data[:n, 0, 3] = np.radians(yaw)
+        data[:n, 1, 0] = self.flash_left[idx]
+        memoryview(self.buffer.modifyRamImage())[:n * _TEXELS * 16] = data[:n].tobytes()
+        self.visual.setInstanceCount(n)
+        self.visual.show()
+
+    def positions(self):
+        """本帧画出的敌人（与缓冲纹理中的顺序一致）的世界坐标"""
+        return self.data[:self.count, 0, :3]
+
+    def clear(self):
+        self.flash_left[:] = 0
+        self.count = 0
+        self.visual.hide()
\ No newline at end of file
@@ -0,0 +1,184 @@
+# entities/particles.py
+# 向量化粒子系统：所有粒子状态存放在 NumPy 数组里，按固定步长整批积分（与帧率无关），
+# 渲染时在最后两步之间插值，并通过一个动态网格绘制
+from ursina import *
+from panda3d.core import TransparencyAttrib
+from core.config import Config
+from core.profiler import profiler
+from core.clock import FixedStepClock
+import numpy as np
+
+# 每个粒子渲染为面向摄像机的四边形，四个角在 (right, up) 平面上的系数
+_QUAD_CORNERS = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float32) * 0.5
+_QUAD_TRIANGLES = np.array([0, 1, 2, 2, 3, 0], dtype=np.uint32)
+QUAD_UVS = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)
+
+def quad_triangles(capacity):
+    """capacity 个四边形的三角形索引（每个四边形 4 个顶点、6 个索引）"""
+    return (np.arange(capacity, dtype=np.uint32)[:, None] * 4 + _QUAD_TRIANGLES).ravel()
+
+def billboard_vertices(positions, sizes):
+    """中心点 (n,3) + 边长 (n,) -> 面向摄像机的四边形顶点，展平为 (n*4*3,) 的 float32"""
+    right = np.array(camera.right, dtype=np.float32)
+    up = np.array(camera.up, dtype=np.float32)
+    offsets = _QUAD_CORNERS[:, :1] * right + _QUAD_CORNERS[:, 1:] * up          # (4,3)
+    verts = positions[:, None, :] + offsets[None, :, :] * np.asarray(sizes, dtype=np.float32).reshape(-1, 1, 1)
+    return verts.reshape(-1).astype(np.float32)
+
+class ParticleSystem(Entity):
+    def __init__(self, capacity=Config.PARTICLE_CAPACITY):
+        super().__init__(model=Mesh(mode='triangle', static=False), double_sided=True)
+        self.setTransparency(TransparencyAttrib.MAlpha)
+        self.setDepthWrite(False)
+
+        self.capacity = capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.float32)
+        self.sizes = np.zeros(capacity, dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.float32)
+        self.size_decay = np.zeros(capacity, dtype=np.float32)   # 尺寸指数衰减速率 (1/秒)
+        self.drag = np.zeros(capacity, dtype=np.float32)         # 速度指数衰减速率 (1/秒)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.fade = np.zeros(capacity, dtype=np.float32)         # alpha = lifetime * fade；0 表示不淡出
+        self.floor = np.full(capacity, -np.inf, dtype=np.float32)  # 落地高度（弹壳用）
+        self.prev_positions = np.zeros((capacity, 3), dtype=np.float32)  # 上一步的位置，用于插值
+        self.clock = FixedStepClock()
+
+        # 整个容量的三角形索引只生成一次，渲染时按存活数量截取
+        self._triangles = quad_triangles(capacity)
+        self._mesh_empty = True
+
+    @property
+    def count(self):
+        return int(np.count_nonzero(self.alive))
+
+    def spawn(self, position, velocity, lifetime, size, color, size_decay=0, drag=0, gravity=0, fade=0, floor=-np.inf):
+        """
+        写入一批粒子。position / velocity 为 (n,3)，color 为 (n,4) 或单个颜色，
+        其余参数可以是标量或长度为 n 的数组。容量不足时丢弃多出的粒子。
+        """
+        velocity = np.asarray(velocity, dtype=np.float32)
+        n = len(velocity)
+        slots = np.flatnonzero(~self.alive)[:n]
+        n = len(slots)
+        if n == 0: return
+
+        self.alive[slots] = True
+        self.positions[slots] = np.broadcast_to(np.asarray(position, dtype=np.float32), (len(velocity), 3))[:n]
+        self.prev_positions[slots] = self.positions[slots]
+        self.velocities[slots] = velocity[:n]
+        for array, value in ((self.lifetimes, lifetime), (self.sizes, size), (self.size_decay, size_decay),
+                             (self.drag, drag), (self.gravity, gravity), (self.fade, fade), (self.floor, floor)):
+            array[slots] = np.broadcast_to(value, (len(velocity),))[:n]
+        self.colors[slots] = np.broadcast_to(np.asarray(color, dtype=np.float32), (len(velocity), 4))[:n]
+
+    def kill_all(self):
+        self.alive[:] = False
+
+    def update(self):
+        steps = self.clock.advance(time.dt)
+        if not self._mesh_empty or self.alive.any():
+            with profiler.section('particles'):
+                for i in range(steps):
+                    if i == steps - 1:
+                        self.prev_positions[:] = self.positions
+                    self.simulate(self.clock.dt)
+                self.rebuild_mesh()
+
+    def simulate(self, dt):
+        idx = np.flatnonzero(self.alive)
+        if len(idx) == 0: return
+
+        vel = self.velocities[idx]
+        vel[:, 1] += self.gravity[idx] * dt
+        vel *= np.exp(-self.drag[idx] * dt)[:, None]
+        pos = self.positions[idx] + vel * dt
+
+        # 落地：贴地并快速衰减速度
+        floor = self.floor[idx]
+        grounded = pos[:, 1] < floor
+        pos[grounded, 1] = floor[grounded]
+        vel[grounded] *= np.exp(-Config.PARTICLE_GROUND_FRICTION * dt)
+
+        self.positions[idx] = pos
+        self.velocities[idx] = vel
+        self.sizes[idx] *= np.exp(-self.size_decay[idx] * dt)
+        self.lifetimes[idx] -= dt
+
+        fade = self.fade[idx]
+        fading = fade > 0
+        self.colors[idx[fading], 3] = np.clip(self.lifetimes[idx[fading]] * fade[fading], 0, 1)
+
+        self.alive[idx[self.lifetimes[idx] <= 0]] = False
+
+    def rebuild_mesh(self):
+        idx = np.flatnonzero(self.alive)
+        n = len(idx)
+        if n == 0:
+            self.model.vertices = []
+            self.model.colors = []
+            self.model.triangles = []
+            self.model.generate()
+            self._mesh_empty = True
+            return
+
+        prev = self.prev_positions[idx]
+        positions = prev + (self.positions[idx] - prev) * self.clock.alpha
+        self.model.vertices = billboard_vertices(positions, self.sizes[idx])
+        self.model.colors = np.repeat(self.colors[idx], 4, axis=0).reshape(-1)
+        self.model.triangles = self._triangles[:n * 6]
+        self.model.generate()
+        self._mesh_empty = False
+
+
+_system = None
+
+def particle_system():
+    """全局唯一的粒子系统实体，第一次使用时创建，跨对局复用"""
+    global _system
+    if _system is None:
+        _system = ParticleSystem()
+    return _system
+
+
+def _random_vec3(n, low, high):
+    return np.random.uniform(low, high, (n, 3)).astype(np.float32)
+
+# --- 发射器预设 ---
+
+def emit_muzzle_flash(position, direction, count=5):
+    """枪口火焰：沿枪口方向喷出，快速缩小并淡出"""
+    d = np.array(direction, dtype=np.float32)
+    velocity = d * np.random.uniform(2, 4, (count, 1)) + _random_vec3(count, -0.5, 0.5)
+    particle_system().spawn(
+        position, velocity,
+        lifetime=np.random.uniform(0.1, 0.2, count),
+        size=0.2, color=color.orange,
+        size_decay=6.3, drag=3.1, fade=5,
+    )
+
+def emit_bullet_casing(position, direction):
+    """弹壳：向右上方抛出，受重力下落并停在地面"""
+    right = Vec3(direction.z, 0, -direction.x).normalized()
+    velocity = np.array(right, dtype=np.float32) * np.random.uniform(2, 3) + np.array((0, np.random.uniform(2, 4), 0), dtype=np.float32)
+    particle_system().spawn(
+        position, velocity[None, :],
+        lifetime=2.0, size=0.08, color=color.gold,
+        gravity=-15, floor=0.1,
+    )
+
+def emit_impact_sparks(position, normal=Vec3(0,1,0), count=8):
+    """击中火花：沿法线方向散射，受重力并淡出"""
+    angle = np.random.uniform(0, 2 * np.pi, count)
+    spread = np.random.uniform(0.3, 1, count)
+    velocity = np.stack((np.cos(angle) * spread, np.random.uniform(0.5, 2, count), np.sin(angle) * spread), axis=1)
+    velocity += np.array(normal, dtype=np.float32) * 2
+    colors = np.where(np.random.random((count, 1)) > 0.5, np.array(color.yellow), np.array(color.orange))
+    particle_system().spawn(
+        position, velocity,
+        lifetime=np.random.uniform(0.1, 0.3, count),
+        size=0.08, color=colors,
+        size_decay=5.0, gravity=-10, fade=3,
+    )
\ No newline at end of file
@@ -1,9 +1,10 @@
 # entities/player.py
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
-from entities.weapon import AK47
+from entities.weapon import Weapon
 from core.config import Config
 from core.utils import safe_load_audio
+from core.audio import PRIORITY_HIGH
 import random
 
 class Player(FirstPersonController):
@@ -15,13 +16,26 @@ class Player(FirstPersonController):
         self.max_hp = Config.PLAYER_HP
         self.mouse_sensitivity = Vec2(Config.SENSITIVITY, Config.SENSITIVITY)
         
-        self.weapon = AK47(parent_camera=self.camera_pivot)
+        self.weapon = Weapon(parent_camera=self.camera_pivot)
         self.on_death_callback = on_death_callback
         self.hud_ref = None
         
         # --- 加载受伤音效 ---
         self.sfx_hurt = safe_load_audio('assets/hit.wav')
 
+    def reset(self, position=(0, 2, 0)):
+        """重开一局：回到出生点，恢复血量、朝向和武器（场景节点全部复用）"""
+        self.position = position
+        self.rotation = (0, 0, 0)
+        self.camera_pivot.rotation = (0, 0, 0)
+        self.jumping = False
+        self.air_time = 0
+        self.hp = self.max_hp
+        self.visible = True
+        self.enabled = True
+        if self.weapon:
+            self.weapon.reset()
+
     def input(self, key):
         if not self.enabled: return
         super().input(key)
@@ -35,8 +49,7 @@ class Player(FirstPersonController):
         
         # --- 播放受伤音效 ---
         if self.sfx_hurt:
-            self.sfx_hurt.pitch = random.uniform(0.8, 1.0) # 低沉一点表示疼痛
-            self.sfx_hurt.play()
+            self.sfx_hurt.play(pitch=random.uniform(0.8, 1.0), priority=PRIORITY_HIGH) # 低沉一点表示疼痛
 
         # 实时更新 HUD
         if self.hud_ref:
@@ -0,0 +1,88 @@
+# entities/projectiles.py
+# 子弹的渲染：子弹状态都在模拟核心的 ProjectileSet（结构数组）里。
+# 敌人子弹每帧合并画成一个网格；玩家子弹数量少，每颗用一个池化实体
+from ursina import *
+from panda3d.core import TransparencyAttrib
+from core.config import Config
+from core.profiler import profiler
+from entities.particles import QUAD_UVS, quad_triangles, billboard_vertices
+import numpy as np
+
+class PlayerBullet(Entity):
+    """玩家子弹的视图：飞行和命中都在模拟核心里，LevelManager 每帧把位置同步过来"""
+
+    def __init__(self, position=(0,0,0)):
+        super().__init__(
+            model='sphere',
+            color=color.cyan,
+            scale=0.15,
+            double_sided=True
+        )
+        
+        # 子弹拖尾
+        self.trail = Entity(parent=self, model='cube', scale=(0.1, 0.1, 2), color=color.cyan, alpha=0.5, z=-1)
+        self.reset(position)
+
+    def reset(self, position=(0,0,0)):
+        self.position = position
+
+
+class ProjectileInterpolator:
+    """记住一个 ProjectileSet 上一步的位置，渲染时在上一步和当前步之间插值"""
+    MAX_JUMP = 3.0   # 一步内移动超过该距离视为槽位被新子弹复用，不插值
+
+    def __init__(self, projectile_set):
+        self.projectiles = projectile_set
+        self.prev = projectile_set.positions.copy()
+        self.prev_alive = projectile_set.alive.copy()
+
+    def snapshot(self):
+        """在最后一个模拟步之前调用"""
+        self.prev[:] = self.projectiles.positions
+        self.prev_alive[:] = self.projectiles.alive
+
+    def positions(self, idx, alpha):
+        cur = self.projectiles.positions[idx]
+        prev = self.prev[idx]
+        valid = self.prev_alive[idx] & (((cur - prev) ** 2).sum(axis=1) < self.MAX_JUMP ** 2)
+        return np.where(valid[:, None], prev + (cur - prev) * alpha, cur)
+
+
+class ProjectileManager(Entity):
+    def __init__(self, projectile_set):
+        super().__init__(model=Mesh(mode='triangle', static=False), texture='circle', double_sided=True)
+        self.setTransparency(TransparencyAttrib.MAlpha)
+        self.projectiles = projectile_set
+        self.interpolator = ProjectileInterpolator(projectile_set)
+        self.alpha = 1.0   # 由 LevelManager 每帧设置为模拟时钟的插值系数
+
+        capacity = projectile_set.capacity
+        self._triangles = quad_triangles(capacity)
+        self._uvs = np.tile(QUAD_UVS, (capacity, 1)).reshape(-1)
+        self._bullet_color = np.array(color.orange, dtype=np.float32)
+        self._mesh_empty = True
+
+    def update(self):
+        if not self._mesh_empty or self.projectiles.alive.any():
+            with profiler.section('projectiles'):
+                self.rebuild_mesh()
+
+    def rebuild_mesh(self):
+        idx = np.flatnonzero(self.projectiles.alive)
+        n = len(idx)
+        if n == 0:
+            if not self._mesh_empty:
+                self.model.vertices = []
+                self.model.colors = []
+                self.model.uvs = []
+                self.model.triangles = []
+                self.model.generate()
+                self._mesh_empty = True
+            return
+
+        self.model.vertices = billboard_vertices(self.interpolator.positions(idx, self.alpha), np.full(n, Config.ENEMY_BULLET_SIZE))
+        self.model.colors = np.tile(self._bullet_color, n * 4)
+        self.model.uvs = self._uvs[:n * 8]
+        self.model.triangles = self._triangles[:n * 6]
+        self.model.generate()
+        self._mesh_empty = False
\ No newline at end of file
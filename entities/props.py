@@ -3,7 +3,9 @@ from ursina import *
 from core.utils import safe_load_audio
 
 class HealthPack(Entity):
-    def __init__(self, position, player_ref):
+    """血包的视图：拾取判定在模拟核心中，被拾取时调用 collect()"""
+
+    def __init__(self, position):
         super().__init__(
             model='cube',
             color=color.lime,
@@ -12,8 +14,6 @@ class HealthPack(Entity):
             collider='box',
             texture='white_cube'
         )
-        self.player = player_ref
-        self.heal_amount = 30
         
         # 简单的十字架造型
         Entity(parent=self, model='cube', scale=(0.3, 1, 0.3), color=color.white)
@@ -25,24 +25,16 @@ class HealthPack(Entity):
     def update(self):
         # 旋转特效
         self.rotation_y += 100 * time.dt
+
+    def collect(self):
+        # 播放音效
+        if self.sfx_pickup:
+            self.sfx_pickup.play(pitch=1.5) # 调高音调，听起来像 powerup
         
-        if not self.player or not self.player.enabled: return
-        
-        # 检测与玩家距离
-        dist_sq = (self.position - self.player.position).length_squared()
-        
-        # 距离小于 1.5米 (1.5^2 = 2.25)
-        if dist_sq < 2.25:
-            # 尝试治疗
-            success = self.player.heal(self.heal_amount)
-            
-            if success:
-                # 播放音效
-                if self.sfx_pickup:
-                    self.sfx_pickup.pitch = 1.5 # 调高音调，听起来像 powerup
-                    self.sfx_pickup.play()
-                
-                # 视觉特效：变大消失
-                self.animate_scale(0, duration=0.2)
-                destroy(self, delay=0.2)
-                self.enabled = False # 立即禁用防止重复触发
\ No newline at end of file
+        # 隐藏而不销毁，重开一局时由 reset() 放回场地
+        self.enabled = False # 立即禁用防止重复触发
+
+    def reset(self, position):
+        self.position = position
+        self.rotation_y = 0
+        self.enabled = True
\ No newline at end of file
@@ -1,329 +1,281 @@
 # entities/weapon.py
+# 玩家手里的武器：属性、散布、后坐力和音效来自 core/weapon_data.py 的武器定义；
+# 每把武器的枪模第一次使用时烘焙成一个网格并缓存，切枪只是切换显示哪个实例节点
 from ursina import *
 from core.config import Config
 from core.utils import safe_load_audio
+from core.audio import PRIORITY_HIGH
+from core.timers import timers
+from core.level_manager import LevelManager
+from core.pool import entity_pool
+from core.mesh_baker import bake_prototype, instance_model
+from core.weapon_data import weapons
+from entities.projectiles import PlayerBullet
+from entities.particles import emit_muzzle_flash, emit_bullet_casing
 import random
 
-def safe_destroy(entity):
-    if not entity: return
-    entity.visible = False
-    entity.enabled = False
-    entity.position = (0, -10000, 0)
-    destroy(entity, delay=1)
-
-# 粒子效果：枪口火焰粒子
-class MuzzleParticle(Entity):
-    def __init__(self, position, direction):
-        super().__init__(
-            model='sphere',
-            color=color.orange,
-            scale=0.2,
-            position=position
-        )
-        self.velocity = direction * random.uniform(2, 4) + Vec3(
-            random.uniform(-0.5, 0.5),
-            random.uniform(-0.5, 0.5),
-            random.uniform(-0.5, 0.5)
-        )
-        self.lifetime = random.uniform(0.1, 0.2)
-        self.fade_speed = 5
-        
-    def update(self):
-        if not self.enabled: return
-        self.position += self.velocity * time.dt
-        self.velocity *= 0.95  # 阻力
-        self.lifetime -= time.dt
-        self.scale *= 0.9
-        self.alpha = max(0, self.lifetime * self.fade_speed)
-        
-        if self.lifetime <= 0:
-            safe_destroy(self)
-
-# 弹壳抛出效果
-class BulletCasing(Entity):
-    def __init__(self, position, direction):
-        super().__init__(
-            model='cube',
-            color=color.gold,
-            scale=(0.05, 0.05, 0.15),
-            position=position
-        )
-        # 向右上方抛出
-        right = Vec3(direction.z, 0, -direction.x).normalized()
-        self.velocity = right * random.uniform(2, 3) + Vec3(0, random.uniform(2, 4), 0)
-        self.angular_velocity = Vec3(random.uniform(-500, 500), random.uniform(-500, 500), random.uniform(-500, 500))
-        self.lifetime = 2.0
-        self.gravity = -15
-        
-    def update(self):
-        if not self.enabled: return
-        self.velocity.y += self.gravity * time.dt
-        self.position += self.velocity * time.dt
-        self.rotation += self.angular_velocity * time.dt
-        self.lifetime -= time.dt
-        
-        # 落地后停止
-        if self.y < 0.1:
-            self.velocity *= 0.5
-            self.angular_velocity *= 0.8
-            self.y = 0.1
-            
-        if self.lifetime <= 0:
-            safe_destroy(self)
-
-# 击中特效
-class ImpactEffect(Entity):
-    def __init__(self, position, normal=Vec3(0,1,0)):
-        super().__init__(position=position)
-        self.lifetime = 0.3
-        
-        # 创建多个火花粒子
-        for i in range(8):
-            spark = Entity(
-                parent=self,
-                model='sphere',
-                color=color.yellow if random.random() > 0.5 else color.orange,
-                scale=0.08
-            )
-            # 沿法线方向散射
-            angle = random.uniform(0, 360)
-            spread = random.uniform(0.3, 1)
-            spark.velocity = Vec3(
-                math.cos(math.radians(angle)) * spread,
-                random.uniform(0.5, 2),
-                math.sin(math.radians(angle)) * spread
-            ) + normal * 2
-            spark.lifetime = random.uniform(0.1, 0.3)
-            
-    def update(self):
-        if not self.enabled: return
-        self.lifetime -= time.dt
-        
-        for child in self.children:
-            if hasattr(child, 'velocity'):
-                child.velocity.y -= 10 * time.dt
-                child.position += child.velocity * time.dt
-                child.lifetime -= time.dt
-                child.scale *= 0.92
-                child.alpha = max(0, child.lifetime * 3)
-                
-        if self.lifetime <= 0:
-            safe_destroy(self)
-
-class PlayerBullet(Entity):
-    def __init__(self, position, direction, hit_sound=None):
-        super().__init__(
-            model='sphere',
-            color=color.cyan,
-            scale=0.15,
-            position=position,
-            double_sided=True
-        )
-        self.direction = direction
-        self.speed = 80 
-        self.lifetime = 2.0
-        self.hit_sound = hit_sound
-        
-        # 子弹拖尾
-        self.trail = Entity(parent=self, model='cube', scale=(0.1, 0.1, 2), color=color.cyan, alpha=0.5, z=-1)
+def part_color(value):
+    """数据文件中的颜色：Ursina 颜色名，或 0-255 的 [r, g, b]"""
+    if isinstance(value, str):
+        return getattr(color, value)
+    return color.rgb32(*value)
 
-    def update(self):
-        if not self.enabled: return
-        self.position += self.direction * self.speed * time.dt
-        self.lifetime -= time.dt
-        
-        if self.lifetime <= 0:
-            safe_destroy(self)
-            return
+def build_viewmodel_prototype(definition):
+    """按数据文件里的方块列表搭出枪模原型，只用于烘焙网格；parent 引用之前某个方块的 name"""
+    root = Entity()
+    named = {}
+    for part in definition.parts:
+        e = Entity(parent=named.get(part.get('parent'), root), model='cube',
+                   scale=part.get('scale', 1), position=part.get('position', (0, 0, 0)),
+                   rotation=part.get('rotation', (0, 0, 0)), color=part_color(part.get('color', 'gray')))
+        if 'name' in part:
+            named[part['name']] = e
+    return root
+
+def viewmodel_mesh(definition):
+    """烘焙并缓存的枪模网格"""
+    return bake_prototype('weapon_' + definition.name, lambda: build_viewmodel_prototype(definition))
 
-        # 改进的碰撞检测
-        hit_enemy = None
-        is_headshot = False
-        
-        for e in list(scene.entities):
-            if not e or not e.enabled: continue
-            
-            # 检测敌人主体
-            if e.name == 'enemy':
-                dist_sq = (e.position - self.position).length_squared()
-                if dist_sq < 3.0:
-                    hit_enemy = e
-                    break
-            
-            # 检测敌人的身体部位（优先级更高）
-            if hasattr(e, 'parent') and e.parent and hasattr(e.parent, 'name') and e.parent.name == 'enemy':
-                # 计算世界坐标距离
-                if hasattr(e, 'world_position'):
-                    dist_sq = (e.world_position - self.position).length_squared()
-                    if dist_sq < 1.0:  # 更精确的检测
-                        hit_enemy = e.parent
-                        # 判断是否爆头
-                        if hasattr(e.parent, 'head') and e == e.parent.head:
-                            is_headshot = True
-                        break
-        
-        # 处理击中
-        if hit_enemy and hasattr(hit_enemy, 'take_damage'):
-            damage = Config.DMG
-            if is_headshot:
-                damage = Config.DMG * 2
-                print("HEADSHOT!")
-            
-            hit_enemy.take_damage(damage)
-            
-            # 播放击中音效
-            if self.hit_sound:
-                self.hit_sound.pitch = random.uniform(0.9, 1.1)
-                self.hit_sound.stop()
-                self.hit_sound.play()
-            
-            # 击中特效
-            ImpactEffect(position=self.position, normal=(self.position - hit_enemy.position).normalized())
-                
-            safe_destroy(self)
-
-class AK47(Entity):
-    def __init__(self, parent_camera):
+def bake_viewmodels():
+    """预热：烘焙全部武器的枪模"""
+    for definition in weapons.all():
+        viewmodel_mesh(definition)
+
+def load_first_audio(candidates):
+    for name in candidates:
+        clip = safe_load_audio(name)
+        if clip:
+            return clip
+    return None
+
+
+class Weapon(Entity):
+    def __init__(self, parent_camera, weapon=None):
         super().__init__(parent=parent_camera)
-        
-        self.gun_root = Entity(parent=self, position=(0.5, -0.4, 0.6), scale=0.5)
-        
-        # 改进的枪模 - 更详细的AK47
-        # 枪身主体 - 深灰色
-        Entity(parent=self.gun_root, model='cube', scale=(0.12, 0.18, 0.9), color=color.dark_gray, position=(0, 0, 0))
-        
-        # 枪管 - 黑色
-        barrel = Entity(parent=self.gun_root, model='cube', scale=(0.06, 0.06, 0.5), color=color.black, position=(0, 0.05, 0.7))
-        
-        # 枪口装置 - 深灰色
-        Entity(parent=barrel, model='cube', scale=(1.3, 1.3, 0.2), color=color.rgb(60, 60, 60), position=(0, 0, 0.6))
-        
-        # 握把 - 棕色
-        Entity(parent=self.gun_root, model='cube', scale=(0.08, 0.45, 0.15), position=(0, -0.25, 0), rotation=(-15,0,0), color=color.brown)
-        
-        # 弹匣 - 深灰色
-        Entity(parent=self.gun_root, model='cube', scale=(0.1, 0.35, 0.12), position=(0, -0.15, 0.1), color=color.rgb(70, 70, 70), rotation=(10, 0, 0))
-        
-        # 准星 - 黑色
-        Entity(parent=self.gun_root, model='cube', scale=(0.02, 0.06, 0.02), position=(0, 0.12, 0.8), color=color.black)
-        
-        # 枪托 - 棕色
-        Entity(parent=self.gun_root, model='cube', scale=(0.12, 0.22, 0.35), position=(0, -0.05, -0.55), color=color.rgb(139, 90, 43))
-        
-        # 护木 - 棕色
-        Entity(parent=self.gun_root, model='cube', scale=(0.1, 0.12, 0.4), position=(0, -0.08, 0.3), color=color.rgb(139, 90, 43))
-
-        # 枪口火焰（改进版）
-        self.muzzle_flash = Entity(parent=barrel, model='sphere', color=color.yellow, scale=0.4, position=(0, 0, 0.7), enabled=False)
+
+        self.gun_root = Entity(parent=self)
+        self.models = {}   # 武器名 -> 共享烘焙网格的实例节点
+
+        # 枪口锚点（位置和缩放来自数据文件）；火焰挂在锚点下，切枪时只移动锚点
+        self.muzzle = Entity(parent=self.gun_root)
+        self.muzzle_flash = Entity(parent=self.muzzle, model='sphere', color=color.yellow, scale=0.4, enabled=False)
         Entity(parent=self.muzzle_flash, model='quad', color=color.orange, scale=0.6, billboard=True, texture='circle', alpha=0.8)
 
-        self.ammo = Config.AMMO
-        self.on_cooldown = False
-        self.recoil_offset = Vec3(0, 0, 0)
+        self.definition = None
+        self.ammo = 0
+        self.ammo_by_weapon = {}   # 切枪时保存各武器的剩余弹药
+        self.cooldown = 0.0        # 距离下一发还要等的模拟时间（按固定步长递减）
+        self.trigger_held = False  # 自动武器按住左键
         self.is_reloading = False  # 新增：换弹状态标记
-        
-        # 加载音效（尝试多种格式）
-        self.sfx_shoot = safe_load_audio('assets/shot.wav')
-        # 尝试加载 reload 音效（支持 wav, mp3, ogg）
-        self.sfx_reload = safe_load_audio('assets/reload.wav')
-        if not self.sfx_reload:
-            self.sfx_reload = safe_load_audio('assets/reload.mp3')
-        if not self.sfx_reload:
-            self.sfx_reload = safe_load_audio('assets/reload.ogg')
-        # 如果都没有，临时使用 shot.wav（音调降低）
-        if not self.sfx_reload:
-            print("警告: 找不到 reload 音效，使用 shot.wav 代替")
-            self.sfx_reload = safe_load_audio('assets/shot.wav')
-        self.sfx_hit = safe_load_audio('assets/hit.wav')
+        self.spread = 0.0          # 当前散布：连射时增大，停火后恢复（HUD 准星跟随）
+        self.recoil = 0.0          # 后坐力 0~1：开火时置 1，随后指数恢复
+        self.shot_index = 0        # 连射中的第几发，用于查后坐力图案
+        self.sfx_shoot = self.sfx_reload = self.sfx_hit = None
+
+        # 预分配子弹，避免开火时创建场景节点（火焰、弹壳、火花走向量化粒子系统）
+        entity_pool.preallocate(PlayerBullet, Config.POOL_PLAYER_BULLETS)
+        self.equip(weapon or weapons.default.name)
+
+    @property
+    def magazine(self):
+        return self.definition.magazine
+
+    def equip(self, name):
+        """切换到 name 武器：换显示的枪模实例、属性和音效，不创建新实体。返回是否切换"""
+        definition = weapons.get(name)
+        if definition is None or definition is self.definition:
+            return False
+        timers.cancel_owner(self)
+        if self.is_reloading:
+            # 换弹被切枪打断：弹匣保持换弹前的数量，HUD 的换弹提示一并收起
+            hud = self.hud()
+            if hud:
+                hud.hide_reload_indicator()
+        if self.definition:
+            self.ammo_by_weapon[self.definition.name] = self.ammo
+            self.models[self.definition.name].hide()
+
+        model = self.models.get(name)
+        if model is None:
+            model = self.models[name] = instance_model(viewmodel_mesh(definition), 'viewmodel_' + name)
+            model.reparentTo(self.gun_root)
+        model.show()
+
+        d = self.definition = definition
+        self.ammo = self.ammo_by_weapon.get(name, d.magazine)
+        self.cooldown = 0.0
+        self.is_reloading = False
+        self.spread = d.spread_base
+        self.recoil = 0.0
+        self.shot_index = 0
+        self.muzzle.position = d.muzzle_position
+        self.muzzle.scale = d.muzzle_scale
+        self.muzzle_flash.enabled = False
+        self.set_rest_pose()
+
+        self.sfx_shoot = load_first_audio(d.sound_shoot)
+        self.sfx_reload = load_first_audio(d.sound_reload)
+        self.sfx_hit = load_first_audio(d.sound_hit)
+        return True
+
+    def hud(self):
+        """持枪玩家的 HUD（武器挂在 camera 下，camera.parent.parent 是玩家）"""
+        player = getattr(camera.parent, 'parent', None)
+        return getattr(player, 'hud_ref', None)
+
+    def set_rest_pose(self):
+        for animation in self.gun_root.animations:
+            animation.kill()
+        self.gun_root.animations.clear()
+        self.gun_root.position = self.definition.view_position
+        self.gun_root.rotation = (0, 0, 0)
+        self.gun_root.scale = self.definition.view_scale
+
+    def recover_pose(self, duration, curve=curve.linear):
+        """枪模回到持枪姿态"""
+        self.gun_root.animate_position(self.definition.view_position, duration=duration, curve=curve)
+        self.gun_root.animate_rotation((0, 0, 0), duration=duration, curve=curve)
+
+    def on_destroy(self):
+        timers.cancel_owner(self)
+
+    def reset(self):
+        """重开一局：所有武器弹药补满，换回默认武器，冷却、换弹状态和枪模姿态恢复初始值"""
+        timers.cancel_owner(self)
+        self.equip(weapons.default.name)
+        self.ammo_by_weapon.clear()
+        d = self.definition
+        self.ammo = d.magazine
+        self.cooldown = 0.0
+        self.is_reloading = False
+        self.spread = d.spread_base
+        self.recoil = 0.0
+        self.shot_index = 0
+        self.set_rest_pose()
+        self.muzzle_flash.enabled = False
+        self.enabled = True
+        self.visible = True
 
     def shoot(self):
         # 换弹期间不能射击
         if self.is_reloading:
             return
-            
+
         if self.ammo <= 0: return
 
-        if not self.on_cooldown:
-            self.on_cooldown = True
+        if self.cooldown <= 0:
+            d = self.definition
+            self.cooldown = d.fire_interval
             self.ammo -= 1
-            
+
             if self.sfx_shoot:
-                self.sfx_shoot.pitch = random.uniform(0.9, 1.1)
-                self.sfx_shoot.play()
-            
-            # 后坐力动画（更强烈）
-            self.gun_root.animate_position((0.5, -0.35, 0.35), duration=0.05, curve=curve.linear)
-            self.gun_root.animate_rotation((-12, random.uniform(-2, 2), 0), duration=0.05)
-            
+                self.sfx_shoot.play(pitch=random.uniform(*d.sound_pitch), priority=PRIORITY_HIGH)
+
+            # 后坐力动画（枪模后移上抬）
+            rest = Vec3(*d.view_position)
+            self.gun_root.animate_position(rest + Vec3(*d.kick_offset), duration=0.05, curve=curve.linear)
+            self.gun_root.animate_rotation((d.kick_pitch, random.uniform(-d.kick_yaw, d.kick_yaw), 0), duration=0.05)
+
             # 枪口火焰
             self.muzzle_flash.enabled = True
-            self.muzzle_flash.scale = random.uniform(0.3, 0.5)
-            invoke(setattr, self.muzzle_flash, 'enabled', False, delay=0.05)
-            
+            self.muzzle_flash.scale = random.uniform(*d.muzzle_flash_size)
+            timers.schedule(0.05, setattr, self.muzzle_flash, 'enabled', False, owner=self, key='muzzle_flash')
+
             # 生成枪口粒子
             muzzle_pos = camera.world_position + camera.forward * 1.2 + camera.up * 0.1
-            for i in range(5):
-                MuzzleParticle(position=muzzle_pos, direction=camera.forward)
-            
+            emit_muzzle_flash(muzzle_pos, camera.forward)
+
             # 弹壳抛出
             casing_pos = camera.world_position + camera.right * 0.3 + camera.up * 0.1
-            BulletCasing(position=casing_pos, direction=camera.forward)
-            
-            # 射击散布（后坐力影响精度）
-            spread = random.uniform(-0.02, 0.02)
-            direction = camera.forward + Vec3(spread, spread * 0.5, 0)
+            emit_bullet_casing(casing_pos, camera.forward)
+
+            # 后坐力图案（连射第几发决定枪口上跳 / 左右偏移）+ 随机散布（连射时逐渐变大）
+            pitch, yaw = d.recoil_at(self.shot_index)
+            self.shot_index += 1
+            spread = random.uniform(-self.spread, self.spread)
+            direction = (camera.forward + camera.up * math.tan(math.radians(pitch))
+                         + camera.right * math.tan(math.radians(yaw)) + Vec3(spread, spread * 0.5, 0))
             direction = direction.normalized()
-            
+            self.spread = min(d.spread_max, self.spread + d.spread_per_shot)
+            self.recoil = 1.0
+
+            # 子弹交给模拟核心推进和结算
             spawn_pos = camera.world_position + camera.forward * 1.5
-            PlayerBullet(position=spawn_pos, direction=direction, hit_sound=self.sfx_hit)
+            if LevelManager.active:
+                LevelManager.active.sim.fire(spawn_pos, direction, d.damage, d.headshot_multiplier)
 
-            # 恢复动画
-            invoke(self.gun_root.animate_position, (0.5, -0.4, 0.6), duration=0.15, delay=0.05)
-            invoke(self.gun_root.animate_rotation, (0, 0, 0), duration=0.15, delay=0.05)
-            
-            invoke(setattr, self, 'on_cooldown', False, delay=Config.FIRE_RATE)
+            # 恢复动画（连射时只保留最后一次）
+            timers.schedule(0.05, self.recover_pose, 0.15, owner=self, key='recover_pose')
 
     def reload(self):
+        d = self.definition
         # 已经在换弹或弹药已满时不能换弹
-        if self.is_reloading or self.ammo >= Config.AMMO_CAPACITY:
+        if self.is_reloading or self.ammo >= d.magazine:
             return
-            
+
         self.is_reloading = True
-        self.ammo = Config.AMMO_CAPACITY
-        
+
         # 播放换弹音效并获取时长
-        reload_duration = 2.0  # 默认换弹时长
+        reload_duration = d.reload_time  # 默认换弹时长
         if self.sfx_reload:
-            self.sfx_reload.play()
-            # 尝试获取音效实际时长（length 是属性，不是方法）
-            try:
-                if hasattr(self.sfx_reload, 'length') and self.sfx_reload.length:
-                    reload_duration = self.sfx_reload.length
-                elif hasattr(self.sfx_reload, 'duration') and self.sfx_reload.duration:
-                    reload_duration = self.sfx_reload.duration
-            except:
-                # 如果获取失败，使用默认值
-                reload_duration = 2.0
-        
+            self.sfx_reload.play(priority=PRIORITY_HIGH)
+            # 使用音效实际时长
+            if self.sfx_reload.length:
+                reload_duration = self.sfx_reload.length
+
         # 显示换弹提示（通过玩家的 HUD 引用）
-        try:
-            if hasattr(camera, 'parent') and hasattr(camera.parent, 'parent'):
-                player = camera.parent.parent
-                if hasattr(player, 'hud_ref') and player.hud_ref:
-                    player.hud_ref.show_reload_indicator(reload_duration)
-        except:
-            pass  # 如果无法访问 HUD，继续换弹
-        
+        hud = self.hud()
+        if hud:
+            hud.show_reload_indicator(reload_duration)
+
         # 换弹动画
-        self.gun_root.animate_rotation((30, 0, -30), duration=reload_duration * 0.4, curve=curve.in_out_cubic)
-        self.gun_root.animate_position((0.3, -0.6, 0.4), duration=reload_duration * 0.4, curve=curve.in_out_cubic)
-        
-        invoke(self.gun_root.animate_rotation, (0, 0, 0), duration=reload_duration * 0.4, curve=curve.in_out_cubic, delay=reload_duration * 0.5)
-        invoke(self.gun_root.animate_position, (0.5, -0.4, 0.6), duration=reload_duration * 0.4, curve=curve.in_out_cubic, delay=reload_duration * 0.5)
-        
-        # 换弹完成后解除锁定
-        invoke(setattr, self, 'is_reloading', False, delay=reload_duration)
+        self.gun_root.animate_rotation(d.reload_rotation, duration=reload_duration * 0.4, curve=curve.in_out_cubic)
+        self.gun_root.animate_position(d.reload_position, duration=reload_duration * 0.4, curve=curve.in_out_cubic)
+
+        timers.schedule(reload_duration * 0.5, self.recover_pose, reload_duration * 0.4, curve.in_out_cubic,
+                        owner=self, key='recover_pose')
+
+        # 换弹完成时才补满弹匣并解除锁定（中途切枪会取消这个定时器）
+        timers.schedule(reload_duration, self._finish_reload, owner=self, key='reload')
+
+    def _finish_reload(self):
+        self.ammo = self.definition.magazine
+        self.is_reloading = False
+
+    def update(self):
+        self.trigger_held = self.definition.automatic and held_keys['left mouse'] and mouse.locked
+
+    def fixed_update(self, dt):
+        """由 LevelManager 在每个模拟步之前调用：冷却、连射、散布和后坐力恢复都按固定步长推进"""
+        d = self.definition
+        if self.cooldown > 0:
+            self.cooldown -= dt
+            if self.cooldown < 1e-6:   # 1/60 之类的步长累减后的舍入误差
+                self.cooldown = 0.0
+        # 自动武器按住左键连射（射速由冷却控制）
+        if self.trigger_held:
+            self.shoot()
+
+        # 散布和后坐力都指数恢复；后坐力完全恢复后图案从第一发重新开始
+        if self.spread > d.spread_base:
+            excess = (self.spread - d.spread_base) * math.exp(-d.spread_recovery * dt)
+            self.spread = d.spread_base + excess if excess > 1e-4 else d.spread_base
+        if self.recoil:
+            self.recoil *= math.exp(-d.recoil_recovery * dt)
+            if self.recoil < 0.01:
+                self.recoil = 0.0
+                self.shot_index = 0
 
     def input(self, key):
         if key == 'left mouse down' and mouse.locked: self.shoot()
-        if key == 'r': self.reload()
\ No newline at end of file
+        if key == 'r': self.reload()
+        # 数字键按槽位切枪，滚轮循环切换
+        if key.isdigit():
+            names = weapons.names
+            index = int(key) - 1
+            if 0 <= index < len(names):
+                self.equip(names[index])
+        if key in ('scroll up', 'scroll down'):
+            names = weapons.names
+            step = 1 if key == 'scroll up' else -1
+            self.equip(names[(names.index(self.definition.name) + step) % len(names)])
\ No newline at end of file
@@ -0,0 +1,53 @@
+# headless.py
+# 无窗口批量对局：只运行模拟核心（core/simulation.py），由 AutoPilot 代替玩家，不需要 GPU
+# 用法：python headless.py --matches 100 --seed 1
+#       python headless.py --matches 20 --record replays   （每局录像，用 replay.py 回放）
+#       python headless.py --matches 5 --horde               （尸潮模式，core/horde.py）
+from core.simulation import Simulation
+from core.horde import HordeSimulation
+from core.arena import generate_arena
+from core.autopilot import AutoPilot
+from core.replay import record_match
+from core.config import Config
+from pathlib import Path
+import argparse
+import random
+import time
+
+def run_match(seed, max_time=Config.SIM_MAX_MATCH_TIME, record_dir=None, horde=False):
+    if record_dir:
+        return record_match(Path(record_dir) / f'match_{seed}.rpl', seed, AutoPilot(random.Random(seed)), max_time)
+    walls, pickups = generate_arena(random.Random(seed))
+    sim = (HordeSimulation if horde else Simulation)(walls, pickups, seed=seed)
+    return sim.run(AutoPilot(random.Random(seed)), max_time)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run matches headless on the simulation core')
+    parser.add_argument('--matches', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0, help='第 i 局使用 seed + i')
+    parser.add_argument('--max-time', type=float, default=Config.SIM_MAX_MATCH_TIME, help='每局最长模拟时间（秒）')
+    parser.add_argument('--record', metavar='DIR', help='把每局录像写到该目录')
+    parser.add_argument('--horde', action='store_true', help='尸潮模式（不支持录像）')
+    args = parser.parse_args()
+    if args.record and args.horde:
+        parser.error('尸潮模式不支持录像')
+    if args.record:
+        Path(args.record).mkdir(parents=True, exist_ok=True)
+
+    results = []
+    start = time.perf_counter()
+    for i in range(args.matches):
+        t0 = time.perf_counter()
+        result = run_match(args.seed + i, args.max_time, args.record, args.horde)
+        result['wall_time'] = round(time.perf_counter() - t0, 3)
+        results.append(result)
+        print(result)
+
+    elapsed = time.perf_counter() - start
+    sim_time = sum(r['time'] for r in results)
+    wins = sum(r['state'] == 'victory' for r in results)
+    print(f'{len(results)} matches, {wins} victories, {sim_time:.0f}s simulated in {elapsed:.1f}s '
+          f'({sim_time / max(elapsed, 1e-9):.0f}x real time)')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
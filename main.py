@@ -1,114 +1,69 @@
 # main.py
 from ursina import *
 from core.config import Config
-from core.utils import safe_load_texture
-from entities.player import Player
-from entities.props import HealthPack
-from core.level_manager import LevelManager
+from core.world import World
+from core.profiler import profiler, FrameHistory, install_render_timer, install_frame_recorder
 from ui.menu import MainMenu
-from ui.hud import HUD
+from ui.hud import ProfilerOverlay
+from core.assets import assets
+from core.timers import timers, install_timer_task
+from core.pool import entity_pool
+from entities.enemy import enemy_mesh
+from entities.weapon import bake_viewmodels
+from entities.projectiles import PlayerBullet
+from entities.particles import particle_system
 
 app = Ursina()
 window.title = Config.WINDOW_TITLE
 window.vsync = True
 
+# 性能面板（F3 显示，F4 导出 CSV），从启动开始一直记录
+frame_history = FrameHistory(Config.PROFILER_HISTORY)
+install_render_timer(app, profiler)
+install_frame_recorder(app, profiler, frame_history)
+install_timer_task(app, timers)
+profiler_overlay = ProfilerOverlay(frame_history)
+
 # 全局变量
 game_state = "menu" 
+world = None
 player = None
 hud = None
 level_manager = None
-env_entities = []
 game_over_text = None
 
-def clear_scene():
-    global player, hud, level_manager, env_entities, game_over_text
-    
-    # 先清理关卡管理器中的敌人
-    if level_manager and hasattr(level_manager, 'enemies_alive'):
-        for enemy in level_manager.enemies_alive:
-            if enemy:
-                destroy(enemy)
-        level_manager.enemies_alive.clear()
-    
-    if player: destroy(player)
-    if hud: destroy(hud)
-    if level_manager: destroy(level_manager)
+def clear_game_over_text():
+    global game_over_text
     if game_over_text: destroy(game_over_text)
-    
-    for e in env_entities: 
-        destroy(e)
-    env_entities.clear()
-    
-    # 清理所有名为 'enemy' 的实体（双重保险）
-    for e in list(scene.entities):
-        if e and hasattr(e, 'name') and e.name == 'enemy':
-            destroy(e)
-    
-    player = None
-    hud = None
-    level_manager = None
     game_over_text = None
 
-def create_level():
-    global player, hud, level_manager, env_entities
-    
-    # 环境生成
-    sky = Sky(texture='sky_default')
-    env_entities.append(sky)
-    
-    light = DirectionalLight(y=10, rotation=(90, 45, 0))
-    env_entities.append(light)
-    
-    tex_ground = safe_load_texture('assets/floor.png', fallback='grass')
-    ground = Entity(model='plane', scale=(100,1,100), texture=tex_ground, texture_scale=(50,50), collider='box')
-    env_entities.append(ground)
+def create_level(horde=False):
+    global world, player, hud, level_manager
     
-    tex_wall = safe_load_texture('assets/wall.png', fallback='brick')
-    borders = [(50, 0, 1, 100), (-50, 0, 1, 100), (0, 50, 100, 1), (0, -50, 100, 1)]
-    for b in borders:
-        wall = Entity(model='cube', position=(b[0], 5, b[1]), scale=(b[2], 10, b[3]), 
-                      texture=tex_wall, texture_scale=(b[2]/2, 5), collider='box', color=color.gray)
-        env_entities.append(wall)
+    world = World(on_death_callback=game_over, on_victory_callback=game_victory, horde=horde)
+    player, hud, level_manager = world.player, world.hud, world.level_manager
 
-    for i in range(15):
-        rx = random.randint(-40, 40)
-        rz = random.randint(-40, 40)
-        if math.sqrt(rx**2 + rz**2) < 10:
-            if rx > 0: rx += 15
-            else: rx -= 15
-        wall = Entity(model='cube', scale=(random.randint(4,8), random.randint(3,6), random.randint(4,8)), 
-                      position=(rx, 1.5, rz), 
-                      texture=tex_wall, collider='box', color=color.white)
-        wall.rotation_y = random.randint(0, 90)
-        env_entities.append(wall)
-
-    player = Player(position=(0, 2, 0), on_death_callback=game_over)
-    player.name = 'player'
-    
-    hud = HUD()
-    player.hud_ref = hud
-    
-    for i in range(5):
-        hx = random.randint(-40, 40)
-        hz = random.randint(-40, 40)
-        hp_pack = HealthPack(position=(hx, 1, hz), player_ref=player)
-        env_entities.append(hp_pack)
-
-    # --- 关键修改：传入 on_victory_callback ---
-    level_manager = LevelManager(player, on_victory_callback=game_victory)
-
-def start_game():
-    global game_state
+def start_game(horde=False):
+    global game_state, world
+    assets.finish()   # 预热还没结束时在这里等完
     menu.hide()
-    clear_scene()
-    create_level()
+    clear_game_over_text()
+    # 换模式时重建场景（关卡管理器和模拟核心不同）
+    if world and world.horde != horde:
+        world.destroy()
+        world = None
+    # 第一局创建场景，之后原地重开（墙体、玩家、HUD 复用）
+    if world: world.reset()
+    else: create_level(horde)
     game_state = "playing"
     mouse.locked = True
     mouse.visible = False
 
 def return_to_menu():
     global game_state
-    clear_scene()
+    timers.cancel_key('return_to_menu')   # 按 ESC 提前返回时取消结算画面的定时返回
+    clear_game_over_text()
+    if world: world.set_active(False)
     menu.show()
     game_state = "menu"
     mouse.locked = False
@@ -132,7 +87,7 @@ def game_victory():
     game_over_text = Text(text='VICTORY!', scale=4, origin=(0,0), color=color.green, background=True)
     
     # 4秒后回菜单
-    invoke(return_to_menu, delay=4)
+    timers.schedule(4, return_to_menu, key='return_to_menu')
 
 def game_over():
     global game_state, game_over_text
@@ -143,9 +98,18 @@ def game_over():
     mouse.visible = True
     
     game_over_text = Text(text='GAME OVER', scale=4, origin=(0,0), color=color.red, background=True)
-    invoke(return_to_menu, delay=3)
-
-menu = MainMenu(start_callback=start_game, exit_callback=application.quit)
+    timers.schedule(3, return_to_menu, key='return_to_menu')
+
+# 主菜单显示期间在后台预热贴图、音效和模型，点 PLAY 时不再读盘
+assets.start(warmups=(
+    ('enemy model', enemy_mesh),
+    ('enemy flash model', lambda: enemy_mesh(flash=True)),
+    ('weapon models', bake_viewmodels),
+    ('player bullets', lambda: entity_pool.preallocate(PlayerBullet, Config.POOL_PLAYER_BULLETS)),
+    ('particles', particle_system),
+))
+menu = MainMenu(start_callback=start_game, exit_callback=application.quit, assets=assets,
+                horde_callback=lambda: start_game(horde=True))
 
 def input(key):
     global game_state
@@ -153,10 +117,4 @@ def input(key):
         if game_state == "playing": 
             return_to_menu()
 
-def update():
-    if game_state == "playing" and player and player.enabled and hud:
-        hud.update_hp(player.hp, Config.PLAYER_HP)
-        hud.update_ammo(player.weapon.ammo, Config.AMMO_CAPACITY)
-        if player.y < -10: player.take_damage(999)
-
 app.run()
\ No newline at end of file
@@ -0,0 +1,67 @@
+# replay.py
+# 回放对局录像（core/replay.py）：逐步校验回放与录像一致，或者从某个波次开始统计模拟各子系统的耗时
+# 用法：python headless.py --matches 20 --record replays       （录制，第 i 局为 replays/match_<seed>.rpl）
+#       python replay.py replays/match_17.rpl                   （完整回放并校验）
+#       python replay.py replays/match_17.rpl --wave 5 --profile
+from core.replay import ReplayFile, ReplayPlayer, ReplayDivergence
+from core.profiler import profiler
+import argparse
+import json
+import sys
+import time
+
+def profile_steps(player, start, end):
+    """回放 [start, end) 步，返回每步各子系统耗时的均值和 p95（毫秒）"""
+    profiler.end_frame()
+    samples = {}
+    step_ms = []
+    while player.index < end:
+        t0 = time.perf_counter()
+        player.step(verify=False)
+        step_ms.append((time.perf_counter() - t0) * 1000)
+        for name, ms in profiler.end_frame().items():
+            samples.setdefault(name, []).append(ms)
+    n = max(len(step_ms), 1)
+    result = {'steps': len(step_ms), 'step': stats(step_ms, n)}
+    result.update({name: stats(v, n) for name, v in sorted(samples.items())})
+    return result
+
+def stats(values, n):
+    s = sorted(values)
+    return {'mean': round(sum(s) / n, 4), 'p95': round(s[int((len(s) - 1) * 0.95)], 4) if s else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded match on the simulation core')
+    parser.add_argument('path')
+    parser.add_argument('--wave', type=int, help='快进到该波次第一步再开始校验 / 统计')
+    parser.add_argument('--ticks', type=int, help='最多回放多少步（从起点算）')
+    parser.add_argument('--profile', action='store_true', help='统计模拟各子系统耗时（不做校验）')
+    parser.add_argument('--no-verify', action='store_true')
+    args = parser.parse_args()
+
+    replay = ReplayFile(args.path)
+    player = ReplayPlayer(replay)
+    start = 0
+    if args.wave is not None:
+        start = replay.first_tick_of_wave(args.wave)
+        if start is None:
+            sys.exit(f'录像中没有第 {args.wave} 波（共 {len(replay)} 步）')
+    end = len(replay) if args.ticks is None else min(len(replay), start + args.ticks)
+    print(f'{args.path}: {len(replay)} 步, 种子 {replay.seed}, 地图种子 {replay.arena_seed}, '
+          f'从第 {start} 步回放到第 {end} 步', file=sys.stderr)
+
+    t0 = time.perf_counter()
+    player.seek(start)
+    if args.profile:
+        print(json.dumps(profile_steps(player, start, end), indent=2, ensure_ascii=False))
+    else:
+        try:
+            while player.index < end:
+                player.step(verify=not args.no_verify)
+        except ReplayDivergence as e:
+            sys.exit(str(e))
+        print(player.sim.summary())
+    print(f'{time.perf_counter() - t0:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,96 @@
+# server.py
+# 专用服务器：无窗口、在 asyncio UDP 上运行权威模拟（core/net_server.py），客户端协议见 core/netcode.py
+# 用法：python server.py --port 27015 --seed 1
+#       python server.py --selftest --clients 2 --latency 80 --jitter 10 --loss 0.05 --seconds 10
+#       （回环自测：同一进程里起服务器和若干机器人客户端，双向模拟延迟 / 丢包，输出服务器和客户端指标的 JSON）
+from core.config import Config
+from core.net_server import MatchServer
+from core.net_client import NetClient
+import argparse
+import asyncio
+import json
+import sys
+
+async def serve(args):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(lambda: MatchServer(seed=args.seed),
+                                                            local_addr=(args.host, args.port))
+    print(f'listening on {args.host}:{args.port}, seed {server.seed}', file=sys.stderr)
+    try:
+        await server.run(args.seconds)
+    finally:
+        transport.close()
+    return server.metrics()
+
+async def selftest(args):
+    """回环测试：单向延迟取 latency 的一半，两端各自按 loss 丢包"""
+    loop = asyncio.get_running_loop()
+    one_way = args.latency / 2000
+    jitter = args.jitter / 1000
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: MatchServer(seed=args.seed, latency=one_way, jitter=jitter, loss=args.loss),
+        local_addr=('127.0.0.1', 0))
+    addr = transport.get_extra_info('sockname')
+
+    clients = []
+    for i in range(args.clients):
+        _, client = await loop.create_datagram_endpoint(
+            lambda i=i: NetClient(latency=one_way, jitter=jitter, loss=args.loss, seed=(args.seed or 0) + i + 1),
+            remote_addr=addr)
+        clients.append(client)
+
+    tasks = [asyncio.ensure_future(server.run())] + [asyncio.ensure_future(c.run()) for c in clients]
+    await asyncio.sleep(args.seconds)
+    result = {
+        'latency_ms': args.latency, 'jitter_ms': args.jitter, 'loss': args.loss, 'seconds': args.seconds,
+        'server': server.metrics(),
+        'clients': [c.metrics() for c in clients],
+    }
+    server.running = False
+    for c in clients:
+        c.running = False
+    await asyncio.gather(*tasks)
+    for c in clients:
+        c.close()
+    transport.close()
+
+    failures = [f'client {i}: no snapshots' for i, c in enumerate(clients) if not c.snapshots]
+    failures += [f'client {i}: {c.undecodable} undecodable deltas' for i, c in enumerate(clients)
+                 if c.undecodable and not args.loss]
+    result['ok'] = not failures
+    result['failures'] = failures
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Authoritative headless match server over UDP')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=Config.NET_PORT)
+    parser.add_argument('--seed', type=int, help='地图与模拟的随机种子')
+    parser.add_argument('--seconds', type=float, help='运行多长时间（秒），默认一直运行；自测默认 10')
+    parser.add_argument('--selftest', action='store_true', help='回环自测：服务器 + 机器人客户端')
+    parser.add_argument('--clients', type=int, default=2, help='自测的客户端数（第一个操控，其余观战）')
+    parser.add_argument('--latency', type=float, default=80, help='自测的往返延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=10, help='自测的单向抖动（毫秒）')
+    parser.add_argument('--loss', type=float, default=0.05, help='自测的单向丢包率')
+    parser.add_argument('--out', help='指标写入 JSON 文件，默认打印到标准输出')
+    args = parser.parse_args()
+
+    try:
+        if args.selftest:
+            args.seconds = args.seconds or 10
+            result = asyncio.run(selftest(args))
+        else:
+            result = asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        return
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.selftest and not result['ok']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+# AI 调度器测试 - 同一步生成的一大波降频敌人，每步的思考次数应保持平稳（python -m pytest test_ai_scheduler.py，或直接运行）
+from core.ai_scheduler import AIScheduler
+from core.config import Config
+from collections import Counter
+import math
+
+DT = 1 / 60
+
+class Point:
+    def __init__(self, x, z):
+        self.x, self.z = x, z
+
+
+def ring(count, radius):
+    return [Point(radius * math.cos(i * 2 * math.pi / count), radius * math.sin(i * 2 * math.pi / count))
+            for i in range(count)]
+
+
+def run(enemies, seconds):
+    """同一步加入全部敌人，返回每步的思考次数和每个敌人的思考次数"""
+    thinks = Counter()
+    ai = AIScheduler(Point(0, 0), lambda e, dt: thinks.update([id(e)]))
+    for e in enemies:
+        ai.add(e)
+    per_step = []
+    for i in range(round(seconds / DT)):
+        ai.update(DT)
+        per_step.append(ai.ticks_last_frame)
+    return per_step, thinks
+
+
+def test_wave_load_is_flat():
+    """中距离和远距离各 150 个敌人：每步的思考次数接近平均值，没有周期性的尖峰"""
+    mid = ring(150, (Config.AI_NEAR_DIST + Config.AI_MID_DIST) / 2)
+    far = ring(150, Config.AI_MID_DIST + 10)
+    per_step, thinks = run(mid + far, 5)
+
+    mean = 150 * DT / Config.AI_MID_INTERVAL + 150 * DT / Config.AI_FAR_INTERVAL   # 25 + 10
+    assert max(per_step) <= mean * 1.3, (max(per_step), mean)
+    assert min(per_step) >= mean * 0.7, (min(per_step), mean)
+
+    # 错开相位不改变思考频率：每个敌人 5 秒内思考 interval 对应的次数
+    for group, interval in ((mid, Config.AI_MID_INTERVAL), (far, Config.AI_FAR_INTERVAL)):
+        expected = 5 / interval
+        assert all(abs(thinks[id(e)] - expected) <= 1 for e in group)
+
+
+def test_near_enemy_thinks_next_step():
+    near = Point(Config.AI_NEAR_DIST / 2, 0)
+    per_step, thinks = run([near], 0.5)
+    assert per_step == [1] * len(per_step)
+
+
+def test_phases_depend_only_on_add_order():
+    """相位只由加入顺序决定，同样的输入得到同样的调度（录像 / 联机预测需要）"""
+    a, _ = run(ring(64, Config.AI_MID_DIST + 5), 2)
+    b, _ = run(ring(64, Config.AI_MID_DIST + 5), 2)
+    assert a == b
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(name, 'ok')
\ No newline at end of file
@@ -0,0 +1,119 @@
+# 时间轮测试 - 与按到期 tick 排序的朴素调度器逐 tick 对比（python -m pytest test_timers.py，或直接运行）
+from core.timers import TimerWheel
+import bisect
+import random
+
+class NaiveScheduler:
+    """参照实现：所有定时器放在一个按 (到期 tick, 序号) 排序的列表里，每步弹出到期的"""
+
+    def __init__(self):
+        self.now = 0
+        self.queue = []     # [(expire, seq, id, owner, key)]
+        self.seq = 0
+
+    def schedule(self, delay, id, owner=None, key=None):
+        if key is not None:
+            self.cancel_key(key, owner)
+        self.seq += 1
+        bisect.insort(self.queue, (self.now + max(1, delay), self.seq, id, owner, key))
+
+    def cancel_key(self, key, owner=None):
+        self.queue = [t for t in self.queue if not (t[4] == key and t[3] == owner)]
+
+    def cancel_owner(self, owner):
+        self.queue = [t for t in self.queue if t[3] != owner]
+
+    def step(self):
+        self.now += 1
+        k = bisect.bisect_right(self.queue, (self.now, float('inf')))
+        due, self.queue = self.queue[:k], self.queue[k:]
+        return sorted(t[2] for t in due)
+
+    @property
+    def pending(self):
+        return len(self.queue)
+
+
+def make_wheel():
+    # tick = 1 秒，延迟直接就是 tick 数；4 层 x 64 格：第 0 层 64 tick，第 1 层 4096，第 2 层 262144
+    return TimerWheel(tick=1.0, slots=64, levels=4)
+
+def step_wheel(wheel, fired):
+    fired.clear()
+    wheel.advance(1.0)
+    return sorted(fired)
+
+
+def test_matches_naive_scheduler():
+    """随机安排 / 合并 / 取消，延迟覆盖第 0~3 层，逐 tick 比较触发的定时器"""
+    rng = random.Random(1)
+    wheel, naive = make_wheel(), NaiveScheduler()
+    fired = []
+    owners = [object() for i in range(8)]
+    next_id = 0
+    horizon = 400000   # 超过第 2 层（262144 tick）的范围，最远的定时器要经过 3 次下放
+
+    for tick in range(horizon):
+        if tick % 97 == 0 and tick < 100000:
+            for i in range(rng.randint(1, 6)):
+                r = rng.random()
+                delay = (rng.randint(1, 63) if r < 0.4 else rng.randint(64, 4095) if r < 0.7
+                         else rng.randint(4096, 262143) if r < 0.9 else rng.randint(262144, 290000))
+                owner = rng.choice(owners + [None])
+                key = rng.choice((None, None, 'a', 'b'))
+                wheel.schedule(delay, fired.append, next_id, owner=owner, key=key)
+                naive.schedule(delay, next_id, owner, key)
+                next_id += 1
+            r = rng.random()
+            if r < 0.1:
+                owner = rng.choice(owners)
+                wheel.cancel_owner(owner)
+                naive.cancel_owner(owner)
+            elif r < 0.2:
+                owner, key = rng.choice(owners + [None]), rng.choice(('a', 'b'))
+                wheel.cancel_key(key, owner=owner)
+                naive.cancel_key(key, owner)
+
+        assert step_wheel(wheel, fired) == naive.step(), f'tick {wheel.now}'
+        assert wheel.pending == naive.pending, f'tick {wheel.now}'
+    assert naive.pending == 0 and wheel.pending == 0
+
+
+def test_cancel_during_cascade():
+    """到期回调在高层格子下放的同一个 tick 里取消刚被下放的定时器"""
+    wheel = make_wheel()
+    fired = []
+    owner = object()
+    # 4096 tick 处第 2 层的格子整体下放到低层；4096 本身也在这一步触发
+    wheel.schedule(4100, fired.append, 'cancelled_by_key', key='late')
+    wheel.schedule(4097, fired.append, 'cancelled_by_owner', owner=owner)
+    wheel.schedule(4098, fired.append, 'survivor')
+    wheel.schedule(4096, lambda: (wheel.cancel_key('late'), wheel.cancel_owner(owner), fired.append('trigger')))
+    # 下放之前就取消的定时器不能在下放时复活
+    h = wheel.schedule(5000, fired.append, 'cancelled_before_cascade')
+    wheel.cancel(h)
+
+    for i in range(6000):
+        wheel.advance(1.0)
+    assert fired == ['trigger', 'survivor']
+    assert wheel.pending == 0
+
+
+def test_keyed_timer_coalesces_across_levels():
+    """同一 (owner, key) 重新安排时，旧的定时器无论在哪一层都不会触发"""
+    wheel = make_wheel()
+    fired = []
+    owner = object()
+    wheel.schedule(10000, fired.append, 'old', owner=owner, key='k')   # 第 2 层
+    wheel.schedule(30, fired.append, 'new', owner=owner, key='k')      # 第 0 层
+    for i in range(12000):
+        wheel.advance(1.0)
+    assert fired == ['new']
+    assert wheel.stats['coalesced'] == 1 and wheel.pending == 0
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(name, 'ok')
\ No newline at end of file
@@ -1,32 +1,44 @@
 # ui/hud.py
 from ursina import *
 from core.config import Config
+from core.timers import timers
+from core.profiler import profiler
+from collections import Counter
+import numpy as np
+from pathlib import Path
+import datetime
+
+def bar_vertices(width, height, ratio):
+    """血条的两个矩形（左边缘中点为原点）：背景占满宽度，前景长 ratio * width、稍微靠前"""
+    verts = []
+    for w, z in ((width, 0), (width * ratio, -0.001)):
+        verts += [(0, -height / 2, z), (w, -height / 2, z), (w, height / 2, z), (0, height / 2, z)]
+    return verts
+
+def crosshair_mesh(gap, size, thickness):
+    """四条线段组成的准星；整体缩放时间隙和长度一起变化，线宽按像素不变"""
+    verts = []
+    for dx, dy in ((0, 1), (0, -1), (-1, 0), (1, 0)):
+        verts += [(dx * gap, dy * gap, 0), (dx * (gap + size), dy * (gap + size), 0)]
+    return Mesh(vertices=verts, triangles=[(i, i + 1) for i in range(0, 8, 2)], mode='line', thickness=thickness)
+
 
 class HUD(Entity):
+    """
+    保留模式的 HUD：外部只修改数值并标记脏区域，每帧在 update() 里统一刷新一次；
+    没有任何变化的帧只做几次比较。血条的背景和前景是同一个网格，准星是一个线段网格，只改一个变换
+    """
+    HP_BAR = (-0.6, -0.4, 0.4, 0.025)       # 血条左边缘中点 x, y 和宽、高
+
     def __init__(self):
         super().__init__(parent=camera.ui)
-        
-        # 动态准星（四个线段组成）
-        self.crosshair_size = 0.015
-        self.crosshair_gap = 0.01
-        self.crosshair_parts = []
-        
-        # 上
-        self.crosshair_parts.append(Entity(parent=self, model='quad', color=color.lime, 
-                                          scale=(0.002, self.crosshair_size), 
-                                          position=(0, self.crosshair_gap + self.crosshair_size/2)))
-        # 下
-        self.crosshair_parts.append(Entity(parent=self, model='quad', color=color.lime, 
-                                          scale=(0.002, self.crosshair_size), 
-                                          position=(0, -(self.crosshair_gap + self.crosshair_size/2))))
-        # 左
-        self.crosshair_parts.append(Entity(parent=self, model='quad', color=color.lime, 
-                                          scale=(self.crosshair_size, 0.002), 
-                                          position=(-(self.crosshair_gap + self.crosshair_size/2), 0)))
-        # 右
-        self.crosshair_parts.append(Entity(parent=self, model='quad', color=color.lime, 
-                                          scale=(self.crosshair_size, 0.002), 
-                                          position=(self.crosshair_gap + self.crosshair_size/2, 0)))
+        bx, by, bw, bh = self.HP_BAR
+
+        # 动态准星：一个线段网格，随武器的散布和后坐力缩放 / 上跳
+        self.crosshair = Entity(parent=self, model=crosshair_mesh(Config.CROSSHAIR_GAP, Config.CROSSHAIR_SIZE,
+                                                                   Config.CROSSHAIR_THICKNESS), color=color.lime)
+        self.weapon = None
+        self._crosshair_state = None
         
         # 弹药显示（更大更清晰）
         self.ammo_text = Text(parent=self, text='30 / 30', position=(0.7, -0.4), scale=2.5, origin=(0,0), color=color.white)
@@ -34,63 +46,240 @@ class HUD(Entity):
         # 换弹提示
         self.reload_text = Text(parent=self, text='RELOADING...', position=(0, -0.2), scale=2, origin=(0,0), color=color.yellow, enabled=False)
         
-        # 血条背景
-        self.hp_bar_bg = Entity(parent=self, model='quad', color=color.rgb(40, 40, 40), scale=(0.4, 0.025), position=(-0.6, -0.4), origin=(-0.5, 0))
-        # 实际血条
-        self.hp_bar = Entity(parent=self, model='quad', color=color.lime, scale=(0.4, 0.025), position=(-0.6, -0.4), origin=(-0.5, 0))
+        # 血条：背景和前景合并成一个带顶点色的网格，血量变化时只改前景的右边缘和颜色
+        self.hp_bar = Entity(parent=self, position=(bx, by), model=Mesh(
+            vertices=bar_vertices(bw, bh, 1), colors=[color.rgb(40, 40, 40)] * 4 + [color.lime] * 4,
+            triangles=[0, 1, 2, 2, 3, 0, 4, 5, 6, 6, 7, 4]))
         self.hp_text = Text(parent=self, text='HP: 100', position=(-0.6, -0.35), scale=1.8, color=color.white)
 
         # 受伤红色遮罩
-        self.damage_overlay = Entity(parent=self, model='quad', scale=(2, 1), color=color.red, alpha=0)
+        self.damage_overlay = Entity(parent=self, model='quad', scale=(2, 1), color=color.red, alpha=0, enabled=False)
+        self._damage_alpha = 0
         
         # 击杀计数
         self.kill_count = 0
         self.kill_text = Text(parent=self, text='Kills: 0', position=(-0.85, 0.45), scale=1.5, color=color.yellow)
 
-        # 性能优化：记录上一次的值
-        self._last_ammo = -1
-        self._last_hp = -1
+        # 保留的数值和待刷新的区域
+        self._ammo = (Config.AMMO_CAPACITY, Config.AMMO_CAPACITY)
+        self._hp = (Config.PLAYER_HP, Config.PLAYER_HP)
+        self._dirty = set()
+        self._flushers = {
+            'hp': self._flush_hp,
+            'ammo': self._flush_ammo,
+            'kills': self._flush_kills,
+            'damage': self._flush_damage,
+        }
+
+    def bind_weapon(self, weapon):
+        """准星和弹药直接读取该武器的状态"""
+        self.weapon = weapon
+        self._crosshair_state = None
+
+    def on_destroy(self):
+        timers.cancel_owner(self)
+
+    def reset(self):
+        """重开一局：击杀数清零，隐藏换弹提示和受伤遮罩，血量 / 弹药 / 准星在下一帧重新刷新"""
+        timers.cancel_owner(self)
+        self.kill_count = 0
+        self._end_kill_pulse()
+        self.reload_text.enabled = False
+        self._damage_alpha = 0
+        self._crosshair_state = None
+        self._dirty.update(self._flushers)
+
+    # ---------- 修改数值（只标记脏区域） ----------
 
     def update_ammo(self, current, max_ammo):
-        if current != self._last_ammo:
-            self.ammo_text.text = f'{current} / {max_ammo}'
-            # 弹药不足时变红
-            if current < max_ammo * 0.3:
-                self.ammo_text.color = color.red
-            else:
-                self.ammo_text.color = color.white
-            self._last_ammo = current
+        if (current, max_ammo) != self._ammo:
+            self._ammo = (current, max_ammo)
+            self._dirty.add('ammo')
 
     def update_hp(self, current_hp, max_hp):
-        if current_hp != self._last_hp:
-            current_hp = max(0, current_hp)
-            ratio = current_hp / max_hp
-            self.hp_bar.scale_x = 0.4 * ratio
-            self.hp_text.text = f'HP: {int(current_hp)}'
-            
-            if ratio < 0.3:
-                self.hp_bar.color = color.red
-            elif ratio < 0.6:
-                self.hp_bar.color = color.orange
-            else:
-                self.hp_bar.color = color.lime
-            
-            self._last_hp = current_hp
+        if (current_hp, max_hp) != self._hp:
+            self._hp = (current_hp, max_hp)
+            self._dirty.add('hp')
 
     def show_damage_effect(self):
-        self.damage_overlay.alpha = 0.5
-        self.damage_overlay.animate('alpha', 0, duration=0.5)
+        self._damage_alpha = 0.5
+        self._dirty.add('damage')
         
     def add_kill(self):
         self.kill_count += 1
-        self.kill_text.text = f'Kills: {self.kill_count}'
+        self._dirty.add('kills')
         # 修复：使用 scale_x, scale_y
         self.kill_text.scale_x = 2
         self.kill_text.scale_y = 2
-        invoke(setattr, self.kill_text, 'scale_x', 1.5, delay=0.2)
-        invoke(setattr, self.kill_text, 'scale_y', 1.5, delay=0.2)
+        timers.schedule(0.2, self._end_kill_pulse, owner=self, key='kill_pulse')
+
+    def _end_kill_pulse(self):
+        self.kill_text.scale_x = 1.5
+        self.kill_text.scale_y = 1.5
     
     def show_reload_indicator(self, duration=2.0):
         """显示换弹提示"""
         self.reload_text.enabled = True
-        invoke(setattr, self.reload_text, 'enabled', False, delay=duration)
\ No newline at end of file
+        timers.schedule(duration, setattr, self.reload_text, 'enabled', False, owner=self, key='reload_text')
+
+    def hide_reload_indicator(self):
+        """换弹被打断（切枪）时提前收起换弹提示"""
+        timers.cancel_key('reload_text', owner=self)
+        self.reload_text.enabled = False
+
+    # ---------- 每帧刷新 ----------
+
+    def update(self):
+        weapon = self.weapon
+        if weapon:
+            self.update_ammo(weapon.ammo, weapon.magazine)
+            self.update_crosshair(weapon.spread, weapon.recoil)
+        if self._dirty:
+            with profiler.section('hud'):
+                self.flush()
+
+    def flush(self):
+        """同一帧里的多次修改只在这里应用一次（Text 每次赋值都会重建全部字形）"""
+        dirty = self._dirty
+        self._dirty = set()
+        for region in dirty:
+            self._flushers[region]()
+
+    def update_crosshair(self, spread, recoil):
+        # 量化后比较，散布停止变化的帧不触碰场景图
+        state = (round(spread / Config.CROSSHAIR_SPREAD, 2), round(recoil, 2))
+        if state == self._crosshair_state: return
+        self._crosshair_state = state
+        scale, kick = state
+        self.crosshair.setPosHprScale(0, kick * Config.CROSSHAIR_KICK, 0, 0, 0, 0, scale, scale, 1)
+
+    def _flush_ammo(self):
+        current, max_ammo = self._ammo
+        self.ammo_text.text = f'{current} / {max_ammo}'
+        # 弹药不足时变红
+        self.ammo_text.color = color.red if current < max_ammo * 0.3 else color.white
+
+    def _flush_hp(self):
+        current_hp, max_hp = self._hp
+        current_hp = max(0, current_hp)
+        ratio = current_hp / max_hp
+        self.hp_text.text = f'HP: {int(current_hp)}'
+
+        if ratio < 0.3:
+            fill = color.red
+        elif ratio < 0.6:
+            fill = color.orange
+        else:
+            fill = color.lime
+        mesh = self.hp_bar.model
+        mesh.vertices = bar_vertices(self.HP_BAR[2], self.HP_BAR[3], ratio)
+        mesh.colors = mesh.colors[:4] + [fill] * 4
+        mesh.generate()
+
+    def _flush_kills(self):
+        self.kill_text.text = f'Kills: {self.kill_count}'
+
+    def _flush_damage(self):
+        # 受伤遮罩 0.5 秒内淡出，淡出期间每帧保持脏标记
+        self._damage_alpha = max(0, self._damage_alpha - time.dt)
+        self.damage_overlay.enabled = self._damage_alpha > 0
+        self.damage_overlay.alpha = self._damage_alpha
+        if self._damage_alpha > 0:
+            self._dirty.add('damage')
+
+
+class ProfilerOverlay(Entity):
+    """
+    性能面板：滚动的帧耗时曲线 + 各子系统耗时 + 场景实体按类统计。
+    数据来自 core/profiler.py 的 FrameHistory，面板隐藏时也一直在记录，出现卡顿后再打开或直接导出 CSV 即可。
+    """
+    # 曲线通道和颜色：整帧、模拟、渲染
+    GRAPH_CHANNELS = (('frame', color.white), ('level.sim', color.cyan), ('render', color.orange))
+    GRAPH_POS = (0.3, 0.3)       # 曲线区域左下角（camera.ui 坐标）
+    GRAPH_SIZE = (0.55, 0.15)
+
+    def __init__(self, history):
+        super().__init__(parent=camera.ui)
+        self.history = history
+        self.panel = Entity(parent=self, enabled=False)
+        gx, gy = self.GRAPH_POS
+        gw, gh = self.GRAPH_SIZE
+
+        Entity(parent=self.panel, model='quad', color=color.rgba(0, 0, 0, 160), origin=(-0.5, 0.5),
+               position=(gx - 0.02, gy + gh + 0.02, 1), scale=(gw + 0.04, 0.95))
+        # 参考线：60 FPS / 30 FPS
+        for ms in (1000 / 60, 1000 / 30):
+            y = gy + gh * min(ms / Config.PROFILER_GRAPH_MS, 1)
+            Entity(parent=self.panel, model=Mesh(vertices=[(gx, y, 0), (gx + gw, y, 0)], mode='line'),
+                   color=color.rgba(255, 255, 255, 60))
+
+        self.graph_lines = {}
+        for name, c in self.GRAPH_CHANNELS:
+            self.graph_lines[name] = Entity(parent=self.panel, color=c,
+                                            model=Mesh(vertices=[(gx, gy, 0), (gx, gy, 0)], mode='line', thickness=1.5))
+        self._xs = gx + np.linspace(0, gw, history.capacity, dtype=np.float32)
+
+        legend = '  '.join(name for name, c in self.GRAPH_CHANNELS)
+        Text(parent=self.panel, text=f'{legend}   (0-{Config.PROFILER_GRAPH_MS} ms)', position=(gx, gy + gh + 0.015), scale=0.7)
+        self.stats_text = Text(parent=self.panel, text='', position=(gx, gy - 0.01), scale=0.7, color=color.white)
+        self._text_timer = 0
+
+    def input(self, key):
+        if key == Config.PROFILER_TOGGLE_KEY:
+            self.panel.enabled = not self.panel.enabled
+            self._text_timer = 0
+        elif key == Config.PROFILER_DUMP_KEY:
+            self.dump_csv()
+
+    def update(self):
+        if not self.panel.enabled: return
+        self.draw_graphs()
+        self._text_timer -= time.dt
+        if self._text_timer <= 0:
+            self._text_timer = Config.PROFILER_TEXT_INTERVAL
+            self.refresh_text()
+
+    def draw_graphs(self):
+        gy = self.GRAPH_POS[1]
+        gh = self.GRAPH_SIZE[1]
+        for name, line in self.graph_lines.items():
+            buf = self.history.channels.get(name)
+            if buf is None or buf.count < 2: continue
+            values = buf.values()
+            ys = gy + gh * np.minimum(values / Config.PROFILER_GRAPH_MS, 1)
+            verts = np.zeros((len(values), 3), dtype=np.float32)
+            verts[:, 0] = self._xs[:len(values)]
+            verts[:, 1] = ys
+            line.model.vertices = verts.tolist()
+            line.model.generate()
+
+    def refresh_text(self):
+        channels = self.history.channels
+        frame = channels['frame'].values()
+        lines = []
+        if len(frame):
+            avg = float(frame.mean())
+            lines.append(f'FPS {1000 / max(avg, 1e-6):.0f}   frame {avg:.2f} avg / {float(frame.max()):.1f} max ms')
+        # 子系统按平均耗时从高到低
+        rows = []
+        for name, buf in channels.items():
+            if name == 'frame' or not buf.count: continue
+            v = buf.values()
+            rows.append((float(v.mean()), float(v.max()), name))
+        for avg, peak, name in sorted(rows, reverse=True):
+            lines.append(f'  {name:<14} {avg:6.2f} avg {peak:7.2f} max')
+
+        lines.append(f'timers {timers.pending} pending')
+        counts = Counter(type(e).__name__ for e in scene.entities)
+        lines.append(f'entities {len(scene.entities)}')
+        for name, n in counts.most_common(8):
+            lines.append(f'  {name:<14} {n}')
+        self.stats_text.text = '\n'.join(lines)
+
+    def dump_csv(self):
+        folder = Path(Config.PROFILER_DUMP_DIR)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / datetime.datetime.now().strftime('profile_%Y%m%d_%H%M%S.csv')
+        self.history.write_csv(path)
+        print(f'性能数据已导出: {path}（{min(self.history.frames, self.history.capacity)} 帧）')
+        return path
\ No newline at end of file
@@ -2,8 +2,9 @@
 from ursina import *
 
 class MainMenu(Entity):
-    def __init__(self, start_callback, exit_callback):
+    def __init__(self, start_callback, exit_callback, assets=None, horde_callback=None):
         super().__init__(parent=camera.ui)
+        self.assets = assets   # core/assets.py 的 AssetRegistry，菜单显示期间推进预热并显示进度
         self.main_panel = Entity(parent=self, enabled=True)
         
         # 背景
@@ -38,13 +39,24 @@ class MainMenu(Entity):
             y=0
         )
         self.play_btn.on_click = start_callback
+
+        # 尸潮模式：同样的波次规则，每波几百个敌人
+        self.horde_btn = Button(
+            parent=self.main_panel,
+            text='HORDE',
+            color=color.orange,
+            scale=(0.25, 0.05),
+            y=-0.07,
+            enabled=horde_callback is not None
+        )
+        self.horde_btn.on_click = horde_callback
         
         self.exit_btn = Button(
             parent=self.main_panel, 
             text='EXIT', 
             color=color.red, 
             scale=(0.25, 0.05), 
-            y=-0.1
+            y=-0.14
         )
         self.exit_btn.on_click = exit_callback
         
@@ -58,6 +70,20 @@ class MainMenu(Entity):
             color=color.light_gray
         )
 
+        # 资源预热进度条
+        self.loading_panel = Entity(parent=self.main_panel, y=-0.22, enabled=assets is not None)
+        Entity(parent=self.loading_panel, model='quad', color=color.rgb(40, 40, 40), scale=(0.4, 0.012))
+        self.loading_bar = Entity(parent=self.loading_panel, model='quad', color=color.azure, scale=(0, 0.012), x=-0.2, origin=(-0.5, 0))
+        self.loading_text = Text(parent=self.loading_panel, text='Loading...', origin=(0,0), scale=0.8, y=0.03, color=color.light_gray)
+
+    def update(self):
+        if not self.assets or not self.loading_panel.enabled: return
+        done = self.assets.poll()
+        self.loading_bar.scale_x = 0.4 * self.assets.progress
+        self.loading_text.text = f'Loading {self.assets.progress:.0%}  {self.assets.current}'
+        if done:
+            self.loading_panel.enabled = False
+
     def show(self):
         self.main_panel.enabled = True
         mouse.locked = False